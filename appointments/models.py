@@ -7,7 +7,7 @@ HIPAA-compliant appointment tracking with encryption for sensitive data.
 from django.db import models
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
-from core.security import encrypt_field, decrypt_field
+from core.security import encrypted_property
 import uuid
 from datetime import timedelta
 
@@ -199,29 +199,9 @@ class Appointment(models.Model):
         super().save(*args, **kwargs)
 
     # Encrypted field properties
-    @property
-    def notes(self):
-        return decrypt_field(self._notes) if self._notes else ""
-
-    @notes.setter
-    def notes(self, value):
-        self._notes = encrypt_field(value) if value else None
-
-    @property
-    def chief_complaint(self):
-        return decrypt_field(self._chief_complaint) if self._chief_complaint else ""
-
-    @chief_complaint.setter
-    def chief_complaint(self, value):
-        self._chief_complaint = encrypt_field(value) if value else None
-
-    @property
-    def internal_notes(self):
-        return decrypt_field(self._internal_notes) if self._internal_notes else ""
-
-    @internal_notes.setter
-    def internal_notes(self, value):
-        self._internal_notes = encrypt_field(value) if value else None
+    notes = encrypted_property("_notes")
+    chief_complaint = encrypted_property("_chief_complaint")
+    internal_notes = encrypted_property("_internal_notes")
 
     def get_duration(self):
         """Calculate actual appointment duration."""
@@ -295,13 +275,7 @@ class AppointmentReminder(models.Model):
     def __str__(self):
         return f"{self.get_reminder_type_display()} reminder for {self.appointment.appointment_number}"
 
-    @property
-    def message_content(self):
-        return decrypt_field(self._message_content) if self._message_content else ""
-
-    @message_content.setter
-    def message_content(self, value):
-        self._message_content = encrypt_field(value) if value else None
+    message_content = encrypted_property("_message_content")
 
 
 class RecurringAppointment(models.Model):
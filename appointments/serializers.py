@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from core.serializers import BatchDecryptListSerializer, BatchDecryptMixin
 from .models import Appointment, AppointmentType
 from users.models import User
 
@@ -58,6 +59,20 @@ class AppointmentSerializer(serializers.ModelSerializer):
         return obj.therapist.get_full_name() if obj.therapist else None
 
 
+class AppointmentNotesSerializer(BatchDecryptMixin, AppointmentSerializer):
+    """Appointment list for the treating clinician, with the encrypted notes"""
+
+    # Rendered from the ciphertext columns; the mixin swaps in the plaintext
+    notes = serializers.CharField(source="_notes", read_only=True)
+    chief_complaint = serializers.CharField(source="_chief_complaint", read_only=True)
+
+    class Meta(AppointmentSerializer.Meta):
+        fields = AppointmentSerializer.Meta.fields + ["notes", "chief_complaint"]
+        read_only_fields = fields
+        encrypted_fields = {"notes": "_notes", "chief_complaint": "_chief_complaint"}
+        list_serializer_class = BatchDecryptListSerializer
+
+
 class AppointmentCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Appointment
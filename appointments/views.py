@@ -6,6 +6,7 @@ from django.utils import timezone
 from .models import Appointment, AppointmentType
 from .serializers import (
     AppointmentSerializer,
+    AppointmentNotesSerializer,
     AppointmentCreateSerializer,
     AppointmentUpdateSerializer,
     AppointmentTypeSerializer,
@@ -127,6 +128,8 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             return AppointmentCreateSerializer
         elif self.action in ["update", "partial_update"]:
             return AppointmentUpdateSerializer
+        elif self.action == "notes":
+            return AppointmentNotesSerializer
         return AppointmentSerializer
 
     def perform_create(self, serializer):
@@ -162,6 +165,24 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 status="scheduled",
             ).update(status="cancelled")
 
+    @action(detail=False, methods=["get"])
+    def notes(self, request):
+        """List appointments with their clinical notes (therapists and admins)"""
+        if request.user.role not in ["admin", "therapist"]:
+            return Response(
+                {"error": "Only therapists and administrators can view clinical notes"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            # The whole page is decrypted in one pass
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
     @action(detail=True, methods=["post"])
     def cancel(self, request, pk=None):
         """Cancel an appointment and linked telehealth session"""
@@ -0,0 +1,433 @@
+"""
+Cold-tier archive of old AuditLog rows.
+
+Whole months older than AUDIT_HOT_MONTHS are written, sorted by
+(timestamp, id), to a segment file and then deleted from the table in
+chunks. A segment is a run of blocks of NDJSON rows, each block its own gzip
+member, encrypted at rest with core.storage's chunked AES-GCM format. A
+small JSON sidecar index records every block's plaintext offset, length,
+time bounds and chain_seq bounds, so a reader decrypts and decompresses
+only the blocks a query reaches:
+
+    audit-2025-01.seg       encrypted, concatenated gzip members
+    audit-2025-01.idx.json  {"start", "end", "rows", "blocks": [...]}
+
+The index is written last, so a segment without one is an interrupted run
+and is ignored (and replaced by the next run). Rows keep their hash chain
+fields, and audit.integrity verifies archived records alongside hot ones.
+
+Archived rows exist nowhere else, so AUDIT_ARCHIVE_PATH has no default: it
+must name durable storage (a mounted volume or object-storage bucket), not
+the app's own filesystem, which a redeploy replaces. Until it is set nothing
+is archived or deleted.
+"""
+
+import gzip
+import heapq
+import json
+import logging
+import os
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from core.storage import EncryptedFileReader, encrypt_stream
+from .models import AuditChainHead, AuditLog
+from .partitions import add_months, month_start
+
+logger = logging.getLogger("theracare.audit")
+
+# Archived columns, in file order
+ARCHIVE_FIELDS = (
+    "id",
+    "timestamp",
+    "user_id",
+    "action",
+    "resource_type",
+    "resource_id",
+    "patient_id",
+    "details",
+    "ip_address",
+    "user_agent",
+    "chain_seq",
+    "chain_hash",
+)
+SEGMENT_VERSION = 1
+
+
+def encode_timestamp(value: datetime) -> str:
+    """UTC ISO format with fixed precision, so strings sort like the datetimes"""
+    return value.astimezone(dt_timezone.utc).isoformat(timespec="microseconds")
+
+
+@lru_cache(maxsize=256)
+def _load_index(path: str, mtime_ns: int) -> Dict[str, Any]:
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def sort_key(record: Dict[str, Any]) -> Tuple[datetime, str]:
+    return record["timestamp"], str(record["id"])
+
+
+def to_instance(record: Dict[str, Any]) -> AuditLog:
+    """Unsaved AuditLog holding an archived record, for serializers"""
+    return AuditLog(
+        **{
+            field.attname: field.to_python(record[field.attname])
+            for field in AuditLog._meta.concrete_fields
+            if field.attname in record
+        }
+    )
+
+
+class AuditArchive:
+    """Writes and reads the segment files in one directory"""
+
+    def __init__(
+        self,
+        path=None,
+        hot_months: int = 12,
+        block_rows: int = 2000,
+        delete_chunk_size: int = 5000,
+    ):
+        self.path = Path(path) if path else None
+        self.hot_months = hot_months
+        self.block_rows = block_rows
+        self.delete_chunk_size = delete_chunk_size
+
+    @classmethod
+    def from_settings(cls) -> "AuditArchive":
+        hipaa_settings = getattr(settings, "HIPAA_SETTINGS", {})
+        return cls(
+            path=hipaa_settings.get("AUDIT_ARCHIVE_PATH"),
+            hot_months=hipaa_settings.get("AUDIT_HOT_MONTHS", 12),
+            block_rows=hipaa_settings.get("AUDIT_ARCHIVE_BLOCK_ROWS", 2000),
+            delete_chunk_size=hipaa_settings.get("AUDIT_ARCHIVE_DELETE_CHUNK", 5000),
+        )
+
+    def is_configured(self) -> bool:
+        return self.path is not None
+
+    def check_configured(self) -> None:
+        """Refuse to move rows anywhere but configured, durable storage"""
+        if not self.is_configured():
+            raise ImproperlyConfigured(
+                "HIPAA_SETTINGS AUDIT_ARCHIVE_PATH must name durable storage "
+                "before audit records are archived"
+            )
+
+    # Reading
+
+    def segments(self) -> List[Dict[str, Any]]:
+        """Indexes of complete segments, oldest first"""
+        if self.path is None or not self.path.is_dir():
+            return []
+        indexes = []
+        for index_path in self.path.glob("*.idx.json"):
+            index = _load_index(str(index_path), index_path.stat().st_mtime_ns)
+            indexes.append(dict(index, path=str(self.path / index["segment"])))
+        return sorted(indexes, key=lambda index: (index["start"], index["segment"]))
+
+    def watermark(self) -> Optional[datetime]:
+        """Records before this instant may be archived"""
+        segments = self.segments()
+        if not segments:
+            return None
+        return datetime.fromisoformat(max(segment["end"] for segment in segments))
+
+    def reaches(self, since: Optional[datetime]) -> bool:
+        """Whether a range starting at since extends into archived months"""
+        watermark = self.watermark()
+        return watermark is not None and since is not None and since < watermark
+
+    def read_block(self, reader: EncryptedFileReader, block: Dict[str, Any]):
+        data = b"".join(
+            reader.iter_range(block["offset"], block["offset"] + block["length"] - 1)
+        )
+        records = []
+        for line in gzip.decompress(data).splitlines():
+            record = json.loads(line)
+            record["timestamp"] = datetime.fromisoformat(record["timestamp"])
+            records.append(record)
+        return records
+
+    def iter_segment(
+        self,
+        segment: Dict[str, Any],
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        descending: bool = False,
+        block_filter: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        low = encode_timestamp(since) if since else None
+        high = encode_timestamp(until) if until else None
+        blocks = [
+            block
+            for block in segment["blocks"]
+            if (low is None or block["last"] >= low)
+            and (high is None or block["first"] < high)
+            and (block_filter is None or block_filter(block))
+        ]
+        if descending:
+            blocks.reverse()
+        with EncryptedFileReader(segment["path"]) as reader:
+            for block in blocks:
+                records = self.read_block(reader, block)
+                if descending:
+                    records.reverse()
+                for record in records:
+                    if since and record["timestamp"] < since:
+                        continue
+                    if until and record["timestamp"] >= until:
+                        continue
+                    yield record
+
+    def iter_records(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        descending: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """Archived records in [since, until), in (timestamp, id) order"""
+        low = encode_timestamp(since) if since else None
+        high = encode_timestamp(until) if until else None
+        segments = [
+            segment
+            for segment in self.segments()
+            if segment["rows"]
+            and (low is None or segment["last"] >= low)
+            and (high is None or segment["first"] < high)
+        ]
+
+        # Segments of different months never overlap; a month archived in
+        # several runs has one segment per run, merged here
+        groups: List[List[Dict[str, Any]]] = []
+        for segment in segments:
+            if groups and segment["first"] <= max(s["last"] for s in groups[-1]):
+                groups[-1].append(segment)
+            else:
+                groups.append([segment])
+        if descending:
+            groups.reverse()
+
+        for group in groups:
+            iterators = [
+                self.iter_segment(segment, since, until, descending)
+                for segment in group
+            ]
+            if len(iterators) == 1:
+                yield from iterators[0]
+            else:
+                yield from heapq.merge(*iterators, key=sort_key, reverse=descending)
+
+    def seq_bounds(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> Tuple[Optional[int], Optional[int]]:
+        """Lowest and highest chain_seq of archived blocks overlapping [since, until)"""
+        low = encode_timestamp(since) if since else None
+        high = encode_timestamp(until) if until else None
+        seqs = [
+            (block["min_seq"], block["max_seq"])
+            for segment in self.segments()
+            for block in segment["blocks"]
+            if block["min_seq"] is not None
+            and (low is None or block["last"] >= low)
+            and (high is None or block["first"] < high)
+        ]
+        if not seqs:
+            return None, None
+        return min(seq[0] for seq in seqs), max(seq[1] for seq in seqs)
+
+    def records_for_seq(self, seq_start: int, seq_end: int) -> List[Dict[str, Any]]:
+        """Archived records with chain_seq in seq_start..seq_end, by chain_seq"""
+
+        def overlaps(bounds):
+            return (
+                bounds.get("min_seq") is not None
+                and bounds["min_seq"] <= seq_end
+                and bounds["max_seq"] >= seq_start
+            )
+
+        records = []
+        for segment in self.segments():
+            if not overlaps(segment):
+                continue
+            for record in self.iter_segment(segment, block_filter=overlaps):
+                if record["chain_seq"] and seq_start <= record["chain_seq"] <= seq_end:
+                    records.append(record)
+        return sorted(records, key=lambda record: record["chain_seq"])
+
+    # Writing
+
+    def segment_name(self, month: datetime) -> str:
+        """First unused segment name for month"""
+        name = f"audit-{month:%Y-%m}"
+        run = 1
+        while (self.path / f"{name}.idx.json").exists():
+            run += 1
+            name = f"audit-{month:%Y-%m}-{run}"
+        return name
+
+    def archivable(self, month: datetime):
+        """
+        Rows of month to archive: those chained before now, so rows inserted
+        while the month is being archived are neither written nor deleted
+        """
+        queryset = AuditLog.objects.filter(
+            timestamp__gte=month, timestamp__lt=add_months(month, 1)
+        )
+        head = AuditChainHead.objects.filter(pk=1).first()
+        if head is not None:
+            queryset = queryset.filter(
+                Q(chain_seq__isnull=True) | Q(chain_seq__lte=head.seq)
+            )
+        return queryset
+
+    def write_segment(self, name: str, month: datetime, queryset) -> Dict[str, Any]:
+        """Write queryset's rows as segment name; returns its index"""
+        self.check_configured()
+        self.path.mkdir(parents=True, exist_ok=True)
+        rows = (
+            queryset.order_by("timestamp", "id")
+            .values_list(*ARCHIVE_FIELDS)
+            .iterator(chunk_size=self.block_rows)
+        )
+        blocks = []
+
+        def plaintext():
+            offset = 0
+            while True:
+                block_rows = list(islice(rows, self.block_rows))
+                if not block_rows:
+                    return
+                lines = []
+                seqs = []
+                for row in block_rows:
+                    record = dict(zip(ARCHIVE_FIELDS, row))
+                    record["id"] = str(record["id"])
+                    record["timestamp"] = encode_timestamp(record["timestamp"])
+                    if record["user_id"] is not None:
+                        record["user_id"] = str(record["user_id"])
+                    if record["chain_seq"] is not None:
+                        seqs.append(record["chain_seq"])
+                    lines.append(json.dumps(record, separators=(",", ":")))
+                data = gzip.compress(("\n".join(lines) + "\n").encode("utf-8"))
+                blocks.append(
+                    {
+                        "offset": offset,
+                        "length": len(data),
+                        "rows": len(block_rows),
+                        "first": encode_timestamp(block_rows[0][1]),
+                        "last": encode_timestamp(block_rows[-1][1]),
+                        "min_seq": min(seqs) if seqs else None,
+                        "max_seq": max(seqs) if seqs else None,
+                    }
+                )
+                offset += len(data)
+                yield data
+
+        segment_path = self.path / f"{name}.seg"
+        partial = self.path / f"{name}.seg.partial"
+        with open(partial, "wb") as fh:
+            encrypt_stream(plaintext(), fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(partial, segment_path)
+
+        seqs = [block for block in blocks if block["min_seq"] is not None]
+        index = {
+            "version": SEGMENT_VERSION,
+            "segment": segment_path.name,
+            "start": month.isoformat(),
+            "end": add_months(month, 1).isoformat(),
+            "rows": sum(block["rows"] for block in blocks),
+            "first": blocks[0]["first"] if blocks else None,
+            "last": blocks[-1]["last"] if blocks else None,
+            "min_seq": min(block["min_seq"] for block in seqs) if seqs else None,
+            "max_seq": max(block["max_seq"] for block in seqs) if seqs else None,
+            "blocks": blocks,
+        }
+        return index
+
+    def commit_index(self, name: str, index: Dict[str, Any]) -> None:
+        index_path = self.path / f"{name}.idx.json"
+        partial = self.path / f"{name}.idx.json.partial"
+        with open(partial, "w") as fh:
+            json.dump(index, fh, separators=(",", ":"))
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(partial, index_path)
+
+    def delete_archived(self, queryset) -> int:
+        """Delete queryset's rows in chunks of delete_chunk_size"""
+        self.check_configured()
+        deleted = 0
+        while True:
+            pks = list(queryset.values_list("pk", flat=True)[: self.delete_chunk_size])
+            if not pks:
+                return deleted
+            with transaction.atomic():
+                deleted += AuditLog.objects.filter(pk__in=pks).delete()[0]
+
+    def archive_month(self, month: datetime, dry_run: bool = False) -> int:
+        """Move month's rows into a new segment; returns the rows moved"""
+        self.check_configured()
+        queryset = self.archivable(month)
+        count = queryset.count()
+        if dry_run or not count:
+            return count
+
+        name = self.segment_name(month)
+        index = self.write_segment(name, month, queryset)
+
+        # Read the segment back before any row is deleted
+        written = sum(
+            1
+            for _ in self.iter_segment(
+                dict(index, path=str(self.path / index["segment"]))
+            )
+        )
+        if written != index["rows"] or written != count:
+            raise RuntimeError(
+                f"Audit archive {name} holds {written} rows, expected {count}"
+            )
+        self.commit_index(name, index)
+        deleted = self.delete_archived(queryset)
+        logger.info(f"Archived {written} audit records to {name} ({deleted} deleted)")
+        return written
+
+    def months_to_archive(self, now: Optional[datetime] = None) -> List[datetime]:
+        """Months before the hot window that still have rows in the table"""
+        cutoff = add_months(month_start(now or timezone.now()), -self.hot_months)
+        oldest = (
+            AuditLog.objects.filter(timestamp__lt=cutoff)
+            .order_by("timestamp")
+            .values_list("timestamp", flat=True)
+            .first()
+        )
+        months = []
+        month = month_start(oldest) if oldest else cutoff
+        while month < cutoff:
+            months.append(month)
+            month = add_months(month, 1)
+        return months
+
+    def archive_expired(
+        self, now: Optional[datetime] = None, dry_run: bool = False
+    ) -> List[Tuple[datetime, int]]:
+        """Archive every month before the hot window, oldest first"""
+        return [
+            (month, self.archive_month(month, dry_run=dry_run))
+            for month in self.months_to_archive(now)
+        ]
+
+
+audit_archive = SimpleLazyObject(AuditArchive.from_settings)
@@ -0,0 +1,191 @@
+"""
+Audit log filters.
+
+Besides the plain column filters, AuditLogFilter understands JSON-aware
+filters over ``details`` that PostgreSQL answers from the GIN
+``jsonb_path_ops`` index (audit migration 0004) instead of a text scan:
+
+    ?details__patient_id=42            details @> '{"patient_id": "42"}'
+    ?details__request__method=GET      nested keys, also containment
+    ?details_contains={"method":"GET"} arbitrary containment
+    ?details_has_key=timing            details @? '$."timing"'
+
+On databases without JSON containment (SQLite) the same filters fall back
+to key lookups.
+"""
+
+import json
+from typing import Any, Dict
+from django import forms
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.fields.json import HasKey
+from django.db.models.lookups import Lookup
+import django_filters
+from .models import AuditLog
+
+DETAILS_PREFIX = "details__"
+
+
+class HasKeyPath(Lookup):
+    """
+    Top-level key exists in a JSON column. On PostgreSQL this is written as
+    a jsonpath existence test, which jsonb_path_ops indexes support (the
+    ``?`` operator behind has_key is not).
+    """
+
+    lookup_name = "has_key_path"
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection):
+        return compiler.compile(HasKey(self.lhs, self.rhs))
+
+    def as_postgresql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        return f"{lhs} @? %s::jsonpath", (*lhs_params, f"$.{json.dumps(self.rhs)}")
+
+
+class JSONObjectField(forms.CharField):
+    def clean(self, value):
+        value = super().clean(value)
+        if not value:
+            return None
+        try:
+            data = json.loads(value)
+        except ValueError:
+            raise forms.ValidationError("Enter a valid JSON object.")
+        if not isinstance(data, dict):
+            raise forms.ValidationError("Enter a valid JSON object.")
+        return data
+
+
+class JSONObjectFilter(django_filters.Filter):
+    field_class = JSONObjectField
+
+
+def json_contains(value, fragment) -> bool:
+    """PostgreSQL @> semantics on decoded JSON"""
+    if isinstance(fragment, dict):
+        return isinstance(value, dict) and all(
+            key in value and json_contains(value[key], item)
+            for key, item in fragment.items()
+        )
+    if isinstance(fragment, list):
+        return isinstance(value, list) and all(
+            any(json_contains(element, item) for element in value) for item in fragment
+        )
+    return value == fragment
+
+
+def details_match(path, value, using: str = "default") -> Q:
+    """Q matching records whose details hold value at path (a list of keys)"""
+    if not connections[using].features.supports_json_field_contains:
+        return Q(**{"details__" + "__".join(path): value})
+    for key in reversed(path):
+        value = {key: value}
+    return Q(details__contains=value)
+
+
+def details_value_match(path, raw: str, using: str = "default") -> Q:
+    """
+    Match a query string value both as the string itself and, when it
+    parses as a JSON scalar, as that value (so ``42`` finds "42" and 42)
+    """
+    query = details_match(path, raw, using)
+    try:
+        parsed = json.loads(raw)
+    except ValueError:
+        return query
+    if parsed != raw and not isinstance(parsed, (dict, list)):
+        query |= details_match(path, parsed, using)
+    return query
+
+
+class AuditLogFilter(django_filters.FilterSet):
+    since = django_filters.IsoDateTimeFilter(field_name="timestamp", lookup_expr="gte")
+    until = django_filters.IsoDateTimeFilter(field_name="timestamp", lookup_expr="lt")
+    details_contains = JSONObjectFilter(method="filter_details_contains")
+    details_has_key = django_filters.CharFilter(method="filter_details_has_key")
+
+    class Meta:
+        model = AuditLog
+        fields = ["user", "action", "resource_type", "resource_id", "patient_id"]
+
+    def filter_details_contains(self, queryset, name, value):
+        query = Q()
+        for key, item in value.items():
+            query &= details_match([key], item, queryset.db)
+        return queryset.filter(query)
+
+    def filter_details_has_key(self, queryset, name, value):
+        return queryset.filter(HasKeyPath(F("details"), value))
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        for param in self.data:
+            if not param.startswith(DETAILS_PREFIX):
+                continue
+            path = param[len(DETAILS_PREFIX) :].split("__")
+            if not all(path):
+                continue
+            # The extracted column covers current records; containment still
+            # finds rows written before it existed
+            if path == ["patient_id"]:
+                queryset = queryset.filter(
+                    Q(patient_id=self.data[param])
+                    | details_value_match(path, self.data[param], queryset.db)
+                )
+                continue
+            queryset = queryset.filter(
+                details_value_match(path, self.data[param], queryset.db)
+            )
+        return queryset
+
+    def record_matches(self, record: Dict[str, Any]) -> bool:
+        """
+        The filters above applied to one decoded record, for rows read back
+        from the cold tier (audit.archive). Call after is_valid().
+        """
+        data = self.form.cleaned_data
+        user = data.get("user")
+        if user is not None and str(record["user_id"]) != str(user.pk):
+            return False
+        for field in ("action", "resource_type", "resource_id", "patient_id"):
+            if data.get(field) and record[field] != data[field]:
+                return False
+        if data.get("since") and record["timestamp"] < data["since"]:
+            return False
+        if data.get("until") and record["timestamp"] >= data["until"]:
+            return False
+
+        details = record["details"]
+        if data.get("details_contains") and not json_contains(
+            details, data["details_contains"]
+        ):
+            return False
+        if data.get("details_has_key") and not (
+            isinstance(details, dict) and data["details_has_key"] in details
+        ):
+            return False
+        for param in self.data:
+            if not param.startswith(DETAILS_PREFIX):
+                continue
+            path = param[len(DETAILS_PREFIX) :].split("__")
+            if not all(path):
+                continue
+            raw = self.data[param]
+            if path == ["patient_id"] and record["patient_id"] == raw:
+                continue
+            candidates = [raw]
+            try:
+                parsed = json.loads(raw)
+            except ValueError:
+                parsed = raw
+            if not isinstance(parsed, (dict, list)):
+                candidates.append(parsed)
+            value = details
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+            if value is None or value not in candidates:
+                return False
+        return True
@@ -0,0 +1,370 @@
+"""
+Tamper-evident hash chain over AuditLog.
+
+Every record gets the next ``chain_seq`` and a ``chain_hash``: an HMAC of
+the previous record's hash and the record's canonical content, keyed from
+HIPAA_SETTINGS (AUDIT_INTEGRITY_KEY, else ENCRYPTION_KEY). Writers link a
+whole batch under one lock on AuditChainHead, so the chain costs one row
+lock per batch rather than per record.
+
+The chain follows commit order: each batch is linked in event-time order,
+but records replayed from the writer's spill file (audit.writer) join the
+chain after newer records already written. Verification walks chain_seq,
+so a time range is checked over the chain_seq span its records cover.
+Rows may only leave the table through the archive, whose records are read
+back when verifying; any other deletion is reported as a missing record,
+or as a truncated tail when the newest records are gone.
+
+Runs of CHECKPOINT_INTERVAL records are sealed once verified into an
+AuditCheckpoint holding the Merkle root of their hashes. Verification then
+checks any time range segment by segment, in parallel, from the nearest
+checkpoints instead of rehashing from the first record, reading records
+moved to the cold tier (audit.archive) from their segments. Records written
+before the chain existed have no chain_seq and are not covered.
+"""
+
+import hashlib
+import heapq
+import hmac
+import ipaddress
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from django.conf import settings
+from django.db import connections
+from django.db.models import Max, Min
+from .archive import audit_archive
+from .models import AuditChainHead, AuditCheckpoint, AuditLog
+
+logger = logging.getLogger("theracare.audit")
+
+GENESIS_HASH = "0" * 64
+# Fields covered by the chain, in canonical order
+CHAIN_FIELDS = (
+    "id",
+    "timestamp",
+    "user_id",
+    "action",
+    "resource_type",
+    "resource_id",
+    "patient_id",
+    "details",
+    "ip_address",
+    "user_agent",
+)
+
+
+@lru_cache(maxsize=4)
+def _derive_key(key_string: str) -> bytes:
+    """Chain key, separate from the encryption and blind index keys"""
+    return hmac.new(
+        key_string.encode("utf-8"), b"theracare-audit-chain", hashlib.sha256
+    ).digest()
+
+
+def get_chain_key() -> bytes:
+    hipaa_settings = getattr(settings, "HIPAA_SETTINGS", {})
+    key_string = hipaa_settings.get("AUDIT_INTEGRITY_KEY") or hipaa_settings.get(
+        "ENCRYPTION_KEY"
+    )
+    if not key_string:
+        raise ValueError("AUDIT_INTEGRITY_KEY not found in HIPAA_SETTINGS")
+    return _derive_key(key_string)
+
+
+def canonical(row: Sequence[Any]) -> bytes:
+    """Stable encoding of CHAIN_FIELDS values, identical before and after a DB round trip"""
+    values = dict(zip(CHAIN_FIELDS, row))
+    timestamp: datetime = values["timestamp"]
+    values["id"] = str(values["id"])
+    values["timestamp"] = timestamp.astimezone(dt_timezone.utc).isoformat(
+        timespec="microseconds"
+    )
+    if values["user_id"] is not None:
+        values["user_id"] = str(values["user_id"])
+    if values["ip_address"]:
+        values["ip_address"] = str(ipaddress.ip_address(values["ip_address"]))
+    return json.dumps(
+        [values[field] for field in CHAIN_FIELDS],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    ).encode("utf-8")
+
+
+def chain_hash(previous: str, row: Sequence[Any], key: Optional[bytes] = None) -> str:
+    message = previous.encode("ascii") + b"\n" + canonical(row)
+    return hmac.new(key or get_chain_key(), message, hashlib.sha256).hexdigest()
+
+
+def link(audit_logs: List[AuditLog], using: str = "default") -> None:
+    """
+    Assign chain_seq and chain_hash to unsaved records. Must run in the
+    transaction that inserts them: the chain head stays locked until commit.
+    """
+    if not audit_logs:
+        return
+    key = get_chain_key()
+    head, _ = (
+        AuditChainHead.objects.using(using)
+        .select_for_update()
+        .get_or_create(pk=1, defaults={"seq": 0, "hash": GENESIS_HASH})
+    )
+    seq, previous = head.seq, head.hash
+    for audit_log in audit_logs:
+        seq += 1
+        previous = chain_hash(
+            previous, [getattr(audit_log, field) for field in CHAIN_FIELDS], key
+        )
+        audit_log.chain_seq = seq
+        audit_log.chain_hash = previous
+    head.seq, head.hash = seq, previous
+    head.save(using=using, update_fields=["seq", "hash", "updated_at"])
+
+
+def merkle_root(leaves: Iterable[str]) -> str:
+    """SHA-256 Merkle root of hex leaves (the last node is paired with itself)"""
+    level = [bytes.fromhex(leaf) for leaf in leaves]
+    if not level:
+        return GENESIS_HASH
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [
+            hashlib.sha256(level[i] + level[i + 1]).digest()
+            for i in range(0, len(level), 2)
+        ]
+    return level[0].hex()
+
+
+class SegmentResult:
+    """Outcome of rehashing chain_seq seq_start..seq_end"""
+
+    __slots__ = ("seq_start", "seq_end", "rows", "end_hash", "merkle_root", "errors")
+
+    def __init__(self, seq_start: int, seq_end: int):
+        self.seq_start = seq_start
+        self.seq_end = seq_end
+        self.rows = 0
+        self.end_hash = None
+        self.merkle_root = None
+        # (chain_seq, problem) pairs
+        self.errors: List[Tuple[int, str]] = []
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def verify_segment(
+    seq_start: int,
+    seq_end: int,
+    start_hash: str,
+    using: str = "default",
+    chunk_size: int = 2000,
+    tail_problem: str = "missing record",
+) -> SegmentResult:
+    """
+    Recompute the chain over seq_start..seq_end from start_hash. A changed
+    record is reported on its own: the stored hash carries the chain on. So
+    is a removed run, without flagging the record after it. Records missing
+    from the end of the segment are reported as tail_problem.
+    """
+    key = get_chain_key()
+    result = SegmentResult(seq_start, seq_end)
+    rows = (
+        AuditLog.objects.using(using)
+        .filter(chain_seq__gte=seq_start, chain_seq__lte=seq_end)
+        .order_by("chain_seq")
+        .values_list("chain_seq", "chain_hash", *CHAIN_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    archived = audit_archive.records_for_seq(seq_start, seq_end)
+    if archived:
+        rows = heapq.merge(
+            rows,
+            [
+                (record["chain_seq"], record["chain_hash"])
+                + tuple(record[field] for field in CHAIN_FIELDS)
+                for record in archived
+            ],
+            key=lambda row: row[0],
+        )
+    previous = start_hash
+    expected_seq = seq_start
+    leaves = []
+    for seq, stored_hash, *row in rows:
+        linked = seq == expected_seq
+        if not linked:
+            problem = "missing" if seq > expected_seq else "duplicate"
+            result.errors.append((expected_seq, f"{problem} record"))
+            if seq < expected_seq:
+                continue
+        expected_seq = seq + 1
+        # After a gap the previous hash is gone; only the gap is reported
+        if linked and chain_hash(previous, row, key) != stored_hash:
+            result.errors.append((seq, "hash mismatch"))
+        previous = stored_hash
+        leaves.append(stored_hash)
+        result.rows += 1
+    if expected_seq <= seq_end:
+        result.errors.append((expected_seq, tail_problem))
+    result.end_hash = previous
+    result.merkle_root = merkle_root(leaves)
+    return result
+
+
+def create_checkpoints(
+    interval: Optional[int] = None, using: str = "default"
+) -> List[AuditCheckpoint]:
+    """Seal every complete, verified run of interval records not yet checkpointed"""
+    if interval is None:
+        interval = getattr(settings, "HIPAA_SETTINGS", {}).get(
+            "AUDIT_CHECKPOINT_INTERVAL", 10000
+        )
+    head = AuditChainHead.objects.using(using).filter(pk=1).first()
+    if head is None:
+        return []
+    last = AuditCheckpoint.objects.using(using).order_by("-seq_end").first()
+    seq_start = last.seq_end + 1 if last else 1
+    start_hash = last.end_hash if last else GENESIS_HASH
+
+    created = []
+    while seq_start + interval - 1 <= head.seq:
+        seq_end = seq_start + interval - 1
+        result = verify_segment(seq_start, seq_end, start_hash, using=using)
+        if not result.ok:
+            logger.error(
+                f"Audit chain broken in {seq_start}-{seq_end}, not checkpointing: "
+                f"{result.errors[:10]}"
+            )
+            break
+        created.append(
+            AuditCheckpoint.objects.using(using).create(
+                seq_start=seq_start,
+                seq_end=seq_end,
+                start_hash=start_hash,
+                end_hash=result.end_hash,
+                merkle_root=result.merkle_root,
+            )
+        )
+        seq_start, start_hash = seq_end + 1, result.end_hash
+    return created
+
+
+def plan_verification(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    using: str = "default",
+) -> List[Dict[str, Any]]:
+    """
+    Segments covering the records in [since, until): whole checkpoints
+    overlapping the range, then the unsealed tail after the last one. Without
+    until the tail runs to AuditChainHead.seq rather than to the last
+    surviving record, so deleting the newest records is reported too.
+    """
+    chained = AuditLog.objects.using(using).filter(chain_seq__isnull=False)
+    if since is not None:
+        chained = chained.filter(timestamp__gte=since)
+    if until is not None:
+        chained = chained.filter(timestamp__lt=until)
+    bounds = chained.aggregate(low=Min("chain_seq"), high=Max("chain_seq"))
+    low, high = bounds["low"], bounds["high"]
+    # Records moved to the cold tier (audit.archive) count as well
+    archived_low, archived_high = audit_archive.seq_bounds(since, until)
+    if archived_low is not None:
+        low = archived_low if low is None else min(low, archived_low)
+        high = archived_high if high is None else max(high, archived_high)
+    head_seq = None
+    if until is None:
+        head = AuditChainHead.objects.using(using).filter(pk=1).first()
+        if head is not None and head.seq > 0 and (high is None or head.seq > high):
+            head_seq = high = head.seq
+            if low is None:
+                low = head.seq
+    if low is None:
+        return []
+
+    checkpoints = list(
+        AuditCheckpoint.objects.using(using).filter(
+            seq_end__gte=low, seq_start__lte=high
+        )
+    )
+    segments = [
+        {
+            "seq_start": checkpoint.seq_start,
+            "seq_end": checkpoint.seq_end,
+            "start_hash": checkpoint.start_hash,
+            "checkpoint": checkpoint,
+        }
+        for checkpoint in checkpoints
+    ]
+    covered = checkpoints[-1].seq_end if checkpoints else None
+    if covered is None or covered < high:
+        previous = (
+            AuditCheckpoint.objects.using(using)
+            .filter(seq_end__lt=low if covered is None else covered + 1)
+            .order_by("-seq_end")
+            .first()
+        )
+        segments.append(
+            {
+                "seq_start": previous.seq_end + 1 if previous else 1,
+                "seq_end": high,
+                "start_hash": previous.end_hash if previous else GENESIS_HASH,
+                "checkpoint": None,
+                # Records the chain head counts but the table no longer has
+                "truncated": head_seq is not None,
+            }
+        )
+    return segments
+
+
+def verify_range(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    workers: int = 4,
+    using: str = "default",
+) -> List[SegmentResult]:
+    """Verify the chain over [since, until), one segment per worker thread"""
+    segments = plan_verification(since, until, using=using)
+
+    def run(segment):
+        try:
+            result = verify_segment(
+                segment["seq_start"],
+                segment["seq_end"],
+                segment["start_hash"],
+                using=using,
+                tail_problem=(
+                    "truncated tail" if segment.get("truncated") else "missing record"
+                ),
+            )
+        finally:
+            # Worker threads are not request threads; do not leak connections
+            connections[using].close()
+        checkpoint = segment["checkpoint"]
+        if checkpoint is not None:
+            if result.end_hash != checkpoint.end_hash:
+                result.errors.append((checkpoint.seq_end, "checkpoint end mismatch"))
+            if result.merkle_root != checkpoint.merkle_root:
+                result.errors.append((checkpoint.seq_start, "merkle root mismatch"))
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        results = list(executor.map(run, segments))
+
+    # Each segment must continue the checkpoint before it (only the last
+    # segment can be the unsealed tail)
+    for index in range(1, len(segments)):
+        earlier, later = segments[index - 1], segments[index]
+        if (
+            later["seq_start"] != earlier["seq_end"] + 1
+            or later["start_hash"] != earlier["checkpoint"].end_hash
+        ):
+            results[index].errors.append((later["seq_start"], "checkpoint gap"))
+    return results
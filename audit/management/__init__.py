@@ -0,0 +1 @@
+# backend/audit/management/__init__.py
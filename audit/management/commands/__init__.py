@@ -0,0 +1 @@
+# backend/audit/management/commands/__init__.py
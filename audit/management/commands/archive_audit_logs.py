@@ -0,0 +1,52 @@
+# backend/audit/management/commands/archive_audit_logs.py
+"""
+Django management command to move AuditLog months older than the hot window
+into encrypted, compressed segment files (see ``audit.archive``):
+
+    python manage.py archive_audit_logs
+    python manage.py archive_audit_logs --months 6 --dry-run
+
+Rows are deleted from the table only after their segment was written and
+read back, and only when HIPAA_SETTINGS AUDIT_ARCHIVE_PATH names durable
+storage.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from audit.archive import AuditArchive
+
+
+class Command(BaseCommand):
+    help = "Archive AuditLog rows older than the hot window to segment files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            help="Months kept in the table (default: AUDIT_HOT_MONTHS)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count the rows that would be archived without moving them",
+        )
+
+    def handle(self, *args, **options):
+        archive = AuditArchive.from_settings()
+        try:
+            archive.check_configured()
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+        if options["months"] is not None:
+            if options["months"] < 1:
+                raise CommandError("--months must be positive")
+            archive.hot_months = options["months"]
+
+        results = archive.archive_expired(dry_run=options["dry_run"])
+        verb = "Would archive" if options["dry_run"] else "Archived"
+        for month, rows in results:
+            self.stdout.write(f"  {month:%Y-%m}: {rows} row(s)")
+        total = sum(rows for _, rows in results)
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {total} audit record(s) to {archive.path}")
+        )
@@ -0,0 +1,79 @@
+# backend/audit/management/commands/audit_partitions.py
+"""
+Django management command to maintain the monthly AuditLog partitions on
+PostgreSQL (see ``audit.partitions``):
+
+    python manage.py audit_partitions --convert --dry-run
+    python manage.py audit_partitions --convert
+    python manage.py audit_partitions --months-ahead 3
+
+``--convert`` partitions the existing table once. It validates a range
+CHECK and builds the (id, timestamp) index online first, then swaps the
+table in a single metadata-only transaction that briefly holds ACCESS
+EXCLUSIVE on audit_auditlog; run it by hand in a quiet period, not from a
+deploy.
+
+Maintenance creates upcoming partitions, moving any rows DEFAULT already
+holds for them, and drops partitions older than AUDIT_HOT_MONTHS once
+archive_audit_logs has emptied them. It runs daily from the
+``audit.tasks.maintain_audit_partitions`` Celery beat task.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import NotSupportedError
+from audit.partitions import AuditPartitionManager
+
+
+class Command(BaseCommand):
+    help = "Create upcoming AuditLog partitions and drop emptied ones (PostgreSQL)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            help="Months of partitions to create ahead "
+            "(default: HIPAA_SETTINGS AUDIT_PARTITION_MONTHS_AHEAD)",
+        )
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Partition the existing table first (once, by an operator)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Print the SQL without executing it",
+        )
+
+    def handle(self, *args, **options):
+        manager = AuditPartitionManager()
+        dry_run = options["dry_run"]
+
+        try:
+            if options["convert"]:
+                converted = manager.convert(dry_run=dry_run)
+                if not converted:
+                    self.stdout.write(f"{manager.table} is already partitioned")
+                for sql in converted:
+                    self.stdout.write(f"  {sql};")
+                if converted and dry_run:
+                    # Maintenance needs the partitioned table to plan against
+                    return
+            result = manager.maintain(
+                months_ahead=options["months_ahead"], dry_run=dry_run
+            )
+        except NotSupportedError as e:
+            raise CommandError(str(e))
+
+        for sql in result["statements"]:
+            self.stdout.write(f"  {sql};")
+        verb = "Would expire" if dry_run else "Expired"
+        for name in result["expired"]:
+            self.stdout.write(f"  {verb} {name}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(result['created'])} partition(s) created, "
+                f"{len(result['expired'])} expired"
+                f"{' (dry run)' if dry_run else ''}"
+            )
+        )
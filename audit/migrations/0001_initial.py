@@ -0,0 +1,75 @@
+# Generated manually on 2026-10-16
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuditLog",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("action", models.CharField(max_length=100)),
+                (
+                    "resource_type",
+                    models.CharField(blank=True, max_length=100, null=True),
+                ),
+                (
+                    "resource_id",
+                    models.CharField(blank=True, max_length=100, null=True),
+                ),
+                ("details", models.JSONField(blank=True, default=dict)),
+                ("ip_address", models.GenericIPAddressField(blank=True, null=True)),
+                ("user_agent", models.TextField(blank=True, null=True)),
+                ("timestamp", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="audit_logs",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-timestamp"],
+                "indexes": [
+                    models.Index(
+                        fields=["-timestamp"], name="audit_audit_timesta_901180_idx"
+                    ),
+                    models.Index(
+                        fields=["user", "-timestamp"],
+                        name="audit_audit_user_id_ea8c9f_idx",
+                    ),
+                    models.Index(
+                        fields=["action", "-timestamp"],
+                        name="audit_audit_action_e33994_idx",
+                    ),
+                    models.Index(
+                        fields=["resource_type", "resource_id"],
+                        name="audit_audit_resourc_2a3aef_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
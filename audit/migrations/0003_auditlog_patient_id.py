@@ -0,0 +1,26 @@
+# Generated manually on 2026-10-16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit", "0002_auditlog_timestamp_default"),
+    ]
+
+    operations = [
+        # Extracted from details by AuditLog.save for the patient filter
+        migrations.AddField(
+            model_name="auditlog",
+            name="patient_id",
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["patient_id", "-timestamp"],
+                name="audit_audit_patient_fa030b_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated manually on 2026-10-16
+
+from django.contrib.postgres.indexes import GinIndex
+from django.db import migrations
+
+# Answers the containment (@>) and jsonpath (@?) filters in audit.filters
+DETAILS_INDEX = GinIndex(
+    fields=["details"], name="audit_details_gin", opclasses=["jsonb_path_ops"]
+)
+
+
+def add_details_index(apps, schema_editor):
+    """GIN indexes are PostgreSQL only; elsewhere the filters use key lookups"""
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.add_index(apps.get_model("audit", "AuditLog"), DETAILS_INDEX)
+
+
+def remove_details_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.remove_index(apps.get_model("audit", "AuditLog"), DETAILS_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit", "0003_auditlog_patient_id"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_details_index, remove_details_index),
+    ]
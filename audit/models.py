@@ -1,7 +1,12 @@
 from django.db import models
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 import uuid
 
+# details keys holding the patient a record concerns (server and client naming)
+PATIENT_ID_KEYS = ("patient_id", "patientId")
+
 
 class AuditLog(models.Model):
     """Audit log model for tracking all system actions (HIPAA compliance)."""
@@ -18,9 +23,15 @@ class AuditLog(models.Model):
     resource_type = models.CharField(max_length=100, null=True, blank=True)
     resource_id = models.CharField(max_length=100, null=True, blank=True)
     details = models.JSONField(default=dict, blank=True)
+    # Copied out of details so investigations by patient use a B-tree index
+    patient_id = models.CharField(max_length=100, null=True, blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(null=True, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set by the caller so that buffered writes keep the time of the event
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
+    # Position and HMAC in the tamper-evident chain (see audit.integrity)
+    chain_seq = models.BigIntegerField(null=True, blank=True, editable=False)
+    chain_hash = models.CharField(max_length=64, null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ["-timestamp"]
@@ -29,7 +40,60 @@ class AuditLog(models.Model):
             models.Index(fields=["user", "-timestamp"]),
             models.Index(fields=["action", "-timestamp"]),
             models.Index(fields=["resource_type", "resource_id"]),
+            models.Index(fields=["patient_id", "-timestamp"]),
+            models.Index(fields=["chain_seq"]),
         ]
+        # PostgreSQL also has a GIN jsonb_path_ops index over details, made by
+        # migration 0004 rather than declared here so SQLite can build the table
 
     def __str__(self):
         return f"{self.action} by {self.user} at {self.timestamp}"
+
+    def save(self, *args, **kwargs):
+        self.fill_extracted_fields()
+        if not self._state.adding or self.chain_seq is not None:
+            super().save(*args, **kwargs)
+            return
+        from .integrity import link
+
+        using = kwargs.get("using") or "default"
+        with transaction.atomic(using=using):
+            link([self], using=using)
+            super().save(*args, **kwargs)
+
+    def fill_extracted_fields(self) -> None:
+        """Copy indexed keys out of details; bulk_create callers must call this"""
+        if self.patient_id is None and isinstance(self.details, dict):
+            for key in PATIENT_ID_KEYS:
+                if self.details.get(key):
+                    self.patient_id = str(self.details[key])[:100]
+                    break
+
+
+class AuditChainHead(models.Model):
+    """The last link of the AuditLog hash chain; a single locked row"""
+
+    seq = models.BigIntegerField(default=0)
+    hash = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Audit chain head {self.seq}"
+
+
+class AuditCheckpoint(models.Model):
+    """Merkle root over a verified run of chained AuditLog records"""
+
+    seq_start = models.BigIntegerField()
+    seq_end = models.BigIntegerField(unique=True)
+    # Chain hash just before seq_start, and of seq_end
+    start_hash = models.CharField(max_length=64)
+    end_hash = models.CharField(max_length=64)
+    merkle_root = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["seq_start"]
+
+    def __str__(self):
+        return f"Audit checkpoint {self.seq_start}-{self.seq_end}"
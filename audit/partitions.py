@@ -0,0 +1,394 @@
+"""
+Monthly range partitioning of the AuditLog table on PostgreSQL.
+
+The table is partitioned on ``timestamp`` with one partition per calendar
+month (``audit_auditlog_p2026_01``, ...) plus a DEFAULT partition that
+catches rows for months without one. Inserts and recent-window queries only
+touch the current partitions.
+
+Retention is the archive's (audit.archive): months older than
+AUDIT_HOT_MONTHS are moved to the cold tier by archive_audit_logs, and the
+partitions they emptied are then dropped here, a metadata-only DETACH
+rather than a DELETE over hundreds of millions of rows. A partition still
+holding rows is never dropped.
+
+The table is converted once by an operator with ``audit_partitions
+--convert`` (``convert()``), not by a migration: the existing table becomes
+the ``audit_auditlog_legacy`` partition holding everything before the first
+monthly partition. The archive empties it month by month like any other,
+and it is dropped with them once its whole range has left the hot window.
+"""
+
+import logging
+import re
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+from django.db import NotSupportedError, connections, transaction
+from django.utils import timezone
+from .models import AuditLog
+
+logger = logging.getLogger("theracare.audit")
+
+
+def month_start(value: datetime) -> datetime:
+    """First instant of value's month, in UTC"""
+    value = value.astimezone(dt_timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+class AuditPartitionManager:
+    """Creates, lists and expires the monthly AuditLog partitions"""
+
+    def __init__(self, using: str = "default"):
+        self.connection = connections[using]
+        self.using = using
+        self.table = AuditLog._meta.db_table
+        self.partition_pattern = re.compile(
+            rf"^{re.escape(self.table)}_p(\d{{4}})_(\d{{2}})$"
+        )
+
+    def check_supported(self) -> None:
+        if self.connection.vendor != "postgresql":
+            raise NotSupportedError(
+                "AuditLog partitioning requires PostgreSQL, not "
+                f"{self.connection.vendor}"
+            )
+
+    def quote(self, name: str) -> str:
+        return self.connection.ops.quote_name(name)
+
+    def partition_name(self, month: datetime) -> str:
+        return f"{self.table}_p{month:%Y_%m}"
+
+    def is_partitioned(self) -> bool:
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_partitioned_table pt "
+                "JOIN pg_class c ON c.oid = pt.partrelid "
+                "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+                [self.table],
+            )
+            return cursor.fetchone() is not None
+
+    def monthly_partitions(self) -> Dict[str, datetime]:
+        """Attached monthly partitions, name -> first day of the month"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT child.relname FROM pg_inherits i "
+                "JOIN pg_class child ON child.oid = i.inhrelid "
+                "JOIN pg_class parent ON parent.oid = i.inhparent "
+                "WHERE parent.relname = %s AND pg_table_is_visible(parent.oid)",
+                [self.table],
+            )
+            names = [row[0] for row in cursor.fetchall()]
+
+        partitions = {}
+        for name in names:
+            match = self.partition_pattern.match(name)
+            if match:
+                partitions[name] = datetime(
+                    int(match.group(1)), int(match.group(2)), 1, tzinfo=dt_timezone.utc
+                )
+        return partitions
+
+    def default_partition(self) -> str:
+        return f"{self.table}_default"
+
+    def create_statements(
+        self, months_ahead: int, now: Optional[datetime] = None
+    ) -> Dict[str, List[str]]:
+        """
+        SQL creating each missing partition for the next months_ahead months,
+        by name, to run in one transaction. The current month is never
+        created here: it already belongs to the legacy partition right after
+        convert(), and is created ahead of time by earlier runs otherwise.
+
+        Rows for a month without a partition land in DEFAULT, and PostgreSQL
+        refuses to attach a partition whose range DEFAULT still holds rows.
+        So the new month is built as a standalone table, DEFAULT's rows for it
+        are moved in (DEFAULT is locked against inserts meanwhile), and only
+        then is it attached.
+        """
+        existing = self.monthly_partitions()
+        current = month_start(now or timezone.now())
+        q = self.quote
+        table = q(self.table)
+        default = q(self.default_partition())
+        statements = {}
+        for offset in range(1, months_ahead + 1):
+            month = add_months(current, offset)
+            name = self.partition_name(month)
+            if name in existing:
+                continue
+            low = f"'{month.isoformat()}'"
+            high = f"'{add_months(month, 1).isoformat()}'"
+            statements[name] = [
+                f"LOCK TABLE {default} IN SHARE ROW EXCLUSIVE MODE",
+                f"CREATE TABLE {q(name)} (LIKE {table} INCLUDING DEFAULTS "
+                f"INCLUDING CONSTRAINTS INCLUDING STORAGE)",
+                f"WITH moved AS (DELETE FROM {default} "
+                f'WHERE "timestamp" >= {low} AND "timestamp" < {high} RETURNING *) '
+                f"INSERT INTO {q(name)} SELECT * FROM moved",
+                # Proving the range up front keeps ATTACH from rescanning it
+                f"ALTER TABLE {q(name)} ADD CONSTRAINT {q(f'{name}_range')} "
+                f'CHECK ("timestamp" IS NOT NULL AND "timestamp" >= {low} '
+                f'AND "timestamp" < {high})',
+                f"ALTER TABLE {table} ATTACH PARTITION {q(name)} "
+                f"FOR VALUES FROM ({low}) TO ({high})",
+                f"ALTER TABLE {q(name)} DROP CONSTRAINT {q(f'{name}_range')}",
+            ]
+        return statements
+
+    def is_empty(self, name: str) -> bool:
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {self.quote(name)})")
+            return not cursor.fetchone()[0]
+
+    def expired_partitions(
+        self, hot_months: int, now: Optional[datetime] = None
+    ) -> List[str]:
+        """
+        Partitions entirely older than the hot window whose rows have all
+        been moved to the archive (audit.archive), the legacy one included;
+        a partition still holding rows is kept until archive_audit_logs has
+        emptied it
+        """
+        cutoff = add_months(month_start(now or timezone.now()), -hot_months)
+        # Upper bound of each partition's range
+        bounds = {
+            name: add_months(month, 1)
+            for name, month in self.monthly_partitions().items()
+        }
+        legacy_bound = self.legacy_bound()
+        if legacy_bound is not None:
+            bounds[self.legacy_partition()] = legacy_bound
+        return sorted(
+            name
+            for name, bound in bounds.items()
+            if bound <= cutoff and self.is_empty(name)
+        )
+
+    def expire_statements(self, name: str) -> List[str]:
+        """SQL detaching and dropping the empty partition name"""
+        # Metadata only, so the lock on the parent is brief. (CONCURRENTLY is
+        # not available while a DEFAULT partition exists.)
+        return [
+            f"ALTER TABLE {self.quote(self.table)} DETACH PARTITION {self.quote(name)}",
+            f"DROP TABLE {self.quote(name)}",
+        ]
+
+    def execute(self, statements: List[str]) -> None:
+        with self.connection.cursor() as cursor:
+            for sql in statements:
+                logger.info(f"Audit partitions: {sql}")
+                cursor.execute(sql)
+
+    def maintain(
+        self,
+        months_ahead: Optional[int] = None,
+        hot_months: Optional[int] = None,
+        dry_run: bool = False,
+    ) -> Dict[str, List[str]]:
+        """
+        Create upcoming partitions and drop emptied ones older than the hot
+        window; unset arguments come from HIPAA_SETTINGS. Returns the
+        partitions created and expired, and the SQL run for them.
+        """
+        self.check_supported()
+        if not self.is_partitioned():
+            raise NotSupportedError(
+                f"{self.table} is not partitioned; run audit_partitions --convert"
+            )
+        hipaa_settings = getattr(settings, "HIPAA_SETTINGS", {})
+        if months_ahead is None:
+            months_ahead = hipaa_settings.get("AUDIT_PARTITION_MONTHS_AHEAD", 3)
+        if hot_months is None:
+            hot_months = hipaa_settings.get("AUDIT_HOT_MONTHS", 12)
+
+        created = self.create_statements(months_ahead)
+        expired = {
+            name: self.expire_statements(name)
+            for name in self.expired_partitions(hot_months)
+        }
+        if not dry_run:
+            for statements in list(created.values()) + list(expired.values()):
+                with transaction.atomic(using=self.using):
+                    self.execute(statements)
+        return {
+            "created": list(created),
+            "expired": list(expired),
+            "statements": [
+                sql
+                for statements in list(created.values()) + list(expired.values())
+                for sql in statements
+            ],
+        }
+
+    def legacy_partition(self) -> str:
+        return f"{self.table}_legacy"
+
+    def legacy_bound(self) -> Optional[datetime]:
+        """Upper bound of the attached legacy partition, or None"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_get_expr(c.relpartbound, c.oid) FROM pg_class c "
+                "WHERE c.relname = %s AND c.relispartition "
+                "AND pg_table_is_visible(c.oid)",
+                [self.legacy_partition()],
+            )
+            row = cursor.fetchone()
+        match = re.search(r"TO \('([^']+)'\)", row[0]) if row else None
+        if not match:
+            return None
+        return datetime.fromisoformat(match.group(1)).astimezone(dt_timezone.utc)
+
+    def conversion_cutover(self, now: Optional[datetime] = None) -> datetime:
+        """The legacy partition holds every row before the next month"""
+        return add_months(month_start(now or timezone.now()), 1)
+
+    def range_check(self) -> Optional[Tuple[str, bool]]:
+        """(cutover, validated) of a range CHECK added by an earlier attempt"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_get_constraintdef(oid), convalidated FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND conname = %s",
+                [self.table, f"{self.legacy_partition()}_range"],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        return re.search(r"< '([^']+)'", row[0]).group(1), row[1]
+
+    def prepare_statements(
+        self, cutover: str, range_check: Optional[Tuple[str, bool]] = None
+    ) -> List[str]:
+        """
+        SQL run before the conversion, outside any transaction and without
+        blocking writes, so that the swap itself is metadata only:
+
+        * a CHECK proving the table's range, added NOT VALID (a brief lock)
+          and validated separately (a scan that allows reads and writes), so
+          ATTACH skips its own scan under ACCESS EXCLUSIVE;
+        * the (id, timestamp) unique index the partitioned primary key needs,
+          built CONCURRENTLY.
+
+        Steps already done by an earlier attempt (range_check) are skipped.
+        """
+        table = self.table
+        check = f"{self.legacy_partition()}_range"
+        q = self.quote
+        statements = []
+        if range_check is None:
+            statements.append(
+                f"ALTER TABLE {q(table)} ADD CONSTRAINT {q(check)} "
+                f'CHECK ("timestamp" IS NOT NULL AND "timestamp" < \'{cutover}\') '
+                f"NOT VALID"
+            )
+        if range_check is None or not range_check[1]:
+            statements.append(f"ALTER TABLE {q(table)} VALIDATE CONSTRAINT {q(check)}")
+        statements.append(
+            f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS "
+            f'{q(f"{table}_id_timestamp")} ON {q(table)} ("id", "timestamp")'
+        )
+        return statements
+
+    def convert_statements(self, cutover: str) -> List[str]:
+        """
+        SQL turning the prepared table into a partitioned one, in one
+        transaction. The old table keeps its rows and becomes the legacy
+        partition for everything before cutover; its indexes are renamed so
+        the parent can take over the original names, and are attached to the
+        parent's rather than rebuilt.
+        """
+        table = self.table
+        legacy = self.legacy_partition()
+        id_timestamp = f"{table}_id_timestamp"
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexname, indexdef FROM pg_indexes "
+                "WHERE tablename = %s AND schemaname = current_schema() "
+                "AND indexname <> %s",
+                [table, id_timestamp],
+            )
+            indexes = cursor.fetchall()
+            cursor.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype = 'f'",
+                [table],
+            )
+            foreign_keys = cursor.fetchall()
+
+        def legacy_name(name):
+            return f"{name[:56]}_legacy"
+
+        q = self.quote
+        statements = [f"ALTER TABLE {q(table)} RENAME TO {q(legacy)}"]
+        for index_name in [name for name, _ in indexes] + [id_timestamp]:
+            statements.append(
+                f"ALTER INDEX {q(index_name)} RENAME TO {q(legacy_name(index_name))}"
+            )
+        statements += [
+            # The partition key must be part of the primary key; the prebuilt
+            # unique index becomes the legacy partition's
+            f"ALTER TABLE {q(legacy)} DROP CONSTRAINT "
+            f"{q(legacy_name(f'{table}_pkey'))}",
+            f"ALTER TABLE {q(legacy)} ADD CONSTRAINT {q(f'{legacy}_pkey')} "
+            f"PRIMARY KEY USING INDEX {q(legacy_name(id_timestamp))}",
+            # Not INCLUDING CONSTRAINTS: the range CHECK is the legacy table's
+            f"CREATE TABLE {q(table)} (LIKE {q(legacy)} INCLUDING DEFAULTS "
+            f'INCLUDING STORAGE) PARTITION BY RANGE ("timestamp")',
+            f'ALTER TABLE {q(table)} ADD CONSTRAINT {q(f"{table}_pkey")} '
+            f'PRIMARY KEY ("id", "timestamp")',
+        ]
+        for index_name, index_def in indexes:
+            if index_name == f"{table}_pkey" or " UNIQUE " in index_def:
+                continue
+            statements.append(index_def)
+        for constraint_name, constraint_def in foreign_keys:
+            statements.append(
+                f"ALTER TABLE {q(table)} ADD CONSTRAINT {q(constraint_name)} "
+                f"{constraint_def}"
+            )
+        statements += [
+            f"ALTER TABLE {q(table)} ATTACH PARTITION {q(legacy)} "
+            f"FOR VALUES FROM (MINVALUE) TO ('{cutover}')",
+            f"CREATE TABLE {q(self.default_partition())} PARTITION OF {q(table)} "
+            f"DEFAULT",
+        ]
+        return statements
+
+    def convert(self, dry_run: bool = False) -> List[str]:
+        """
+        Partition an existing unpartitioned table. The preparation runs
+        first, in autocommit; the swap then holds ACCESS EXCLUSIVE on the
+        table for one short, metadata-only transaction. Run it from
+        ``audit_partitions --convert``, not during a deploy, and not across
+        the end of a month: rows stamped after the cutover are refused until
+        the swap completes.
+        """
+        self.check_supported()
+        if self.is_partitioned():
+            return []
+        if self.connection.in_atomic_block:
+            raise NotSupportedError(
+                "AuditLog partition conversion cannot run inside a transaction"
+            )
+        range_check = self.range_check()
+        cutover = (
+            range_check[0] if range_check else self.conversion_cutover().isoformat()
+        )
+        prepare = self.prepare_statements(cutover, range_check)
+        if not dry_run:
+            self.execute(prepare)
+        statements = self.convert_statements(cutover)
+        if not dry_run:
+            with transaction.atomic(using=self.using):
+                self.execute(statements)
+        return prepare + statements
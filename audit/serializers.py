@@ -23,8 +23,9 @@ class AuditLogSerializer(serializers.ModelSerializer):
             "resource_type",
             "resource_id",
             "details",
+            "patient_id",
             "ip_address",
             "user_agent",
             "timestamp",
         ]
-        read_only_fields = ["id", "timestamp", "username", "user_email"]
+        read_only_fields = ["id", "timestamp", "username", "user_email", "patient_id"]
@@ -0,0 +1,71 @@
+"""
+Audit app background tasks
+"""
+
+from celery import shared_task
+from django.db import connection
+from .archive import audit_archive
+from .integrity import create_checkpoints
+from .partitions import AuditPartitionManager
+import logging
+
+logger = logging.getLogger("theracare.audit")
+
+ARCHIVE_PATH_MISSING = (
+    "HIPAA_SETTINGS AUDIT_ARCHIVE_PATH is not set: audit records older than "
+    "AUDIT_HOT_MONTHS are not archived and no AuditLog partition is dropped, "
+    "so the table grows without bound. Set AUDIT_ARCHIVE_PATH to durable "
+    "storage (a Railway volume or mounted bucket)."
+)
+
+
+@shared_task
+def maintain_audit_partitions():
+    """
+    Create upcoming monthly AuditLog partitions and drop those the archive
+    has emptied. Scheduled daily by CELERY_BEAT_SCHEDULE; a no-op outside
+    PostgreSQL.
+    """
+    if connection.vendor != "postgresql":
+        return None
+
+    manager = AuditPartitionManager()
+    if not manager.is_partitioned():
+        logger.warning(
+            f"{manager.table} is not partitioned; run audit_partitions --convert"
+        )
+        return None
+
+    if not audit_archive.is_configured():
+        # Only partitions the archive has emptied are dropped
+        logger.error(ARCHIVE_PATH_MISSING)
+
+    result = manager.maintain()
+    logger.info(
+        f"Audit partitions: {len(result['created'])} created, "
+        f"{len(result['expired'])} expired"
+    )
+    return {"created": len(result["created"]), "expired": result["expired"]}
+
+
+@shared_task
+def create_audit_checkpoints():
+    """Seal completed runs of the AuditLog hash chain into Merkle checkpoints"""
+    created = create_checkpoints()
+    if created:
+        logger.info(f"Audit checkpoints sealed through chain_seq {created[-1].seq_end}")
+    return len(created)
+
+
+@shared_task
+def archive_audit_logs():
+    """Move AuditLog months older than AUDIT_HOT_MONTHS to the cold tier"""
+    if not audit_archive.is_configured():
+        # Logged on every scheduled run until the path is configured
+        logger.error(ARCHIVE_PATH_MISSING)
+        return 0
+    results = audit_archive.archive_expired()
+    archived = sum(rows for _, rows in results)
+    if archived:
+        logger.info(f"Archived {archived} audit records from {len(results)} month(s)")
+    return archived
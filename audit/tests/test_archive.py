@@ -0,0 +1,182 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+from audit.archive import AuditArchive
+from audit.models import AuditLog
+from audit.partitions import month_start
+from audit.tasks import archive_audit_logs
+from audit.views import AuditLogViewSet
+
+NOW = datetime(2026, 10, 16, 12, tzinfo=dt_timezone.utc)
+OLD_MONTH = month_start(NOW - timedelta(days=120))
+
+
+class ArchiveTestCase(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.archive = AuditArchive(
+            os.path.join(self.root, "archive"), hot_months=3, block_rows=2
+        )
+
+    def log(self, action, timestamp, **fields):
+        return AuditLog.objects.create(action=action, timestamp=timestamp, **fields)
+
+
+class AuditArchiveTests(ArchiveTestCase):
+    def test_write_read_back_and_delete(self):
+        logs = [
+            self.log(f"old-{i}", OLD_MONTH + timedelta(hours=i), details={"n": i})
+            for i in range(5)
+        ]
+        recent = self.log("recent", NOW)
+
+        self.assertEqual(self.archive.archive_month(OLD_MONTH), 5)
+        self.assertEqual(list(AuditLog.objects.all()), [recent])
+        files = sorted(os.listdir(self.archive.path))
+        self.assertEqual(files, ["audit-2026-06.idx.json", "audit-2026-06.seg"])
+        # Encrypted at rest
+        with open(self.archive.path / "audit-2026-06.seg", "rb") as fh:
+            self.assertNotIn(b"old-1", fh.read())
+
+        (segment,) = self.archive.segments()
+        self.assertEqual(segment["rows"], 5)
+        self.assertEqual(len(segment["blocks"]), 3)
+        records = list(self.archive.iter_records())
+        self.assertEqual([r["id"] for r in records], [str(log.pk) for log in logs])
+        self.assertEqual(records[2]["details"], {"n": 2})
+        self.assertEqual(records[2]["timestamp"], logs[2].timestamp)
+        # Only the blocks a range reaches are read
+        middle = list(
+            self.archive.iter_records(
+                since=OLD_MONTH + timedelta(hours=2),
+                until=OLD_MONTH + timedelta(hours=4),
+            )
+        )
+        self.assertEqual([r["action"] for r in middle], ["old-2", "old-3"])
+        self.assertTrue(self.archive.reaches(OLD_MONTH))
+        self.assertFalse(self.archive.reaches(NOW))
+
+    def test_a_month_archived_twice_is_merged(self):
+        self.log("first", OLD_MONTH + timedelta(hours=2))
+        self.archive.archive_month(OLD_MONTH)
+        self.log("late", OLD_MONTH + timedelta(hours=1))
+        self.archive.archive_month(OLD_MONTH)
+        self.assertEqual(len(self.archive.segments()), 2)
+        self.assertEqual(
+            [r["action"] for r in self.archive.iter_records()], ["late", "first"]
+        )
+
+    def test_failed_read_back_deletes_nothing(self):
+        self.log("old", OLD_MONTH)
+        with mock.patch.object(self.archive, "iter_segment", return_value=iter([])):
+            with self.assertRaises(RuntimeError):
+                self.archive.archive_month(OLD_MONTH)
+        self.assertEqual(AuditLog.objects.count(), 1)
+        self.assertEqual(self.archive.segments(), [])
+
+    def test_archive_expired_keeps_the_hot_window(self):
+        self.log("old", OLD_MONTH)
+        self.log("hot", month_start(NOW) - timedelta(days=40))
+        results = self.archive.archive_expired(now=NOW)
+        self.assertEqual(sum(rows for _, rows in results), 1)
+        self.assertEqual(
+            list(AuditLog.objects.values_list("action", flat=True)), ["hot"]
+        )
+
+    def test_refuses_without_a_configured_path(self):
+        self.log("old", OLD_MONTH)
+        archive = AuditArchive(None, hot_months=3)
+        with self.assertRaises(ImproperlyConfigured):
+            archive.archive_expired(now=NOW)
+        with self.assertRaises(ImproperlyConfigured):
+            archive.delete_archived(AuditLog.objects.all())
+        self.assertEqual(AuditLog.objects.count(), 1)
+        self.assertEqual(archive.segments(), [])
+        self.assertFalse(archive.reaches(OLD_MONTH))
+
+    def test_scheduled_archive_logs_an_error_without_a_path(self):
+        self.log("old", OLD_MONTH)
+        with mock.patch("audit.tasks.audit_archive", AuditArchive(None)):
+            with self.assertLogs("theracare.audit", "ERROR") as logs:
+                self.assertEqual(archive_audit_logs(), 0)
+        self.assertIn("AUDIT_ARCHIVE_PATH is not set", logs.output[0])
+        self.assertEqual(AuditLog.objects.count(), 1)
+
+    def test_command_requires_a_configured_path(self):
+        hipaa_settings = {**settings.HIPAA_SETTINGS, "AUDIT_ARCHIVE_PATH": ""}
+        with override_settings(HIPAA_SETTINGS=hipaa_settings):
+            with self.assertRaisesMessage(CommandError, "AUDIT_ARCHIVE_PATH"):
+                call_command("archive_audit_logs", stdout=StringIO())
+
+
+class ArchivedListingTests(ArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = get_user_model().objects.create_user(
+            "auditor", "auditor@example.com", "pw-Auditor-1", is_staff=True
+        )
+        patcher = mock.patch("audit.views.audit_archive", self.archive)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = APIRequestFactory()
+
+        for i in range(5):
+            self.log("view" if i % 2 else "update", OLD_MONTH + timedelta(hours=i))
+        self.archive.archive_month(OLD_MONTH)
+        for i in range(3):
+            self.log("view" if i % 2 else "update", NOW - timedelta(hours=i))
+        self.since = (OLD_MONTH - timedelta(days=1)).isoformat()
+
+    def get(self, viewset_action, url="/api/audit/logs/", **params):
+        view = AuditLogViewSet.as_view({"get": viewset_action})
+        request = self.factory.get(url, params)
+        force_authenticate(request, user=self.admin)
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_list_pages_through_hot_and_archived_records(self):
+        page = self.get("list", since=self.since, page_size=3).data
+        self.assertNotIn("count", page)
+        timestamps = [log["timestamp"] for log in page["results"]]
+        while page["next"]:
+            page = self.get("list", url=page["next"]).data
+            timestamps += [log["timestamp"] for log in page["results"]]
+        self.assertEqual(len(timestamps), 8)
+        self.assertEqual(timestamps, sorted(timestamps, reverse=True))
+
+        # Walking back from the last page returns the page before it
+        back = self.get("list", url=page["previous"]).data
+        self.assertEqual([log["timestamp"] for log in back["results"]], timestamps[3:6])
+
+    def test_list_filters_archived_records(self):
+        page = self.get("list", since=self.since, action="view", page_size=10).data
+        actions = [log["action"] for log in page["results"]]
+        self.assertEqual(actions, ["view"] * 3)
+
+    def test_hot_window_lists_skip_the_archive(self):
+        with mock.patch.object(self.archive, "iter_records") as iter_records:
+            page = self.get("list", page_size=10).data
+        iter_records.assert_not_called()
+        self.assertEqual(page["count"], 3)
+
+    def test_export_merges_archived_records_oldest_first(self):
+        response = self.get("export", url="/api/audit/logs/export/", since=self.since)
+        records = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(len(records), 8)
+        timestamps = [record["timestamp"] for record in records]
+        self.assertEqual(timestamps, sorted(timestamps))
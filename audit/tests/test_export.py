@@ -0,0 +1,128 @@
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from audit.export import CHUNK_BYTES, EXPORT_FIELDS, encode_ndjson, gzip_chunks
+from audit.models import AuditLog
+from audit.views import AuditLogViewSet
+
+URL = "/api/audit/logs/export/"
+
+
+class AuditExportViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_user(
+            "auditor", "auditor@example.com", "pw-Auditor-1", is_staff=True
+        )
+        now = timezone.now()
+        for i in range(5):
+            AuditLog.objects.create(
+                action="view" if i % 2 else "update",
+                details={"n": i, "note": 'comma, "quote"'},
+                timestamp=now - timedelta(minutes=i),
+            )
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.view = AuditLogViewSet.as_view({"get": "export"})
+
+    def export(self, **params):
+        request = self.factory.get(URL, params)
+        force_authenticate(request, user=self.admin)
+        return self.view(request)
+
+    def test_ndjson_streams_oldest_first(self):
+        response = self.export(action="view")
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn("attachment;", response["Content-Disposition"])
+        records = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual([record["details"]["n"] for record in records], [3, 1])
+        self.assertEqual(list(records[0]), list(EXPORT_FIELDS))
+
+    def test_rows_are_read_only_while_streaming(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.export()
+        self.assertFalse(
+            any('FROM "audit_auditlog"' in q["sql"] for q in queries.captured_queries)
+        )
+        self.assertEqual(len(b"".join(response.streaming_content).split(b"\n")), 6)
+
+    def test_csv(self):
+        response = self.export(output="csv")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0], list(EXPORT_FIELDS))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(json.loads(rows[1][-1]), {"n": 4, "note": 'comma, "quote"'})
+
+    def test_csv_cells_cannot_start_a_formula(self):
+        AuditLog.objects.all().delete()
+        AuditLog.objects.create(
+            action='=HYPERLINK("http://x")',
+            resource_type="+1",
+            resource_id="-2",
+            user_agent="@SUM(A1)",
+            details={"n": 0},
+        )
+        content = b"".join(self.export(output="csv").streaming_content).decode()
+        row = dict(zip(EXPORT_FIELDS, list(csv.reader(io.StringIO(content)))[1]))
+        self.assertEqual(row["action"], '\'=HYPERLINK("http://x")')
+        self.assertEqual(row["resource_type"], "'+1")
+        self.assertEqual(row["resource_id"], "'-2")
+        self.assertEqual(row["user_agent"], "'@SUM(A1)")
+        self.assertEqual(json.loads(row["details"]), {"n": 0})
+        self.assertEqual(row["timestamp"][:2], "20")
+
+    def test_gzip(self):
+        plain = b"".join(self.export().streaming_content)
+        response = self.export(gzip="true")
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertTrue(response["Content-Disposition"].endswith('.ndjson.gz"'))
+        # The file name carries the time; the rows are what must match
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), plain)
+
+    def test_unknown_output(self):
+        self.assertEqual(self.export(output="xml").status_code, 400)
+
+
+class ExportEncodingTests(SimpleTestCase):
+    def rows(self, count):
+        now = timezone.now()
+        for i in range(count):
+            yield (
+                f"00000000-0000-0000-0000-{i:012d}",
+                now,
+                None,
+                "view",
+                "patient",
+                str(i),
+                str(i),
+                "10.0.0.1",
+                "x" * 200,
+                {"n": i},
+            )
+
+    def test_output_is_chunked(self):
+        chunks = list(encode_ndjson(self.rows(2000)))
+        self.assertGreater(len(chunks), 1)
+        # A chunk is sent as soon as it passes CHUNK_BYTES
+        self.assertTrue(all(len(chunk) < CHUNK_BYTES + 1024 for chunk in chunks))
+        self.assertEqual(b"".join(chunks).count(b"\n"), 2000)
+
+    def test_gzip_chunks_round_trip(self):
+        chunks = list(encode_ndjson(self.rows(2000)))
+        compressed = b"".join(gzip_chunks(iter(chunks)))
+        self.assertEqual(gzip.decompress(compressed), b"".join(chunks))
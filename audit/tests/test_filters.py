@@ -0,0 +1,90 @@
+from django.test import TestCase
+from audit.filters import AuditLogFilter, json_contains
+from audit.models import AuditLog
+
+
+class AuditLogFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.get_42 = AuditLog.objects.create(
+            action="view",
+            details={"patient_id": "42", "request": {"method": "GET"}, "timing": 3},
+        )
+        cls.post_42 = AuditLog.objects.create(
+            action="update",
+            details={"patientId": 42, "request": {"method": "POST"}},
+        )
+        cls.get_7 = AuditLog.objects.create(
+            action="view", details={"patient_id": 7, "request": {"method": "GET"}}
+        )
+
+    def matching(self, **params):
+        filterset = AuditLogFilter(params, queryset=AuditLog.objects.all())
+        self.assertTrue(filterset.is_valid(), filterset.errors)
+        return set(filterset.qs.values_list("pk", flat=True))
+
+    def test_nested_key(self):
+        self.assertEqual(
+            self.matching(details__request__method="GET"),
+            {self.get_42.pk, self.get_7.pk},
+        )
+
+    def test_value_matches_string_and_number(self):
+        self.assertEqual(self.matching(details__patient_id="7"), {self.get_7.pk})
+        # Old rows hold "42" in details; the extracted column covers patientId
+        self.assertEqual(
+            self.matching(details__patient_id="42"), {self.get_42.pk, self.post_42.pk}
+        )
+
+    def test_contains(self):
+        self.assertEqual(
+            self.matching(details_contains='{"request": {"method": "POST"}}'),
+            {self.post_42.pk},
+        )
+        filterset = AuditLogFilter(
+            {"details_contains": "[1]"}, queryset=AuditLog.objects.all()
+        )
+        self.assertFalse(filterset.is_valid())
+
+    def test_has_key(self):
+        self.assertEqual(self.matching(details_has_key="timing"), {self.get_42.pk})
+
+    def test_combines_with_column_filters(self):
+        self.assertEqual(
+            self.matching(action="view", details__request__method="GET"),
+            {self.get_42.pk, self.get_7.pk},
+        )
+        self.assertEqual(
+            self.matching(action="update", details__request__method="GET"), set()
+        )
+
+    def test_record_matches_agrees_with_the_query(self):
+        params = {"details__request__method": "GET", "details_has_key": "timing"}
+        filterset = AuditLogFilter(params, queryset=AuditLog.objects.all())
+        self.assertTrue(filterset.is_valid())
+        matched = {
+            log.pk
+            for log in AuditLog.objects.all()
+            if filterset.record_matches(
+                {
+                    "user_id": log.user_id,
+                    "action": log.action,
+                    "resource_type": log.resource_type,
+                    "resource_id": log.resource_id,
+                    "patient_id": log.patient_id,
+                    "timestamp": log.timestamp,
+                    "details": log.details,
+                }
+            )
+        }
+        self.assertEqual(matched, set(filterset.qs.values_list("pk", flat=True)))
+
+
+class JSONContainsTests(TestCase):
+    def test_postgresql_semantics(self):
+        value = {"a": {"b": [1, 2, {"c": 3}]}, "d": "x"}
+        self.assertTrue(json_contains(value, {"a": {"b": [2]}}))
+        self.assertTrue(json_contains(value, {"a": {"b": [{"c": 3}]}}))
+        self.assertFalse(json_contains(value, {"a": {"b": [4]}}))
+        self.assertFalse(json_contains(value, {"d": "y"}))
+        self.assertTrue(json_contains(value, {}))
@@ -0,0 +1,153 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+from django.test import TransactionTestCase
+from django.utils import timezone
+from audit.archive import AuditArchive
+from audit.integrity import create_checkpoints, verify_range
+from audit.models import AuditLog
+from audit.writer import AuditWriter
+
+NOW = datetime(2026, 10, 16, 12, tzinfo=dt_timezone.utc)
+
+
+def problems(results):
+    return [error for result in results for error in result.errors]
+
+
+class AuditChainTests(TransactionTestCase):
+    # verify_range reads from worker threads, outside a test transaction
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.archive = AuditArchive(os.path.join(self.root, "archive"), hot_months=3)
+        patcher = mock.patch("audit.integrity.audit_archive", self.archive)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def log(self, action, timestamp=None):
+        return AuditLog.objects.create(
+            action=action, details={"n": action}, timestamp=timestamp or timezone.now()
+        )
+
+    def test_intact_chain_verifies(self):
+        for i in range(5):
+            self.log(f"event-{i}")
+        results = verify_range(workers=2)
+        self.assertEqual(problems(results), [])
+        self.assertEqual(sum(result.rows for result in results), 5)
+
+    def test_changed_and_deleted_records_are_reported(self):
+        logs = [self.log(f"event-{i}") for i in range(5)]
+        AuditLog.objects.filter(pk=logs[1].pk).update(action="edited")
+        # Removed outside the archive, e.g. a hand-dropped partition
+        AuditLog.objects.filter(pk=logs[3].pk).delete()
+        self.assertEqual(
+            problems(verify_range()),
+            [
+                (logs[1].chain_seq, "hash mismatch"),
+                (logs[3].chain_seq, "missing record"),
+            ],
+        )
+
+    def test_deleting_the_newest_records_is_a_truncated_tail(self):
+        logs = [self.log(f"event-{i}") for i in range(5)]
+        AuditLog.objects.filter(pk__in=[log.pk for log in logs[3:]]).delete()
+        self.assertEqual(
+            problems(verify_range()), [(logs[3].chain_seq, "truncated tail")]
+        )
+        # Also past the last checkpoint, and with every record gone
+        create_checkpoints(interval=2)
+        self.assertEqual(
+            problems(verify_range()), [(logs[3].chain_seq, "truncated tail")]
+        )
+        AuditLog.objects.all().delete()
+        # From the end of the last checkpoint (event-0, event-1)
+        self.assertEqual(
+            problems(verify_range(since=timezone.now())),
+            [(logs[2].chain_seq, "truncated tail")],
+        )
+        # A bounded range is checked over the records it covers
+        self.assertEqual(problems(verify_range(until=timezone.now())), [])
+
+    def test_checkpoints_seal_verified_runs(self):
+        logs = [self.log(f"event-{i}") for i in range(6)]
+        self.assertEqual(len(create_checkpoints(interval=2)), 3)
+        self.assertEqual(problems(verify_range(workers=3)), [])
+
+        AuditLog.objects.filter(pk=logs[2].pk).update(action="edited")
+        self.assertEqual(
+            problems(verify_range()), [(logs[2].chain_seq, "hash mismatch")]
+        )
+        # Rewriting the stored hash too breaks the sealed Merkle root
+        AuditLog.objects.filter(pk=logs[2].pk).update(chain_hash="0" * 64)
+        self.assertIn(
+            (logs[2].chain_seq, "merkle root mismatch"), problems(verify_range())
+        )
+
+    def test_replayed_spill_keeps_the_chain_verifiable(self):
+        writer = AuditWriter(
+            batch_size=3, spill_path=os.path.join(self.root, "spill.ndjson")
+        )
+        base = timezone.now() - timedelta(minutes=10)
+
+        def record(minute):
+            return {
+                "action": f"spilled-{minute}",
+                "timestamp": base + timedelta(minutes=minute),
+            }
+
+        # Two processes spilled interleaved, out of time order
+        writer.spill([record(4), record(1)])
+        writer.spill([record(3), record(0), record(2)])
+        self.log("live")
+        self.assertEqual(writer.replay_spill(), 5)
+
+        replayed = AuditLog.objects.filter(action__startswith="spilled").order_by(
+            "chain_seq"
+        )
+        self.assertEqual(
+            [log.action for log in replayed], [f"spilled-{i}" for i in range(5)]
+        )
+        self.assertEqual(problems(verify_range()), [])
+        # A time range before the live record still covers the replayed ones
+        results = verify_range(until=base + timedelta(minutes=5))
+        self.assertEqual(problems(results), [])
+        self.assertGreaterEqual(sum(result.rows for result in results), 5)
+
+    def test_archived_records_are_verified_from_the_archive(self):
+        old = [
+            self.log(f"old-{i}", timestamp=NOW - timedelta(days=200 + i))
+            for i in range(4)
+        ]
+        for i in range(2):
+            self.log(f"recent-{i}", timestamp=NOW)
+        create_checkpoints(interval=3)
+
+        results = self.archive.archive_expired(now=NOW)
+        self.assertEqual(sum(rows for _, rows in results), 4)
+        self.assertFalse(AuditLog.objects.filter(pk__in=[log.pk for log in old]))
+
+        results = verify_range()
+        self.assertEqual(problems(results), [])
+        self.assertEqual(sum(result.rows for result in results), 6)
+        # Ranges entirely inside the archive are planned from its index, as
+        # the whole checkpoints (1-3, 4-6) holding their records
+        results = verify_range(until=NOW - timedelta(days=100))
+        self.assertEqual(problems(results), [])
+        self.assertEqual([(r.seq_start, r.seq_end) for r in results], [(1, 3), (4, 6)])
+
+    def test_rows_deleted_after_archiving_a_month_elsewhere_are_missing(self):
+        for i in range(3):
+            self.log(f"old-{i}", timestamp=NOW - timedelta(days=200 + i))
+        self.log("recent", timestamp=NOW)
+        # One month archived properly, then a row dropped by hand
+        self.archive.archive_expired(now=NOW)
+        extra = self.log("later", timestamp=NOW)
+        AuditLog.objects.filter(pk=extra.pk).delete()
+        self.log("last", timestamp=NOW)
+        self.assertEqual(
+            problems(verify_range()), [(extra.chain_seq, "missing record")]
+        )
@@ -0,0 +1,128 @@
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+from django.test import SimpleTestCase
+from audit.partitions import AuditPartitionManager
+
+NOW = datetime(2026, 10, 16, tzinfo=dt_timezone.utc)
+
+
+def utc_month(year, month):
+    return datetime(year, month, 1, tzinfo=dt_timezone.utc)
+
+
+class PartitionPlanTests(SimpleTestCase):
+    def setUp(self):
+        self.manager = AuditPartitionManager()
+        self.quote = mock.patch.object(
+            AuditPartitionManager, "quote", side_effect=lambda name: f'"{name}"'
+        )
+        self.quote.start()
+        self.addCleanup(self.quote.stop)
+
+    def test_new_month_takes_rows_from_default_before_attaching(self):
+        existing = {"audit_auditlog_p2026_11": utc_month(2026, 11)}
+        with mock.patch.object(
+            self.manager, "monthly_partitions", return_value=existing
+        ):
+            created = self.manager.create_statements(2, now=NOW)
+        self.assertEqual(list(created), ["audit_auditlog_p2026_12"])
+        statements = created["audit_auditlog_p2026_12"]
+        self.assertTrue(statements[0].startswith('LOCK TABLE "audit_auditlog_default"'))
+        move = next(i for i, sql in enumerate(statements) if "DELETE FROM" in sql)
+        attach = next(i for i, sql in enumerate(statements) if "ATTACH" in sql)
+        self.assertLess(move, attach)
+        self.assertIn("'2026-12-01T00:00:00+00:00'", statements[move])
+        self.assertIn("'2027-01-01T00:00:00+00:00'", statements[move])
+        self.assertNotIn("PARTITION OF", " ".join(statements))
+
+    def test_only_emptied_months_past_the_hot_window_expire(self):
+        partitions = {
+            "audit_auditlog_p2025_08": utc_month(2025, 8),
+            "audit_auditlog_p2025_09": utc_month(2025, 9),
+            "audit_auditlog_p2025_10": utc_month(2025, 10),
+        }
+        with mock.patch.object(
+            self.manager, "monthly_partitions", return_value=partitions
+        ), mock.patch.object(
+            self.manager, "legacy_bound", return_value=None
+        ), mock.patch.object(
+            self.manager,
+            "is_empty",
+            side_effect=lambda name: name != "audit_auditlog_p2025_09",
+        ):
+            expired = self.manager.expired_partitions(12, now=NOW)
+        # 2025-09 still holds rows; 2025-10 is inside the hot window
+        self.assertEqual(expired, ["audit_auditlog_p2025_08"])
+
+    def test_emptied_legacy_partition_expires_with_its_last_month(self):
+        with mock.patch.object(
+            self.manager, "monthly_partitions", return_value={}
+        ), mock.patch.object(
+            self.manager, "legacy_bound", return_value=utc_month(2025, 10)
+        ), mock.patch.object(
+            self.manager, "is_empty", return_value=True
+        ):
+            self.assertEqual(
+                self.manager.expired_partitions(12, now=NOW),
+                ["audit_auditlog_legacy"],
+            )
+            # Its last month, 2025-09, must have left the hot window
+            self.assertEqual(self.manager.expired_partitions(13, now=NOW), [])
+
+
+class PartitionConversionTests(SimpleTestCase):
+    def setUp(self):
+        self.manager = AuditPartitionManager()
+        patcher = mock.patch.object(
+            AuditPartitionManager, "quote", side_effect=lambda name: f'"{name}"'
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_preparation_validates_online_and_resumes(self):
+        cutover = "2026-11-01T00:00:00+00:00"
+        statements = self.manager.prepare_statements(cutover)
+        self.assertTrue(statements[0].endswith("NOT VALID"))
+        self.assertIn("VALIDATE CONSTRAINT", statements[1])
+        self.assertIn("CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS", statements[2])
+
+        # Added but not validated by an interrupted attempt
+        statements = self.manager.prepare_statements(cutover, (cutover, False))
+        self.assertIn("VALIDATE CONSTRAINT", statements[0])
+        self.assertEqual(len(statements), 2)
+        self.assertEqual(
+            len(self.manager.prepare_statements(cutover, (cutover, True))), 1
+        )
+
+    def test_swap_reuses_the_prepared_index_and_check(self):
+        cursor = mock.MagicMock()
+        cursor.fetchall.side_effect = [
+            [
+                ("audit_auditlog_pkey", "CREATE UNIQUE INDEX audit_auditlog_pkey ..."),
+                (
+                    "audit_audit_timesta_901180_idx",
+                    "CREATE INDEX audit_audit_timesta_901180_idx ON "
+                    'public.audit_auditlog USING btree ("timestamp" DESC)',
+                ),
+            ],
+            [("audit_fk", "FOREIGN KEY (user_id) REFERENCES users(id)")],
+        ]
+        connection = mock.MagicMock()
+        connection.cursor.return_value.__enter__.return_value = cursor
+        self.manager.connection = connection
+
+        statements = self.manager.convert_statements("2026-11-01 00:00:00+00")
+        sql = "\n".join(statements)
+        self.assertIn(
+            'PRIMARY KEY USING INDEX "audit_auditlog_id_timestamp_legacy"', sql
+        )
+        self.assertNotIn("INCLUDING CONSTRAINTS", sql)
+        self.assertNotIn("VALIDATE", sql)
+        attach = next(i for i, s in enumerate(statements) if "ATTACH" in s)
+        index = next(i for i, s in enumerate(statements) if "timesta_901180" in s)
+        # Parent indexes exist before ATTACH, which then adopts the legacy ones
+        self.assertLess(index, attach)
+        self.assertIn(
+            "FOR VALUES FROM (MINVALUE) TO ('2026-11-01 00:00:00+00')",
+            statements[attach],
+        )
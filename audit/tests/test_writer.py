@@ -0,0 +1,172 @@
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import timedelta
+from unittest import mock
+from django.db import OperationalError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from audit.models import AuditLog
+from audit.writer import AuditWriter
+
+
+def make_record(action, **fields):
+    return {
+        "user_id": None,
+        "action": action,
+        "resource_type": "patient",
+        "resource_id": "7",
+        "details": {"patient_id": "7"},
+        "ip_address": "10.0.0.1",
+        "user_agent": "tests",
+        "timestamp": timezone.now(),
+        **fields,
+    }
+
+
+class AuditWriterTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.writer = AuditWriter(
+            queue_size=2,
+            batch_size=2,
+            spill_path=os.path.join(self.root, "spill.ndjson"),
+        )
+        # Tests flush explicitly; no background thread
+        patcher = mock.patch.object(self.writer, "_ensure_started")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def spilled_actions(self):
+        if not self.writer.spill_path.exists():
+            return []
+        with open(self.writer.spill_path) as fh:
+            return [self.writer.load_record(line)["action"] for line in fh]
+
+    def test_flush_writes_queued_records_in_bulk(self):
+        self.writer.enqueue(make_record("view"))
+        self.writer.enqueue(make_record("update"))
+        with CaptureQueriesContext(connection) as queries:
+            self.writer.flush()
+        inserts = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith('INSERT INTO "audit_auditlog"')
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            sorted(AuditLog.objects.values_list("action", flat=True)),
+            ["update", "view"],
+        )
+        log = AuditLog.objects.get(action="view")
+        self.assertEqual(log.patient_id, "7")
+        self.assertIsNotNone(log.chain_hash)
+
+    def test_full_queue_spills_instead_of_blocking(self):
+        for action in ("a", "b", "c"):
+            self.writer.enqueue(make_record(action))
+        self.assertEqual(self.spilled_actions(), ["c"])
+        self.assertEqual(self.writer.queue.qsize(), 2)
+
+    def test_spilled_records_are_encrypted_and_keep_their_ids(self):
+        self.writer.enqueue(make_record("a"))
+        self.writer.enqueue(make_record("b"))
+        self.writer.enqueue(make_record("c", details={"diagnosis": "F41.1"}))
+        with open(self.writer.spill_path) as fh:
+            content = fh.read()
+        self.assertNotIn("F41.1", content)
+        self.assertNotIn('"action"', content)
+
+        (spilled,) = [self.writer.load_record(line) for line in content.splitlines()]
+        self.assertEqual(spilled["details"], {"diagnosis": "F41.1"})
+        queued = [self.writer.queue.get_nowait() for _ in range(2)]
+        self.writer.write_batch(queued)
+        self.writer.replay_spill()
+        self.assertEqual(
+            {log.pk for log in AuditLog.objects.all()},
+            {record["id"] for record in queued} | {spilled["id"]},
+        )
+
+    def test_plaintext_spill_files_still_replay(self):
+        record = make_record("legacy")
+        with open(self.writer.spill_path, "w") as fh:
+            fh.write(json.dumps(record, default=str) + "\n")
+        self.assertEqual(self.writer.replay_spill(), 1)
+        self.assertEqual(AuditLog.objects.get().action, "legacy")
+
+    def test_records_written_before_a_failed_flush_are_not_duplicated(self):
+        records = [make_record(f"event-{i}") for i in range(3)]
+        for record in records:
+            record["id"] = uuid.uuid4()
+        original = self.writer._bulk_insert
+
+        def commit_then_fail(records, **kwargs):
+            # The insert commits but the error reaches the writer anyway
+            original(records, **kwargs)
+            raise OperationalError("connection lost")
+
+        with mock.patch.object(
+            self.writer, "_bulk_insert", side_effect=commit_then_fail
+        ):
+            self.writer.write_batch(records[:2])
+        self.writer.spill(records[2:])
+        self.writer._degraded_until = 0
+
+        self.assertEqual(self.writer.replay_spill(), 3)
+        self.assertEqual(
+            sorted(AuditLog.objects.values_list("action", flat=True)),
+            ["event-0", "event-1", "event-2"],
+        )
+        # The chain has no gaps for the skipped rows
+        self.assertEqual(
+            sorted(AuditLog.objects.values_list("chain_seq", flat=True)), [1, 2, 3]
+        )
+
+    def test_failed_flush_spills_and_backs_off(self):
+        with mock.patch.object(
+            self.writer, "_bulk_insert", side_effect=OperationalError("down")
+        ) as bulk_insert:
+            self.writer.write_batch([make_record("a")])
+            # Degraded: later batches go straight to the spill file
+            self.writer.write_batch([make_record("b")])
+        self.assertEqual(bulk_insert.call_count, 1)
+        self.assertEqual(self.spilled_actions(), ["a", "b"])
+        self.assertFalse(AuditLog.objects.exists())
+
+    def test_replay_moves_spilled_records_into_the_table(self):
+        timestamp = timezone.now() - timedelta(hours=1)
+        records = [make_record(f"event-{i}", timestamp=timestamp) for i in range(5)]
+        self.writer.spill(records)
+
+        self.assertEqual(self.writer.replay_spill(), 5)
+        self.assertFalse(self.writer.spill_path.exists())
+        self.assertEqual(os.listdir(self.root), [])
+        self.assertEqual(AuditLog.objects.count(), 5)
+        # Spilled records keep the time of the event
+        self.assertEqual(
+            set(AuditLog.objects.values_list("timestamp", flat=True)), {timestamp}
+        )
+        self.assertEqual(self.writer.replay_spill(), 0)
+
+    def test_failed_replay_spills_the_rest_again(self):
+        self.writer.spill([make_record(f"event-{i}") for i in range(5)])
+        original = self.writer._bulk_insert
+        calls = []
+
+        def fail_second_batch(records, **kwargs):
+            calls.append(len(records))
+            if len(calls) == 2:
+                raise OperationalError("down")
+            original(records, **kwargs)
+
+        with mock.patch.object(
+            self.writer, "_bulk_insert", side_effect=fail_second_batch
+        ):
+            self.assertEqual(self.writer.replay_spill(), 2)
+        self.assertEqual(AuditLog.objects.count(), 2)
+        self.assertEqual(self.spilled_actions(), ["event-2", "event-3", "event-4"])
+        self.assertEqual(sorted(os.listdir(self.root)), ["spill.ndjson"])
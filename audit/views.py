@@ -2,12 +2,33 @@
 Audit app views for logging system events (HIPAA compliance)
 """
 
+from datetime import timedelta
+from itertools import islice
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view, permission_classes, action
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.decorators import (
+    action,
+    api_view,
+    parser_classes,
+    permission_classes,
+)
+from rest_framework.filters import SearchFilter
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from core.pagination import KeysetPagination, SelectablePagination
+from core.parsers import CompressedJSONParser
+from .archive import audit_archive, sort_key, to_instance
+from .export import EXPORT_FORMATS, export_response
+from .filters import AuditLogFilter
+from .integrity import link
 from .models import AuditLog
 from .serializers import AuditLogSerializer
+from .writer import clean_ip
+import heapq
 import logging
 
 logger = logging.getLogger("audit")
@@ -17,55 +38,216 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for viewing audit logs (admin only).
     Read-only to prevent modification of audit records.
+    ``?pagination=cursor`` pages by (timestamp, id) instead of offset;
+    see AuditLogFilter for the details filters. A ``since`` before the
+    archive watermark also reads months moved to the cold tier
+    (audit.archive).
     """
 
     queryset = AuditLog.objects.all()
     serializer_class = AuditLogSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
-    filterset_fields = ["user", "action", "resource_type"]
-    search_fields = ["action", "resource_type", "details"]
+    pagination_class = SelectablePagination
+    cursor_ordering_field = "timestamp"
+    # details is searched with the JSON-aware filters, not as text
+    filterset_class = AuditLogFilter
+    search_fields = ["action", "resource_type"]
     ordering_fields = ["timestamp", "action"]
 
+    def archived_records(self, request, descending=False, since=None, until=None):
+        """
+        Archived records matching the request's filters and search, within
+        [since, until) when given, or None when the request's range does not
+        reach past the hot window
+        """
+        filterset = AuditLogFilter(
+            request.query_params, queryset=self.get_queryset(), request=request
+        )
+        if not filterset.is_valid():
+            return None
+        data = filterset.form.cleaned_data
+        if not audit_archive.reaches(data.get("since")):
+            return None
+        since = max(since or data["since"], data["since"])
+        if data.get("until") is not None:
+            until = min(until or data["until"], data["until"])
+        terms = [term.lower() for term in SearchFilter().get_search_terms(request)]
+
+        def matches(record):
+            return filterset.record_matches(record) and all(
+                any(
+                    term in (record[field] or "").lower()
+                    for field in self.search_fields
+                )
+                for term in terms
+            )
+
+        return filter(matches, audit_archive.iter_records(since, until, descending))
+
+    def list(self, request, *args, **kwargs):
+        """
+        When the range reaches the archive, hot rows and archived records are
+        merged newest first and paged by cursor, without a count (ordering
+        does not apply)
+        """
+        paginator = KeysetPagination()
+        position = paginator.decode_cursor(request)
+        value, pk, reverse = position or (None, None, False)
+        if position is None:
+            archived = self.archived_records(request)
+        elif reverse:
+            archived = self.archived_records(request, since=value)
+        else:
+            # until is exclusive; the position's own instant may hold more rows
+            archived = self.archived_records(
+                request, descending=True, until=value + timedelta(microseconds=1)
+            )
+        if archived is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if position is not None:
+            if reverse:
+                archived = (rec for rec in archived if sort_key(rec) > (value, pk))
+                queryset = queryset.filter(
+                    Q(timestamp__gt=value) | Q(timestamp=value, pk__gt=pk)
+                )
+            else:
+                archived = (rec for rec in archived if sort_key(rec) < (value, pk))
+                queryset = queryset.filter(
+                    Q(timestamp__lt=value) | Q(timestamp=value, pk__lt=pk)
+                )
+        order = ("timestamp", "pk") if reverse else ("-timestamp", "-pk")
+        page_size = paginator.get_page_size(request)
+        hot = queryset.order_by(*order)[: page_size + 1]
+        archived = map(to_instance, archived)
+        results = list(
+            islice(
+                heapq.merge(
+                    hot,
+                    archived,
+                    key=lambda log: (log.timestamp, str(log.pk)),
+                    reverse=not reverse,
+                ),
+                page_size + 1,
+            )
+        )
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+        users = get_user_model().objects.in_bulk(
+            {log.user_id for log in results if log.user_id is not None}
+        )
+        for log in results:
+            if log.user_id in users:
+                log.user = users[log.user_id]
+
+        paginator.request = request
+        paginator.base_url = request.build_absolute_uri()
+        paginator.field = "timestamp"
+        paginator.count = None
+        paginator.page = results
+        paginator.has_next = has_more if not reverse else True
+        paginator.has_previous = has_more if reverse else position is not None
+        return paginator.get_paginated_response(
+            self.get_serializer(results, many=True).data
+        )
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Stream every matching record, oldest first, for compliance pulls:
+        ``?output=ndjson|csv``, ``&gzip=true`` to compress, and the same
+        filters as the list (user, action, resource_type, resource_id,
+        patient_id, since, until, details...), archived months included.
+        """
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"output must be one of {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        compress = request.query_params.get("gzip", "").lower() in ("1", "true")
+        queryset = self.filter_queryset(self.get_queryset()).order_by("timestamp", "id")
+        archived = self.archived_records(request)
+
+        logger.info(
+            f"Audit export ({output}) by {request.user}: "
+            f"{request.query_params.urlencode()}"
+        )
+        return export_response(
+            request, queryset, output=output, compress=compress, archived=archived
+        )
+
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@parser_classes([CompressedJSONParser])
 def create_audit_log_batch(request):
     """
     Create multiple audit log entries at once.
-    This endpoint is called by the frontend to batch audit logs.
+    This endpoint is called by the frontend to batch audit logs. The body may
+    be gzip-compressed (Content-Encoding: gzip); all entries are inserted
+    with one bulk_create and the response only acknowledges the count.
     """
-    try:
-        logs_data = request.data if isinstance(request.data, list) else [request.data]
-        created_logs = []
-
-        for log_data in logs_data:
-            # Extract fields from frontend format
-            audit_log = AuditLog.objects.create(
-                user=request.user,
-                action=log_data.get("action", "unknown"),
-                resource_type=log_data.get("resourceType"),
-                resource_id=log_data.get("resourceId"),
-                details=log_data.get("details", {}),
-                ip_address=get_client_ip(request),
-                user_agent=request.META.get("HTTP_USER_AGENT", ""),
-            )
-            created_logs.append(audit_log)
+    logs_data = request.data if isinstance(request.data, list) else [request.data]
+    max_entries = getattr(settings, "HIPAA_SETTINGS", {}).get(
+        "AUDIT_BATCH_MAX_ENTRIES", 5000
+    )
+    if len(logs_data) > max_entries:
+        return Response(
+            {"error": f"At most {max_entries} audit entries per batch"},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
 
-            # Log to audit file
-            logger.info(
-                f"Audit: {audit_log.action} by {audit_log.user} "
-                f"on {audit_log.resource_type} {audit_log.resource_id}"
-            )
+    # Shared by every entry in the batch
+    ip_address = clean_ip(get_client_ip(request))
+    user_agent = request.META.get("HTTP_USER_AGENT", "")
+    timestamp = timezone.now()
 
-        serializer = AuditLogSerializer(created_logs, many=True)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    audit_logs = []
+    for index, log_data in enumerate(logs_data):
+        if not isinstance(log_data, dict):
+            return Response(
+                {"error": f"Entry {index} is not an object"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        details = log_data.get("details", {})
+        # Extract fields from frontend format
+        audit_log = AuditLog(
+            user=request.user,
+            action=str(log_data.get("action") or "unknown")[:100],
+            resource_type=truncate(log_data.get("resourceType")),
+            resource_id=truncate(log_data.get("resourceId")),
+            details=details if isinstance(details, dict) else {"value": details},
+            ip_address=ip_address,
+            user_agent=user_agent,
+            timestamp=timestamp,
+        )
+        audit_log.fill_extracted_fields()
+        audit_logs.append(audit_log)
 
+    try:
+        with transaction.atomic():
+            link(audit_logs)
+            AuditLog.objects.bulk_create(audit_logs)
     except Exception as e:
-        logger.error(f"Failed to create audit log: {str(e)}")
+        logger.error(f"Failed to create {len(audit_logs)} audit logs: {str(e)}")
         return Response(
             {"error": "Failed to create audit log"}, status=status.HTTP_400_BAD_REQUEST
         )
 
+    # Log to audit file
+    logger.info(f"Audit: {len(audit_logs)} client events by {request.user}")
+
+    return Response({"created": len(audit_logs)}, status=status.HTTP_201_CREATED)
+
+
+def truncate(value, length=100):
+    """String form of an optional value, cut to the column length"""
+    return str(value)[:length] if value is not None else None
+
 
 def get_client_ip(request):
     """Extract client IP address from request."""
@@ -0,0 +1,334 @@
+"""
+Buffered audit writer for TheraCare EHR System.
+
+Request handlers enqueue audit records without touching the database; a
+background thread writes them to AuditLog with bulk_create once a batch
+fills up or the flush interval passes. When the database errors or is slow,
+batches are appended to a local spill file instead and replayed once writes
+are healthy again, so audit records are not lost and request latency never
+waits on the audit table.
+
+Records carry PHI in ``details``, so each spill file line is a record
+encrypted with core.security's Fernet helper. Records get their id when
+queued and keep it through the spill file, so a batch that reached the
+database before its flush reported an error is not inserted twice on replay.
+"""
+
+import atexit
+import fcntl
+import ipaddress
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from core.security import encryption
+
+logger = logging.getLogger("theracare.audit")
+
+# Backoff after a failed or slow flush before the database is tried again
+DEGRADED_SECONDS = 30
+# Minimum time between attempts to replay the spill file
+REPLAY_INTERVAL_SECONDS = 60
+
+
+def clean_ip(value: Optional[str]) -> Optional[str]:
+    """Return value if it is a valid IP address, else None"""
+    try:
+        return str(ipaddress.ip_address(value)) if value else None
+    except ValueError:
+        return None
+
+
+class AuditWriter:
+    """Bounded in-process queue of audit records flushed to AuditLog in bulk"""
+
+    def __init__(
+        self,
+        queue_size: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        slow_flush_seconds: float = 2.0,
+        spill_path: Optional[str] = None,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.slow_flush_seconds = slow_flush_seconds
+        self.spill_path = Path(
+            spill_path or Path(settings.BASE_DIR) / "logs" / "audit_spill.ndjson"
+        )
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._degraded_until = 0.0
+        self._last_replay = 0.0
+
+    @classmethod
+    def from_settings(cls) -> "AuditWriter":
+        hipaa_settings = getattr(settings, "HIPAA_SETTINGS", {})
+        return cls(
+            queue_size=hipaa_settings.get("AUDIT_QUEUE_SIZE", 10000),
+            batch_size=hipaa_settings.get("AUDIT_BATCH_SIZE", 200),
+            flush_interval=hipaa_settings.get("AUDIT_FLUSH_INTERVAL", 1.0),
+            slow_flush_seconds=hipaa_settings.get("AUDIT_SLOW_FLUSH_SECONDS", 2.0),
+            spill_path=hipaa_settings.get("AUDIT_SPILL_PATH"),
+        )
+
+    def enqueue(self, record: Dict[str, Any]) -> None:
+        """
+        Queue an audit record for writing. Never blocks: when the queue is
+        full the record goes straight to the spill file.
+        """
+        record.setdefault("id", uuid.uuid4())
+        record.setdefault("timestamp", timezone.now())
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.spill([record])
+
+    def flush(self) -> None:
+        """Write everything currently queued; used at shutdown and by tests"""
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                return
+            self.write_batch(batch)
+
+    def _ensure_started(self) -> None:
+        # A forked worker inherits the queue but not the flusher thread
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name="audit-writer", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _drain(self, block: bool) -> List[Dict[str, Any]]:
+        """Take up to batch_size records, waiting at most flush_interval"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if block and timeout > 0:
+                    batch.append(self.queue.get(timeout=timeout))
+                else:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._drain(block=True)
+            try:
+                if batch:
+                    self.write_batch(batch)
+                self._maybe_replay_spill()
+            except Exception as e:
+                logger.error(f"Audit writer error: {str(e)}")
+
+    def write_batch(self, records: List[Dict[str, Any]]) -> None:
+        """Insert records into AuditLog, spilling them if the database is unhealthy"""
+        if time.monotonic() < self._degraded_until:
+            self.spill(records)
+            return
+
+        with self._flush_lock:
+            started = time.monotonic()
+            try:
+                close_old_connections()
+                self._bulk_insert(records)
+            except Exception as e:
+                logger.error(
+                    f"Audit flush of {len(records)} records failed, spilling: {str(e)}"
+                )
+                self._degraded_until = time.monotonic() + DEGRADED_SECONDS
+                self.spill(records)
+                return
+
+            elapsed = time.monotonic() - started
+            if elapsed > self.slow_flush_seconds:
+                logger.warning(
+                    f"Audit flush took {elapsed:.2f}s; spilling to "
+                    f"{self.spill_path} for {DEGRADED_SECONDS}s"
+                )
+                self._degraded_until = time.monotonic() + DEGRADED_SECONDS
+
+    def _bulk_insert(self, records: List[Dict[str, Any]], replay: bool = False) -> None:
+        from users.models import User
+        from .integrity import link
+        from .models import AuditLog
+
+        def insert(records):
+            audit_logs = [AuditLog(**r) for r in records]
+            for audit_log in audit_logs:
+                audit_log.fill_extracted_fields()
+            # Chained in event order, whatever order the threads queued them
+            audit_logs.sort(key=lambda log: (log.timestamp, str(log.pk)))
+            # Linked into the hash chain under one head lock per batch
+            with transaction.atomic():
+                if replay:
+                    # Spilled records that were written after all are skipped
+                    # before linking, so they take no place in the chain
+                    written = set(
+                        AuditLog.objects.filter(
+                            pk__in=[log.pk for log in audit_logs]
+                        ).values_list("pk", flat=True)
+                    )
+                    audit_logs = [log for log in audit_logs if log.pk not in written]
+                link(audit_logs)
+                AuditLog.objects.bulk_create(audit_logs, ignore_conflicts=replay)
+
+        try:
+            insert(records)
+        except IntegrityError:
+            # A user deleted since the request; keep the record, drop the link
+            user_ids = {r["user_id"] for r in records if r.get("user_id")}
+            existing = {
+                str(pk)
+                for pk in User.objects.filter(pk__in=user_ids).values_list(
+                    "pk", flat=True
+                )
+            }
+            for record in records:
+                if record.get("user_id") and str(record["user_id"]) not in existing:
+                    record["user_id"] = None
+            insert(records)
+
+    def spill(self, records: List[Dict[str, Any]]) -> None:
+        """Append records to the spill file, one encrypted JSON record per line"""
+        lines = "".join(
+            encryption.encrypt(json.dumps(record, default=str, separators=(",", ":")))
+            + "\n"
+            for record in records
+        )
+        with self._spill_lock:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            while True:
+                with open(self.spill_path, "a") as fh:
+                    # Other worker processes may be appending or replaying too
+                    fcntl.flock(fh, fcntl.LOCK_EX)
+                    try:
+                        if not self._is_current_spill_file(fh):
+                            continue  # Claimed by a replay meanwhile; reopen
+                        fh.write(lines)
+                        fh.flush()
+                        os.fsync(fh.fileno())
+                        return
+                    finally:
+                        fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _is_current_spill_file(self, fh) -> bool:
+        try:
+            return os.fstat(fh.fileno()).st_ino == os.stat(self.spill_path).st_ino
+        except FileNotFoundError:
+            return False
+
+    def _maybe_replay_spill(self) -> None:
+        now = time.monotonic()
+        if (
+            now < self._degraded_until
+            or now - self._last_replay < REPLAY_INTERVAL_SECONDS
+            or not self.spill_path.exists()
+        ):
+            return
+        self._last_replay = now
+        self.replay_spill()
+
+    def replay_spill(self) -> int:
+        """
+        Move spilled records into AuditLog. The spill file is claimed by
+        renaming it under the lock, so concurrent replays never double insert.
+        Returns the number of records written.
+        """
+        claimed = self.spill_path.with_name(
+            f"{self.spill_path.name}.replay-{os.getpid()}-{int(time.time())}"
+        )
+        try:
+            with open(self.spill_path, "a") as fh:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+                try:
+                    os.replace(self.spill_path, claimed)
+                finally:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+        except FileNotFoundError:
+            return 0
+
+        with open(claimed) as fh:
+            records = [self.load_record(line) for line in fh if line.strip()]
+        # Several processes append to the file; replay in event order
+        records.sort(key=lambda record: record["timestamp"])
+
+        written = 0
+        for start in range(0, len(records), self.batch_size):
+            batch = records[start : start + self.batch_size]
+            try:
+                self._bulk_insert(batch, replay=True)
+            except Exception as e:
+                logger.error(f"Audit spill replay failed: {str(e)}")
+                self.spill(records[start:])
+                self._degraded_until = time.monotonic() + DEGRADED_SECONDS
+                break
+            written += len(batch)
+
+        os.remove(claimed)
+        if written:
+            logger.info(f"Replayed {written} spilled audit records")
+        return written
+
+    @staticmethod
+    def load_record(line: str) -> Dict[str, Any]:
+        line = line.strip()
+        # Files spilled before encryption hold plain JSON lines
+        record = json.loads(line if line.startswith("{") else encryption.decrypt(line))
+        if record.get("id"):
+            record["id"] = uuid.UUID(record["id"])
+        if record.get("timestamp"):
+            record["timestamp"] = datetime.fromisoformat(record["timestamp"])
+        return record
+
+
+audit_writer = SimpleLazyObject(AuditWriter.from_settings)
+
+
+def record_audit_event(
+    action: str,
+    user_id: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    resource_id: Optional[str] = None,
+    details: Optional[Dict[str, Any]] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
+) -> None:
+    """Queue an AuditLog row for buffered writing"""
+    audit_writer.enqueue(
+        {
+            "user_id": user_id,
+            "action": action[:100],
+            "resource_type": resource_type,
+            "resource_id": resource_id[:100] if resource_id else resource_id,
+            "details": details or {},
+            "ip_address": clean_ip(ip_address),
+            "user_agent": user_agent,
+            "timestamp": timezone.now(),
+        }
+    )
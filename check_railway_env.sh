@@ -48,6 +48,15 @@ else
     echo "✓ DB_CONNECTION is NOT set (using DATABASE_URL)"
 fi
 
+echo ""
+echo "Checking AUDIT_ARCHIVE_PATH..."
+if railway variables | grep -q "AUDIT_ARCHIVE_PATH"; then
+    echo "✓ AUDIT_ARCHIVE_PATH is set (must be a Railway volume mount)"
+    railway variables | grep AUDIT_ARCHIVE_PATH
+else
+    echo "❌ AUDIT_ARCHIVE_PATH is NOT set (audit logs are never archived)"
+fi
+
 echo ""
 echo "Checking DEBUG..."
 if railway variables | grep -q "DEBUG"; then
@@ -8,3 +8,17 @@ class CoreConfig(AppConfig):
     def ready(self):
         # Import signals to ensure they are registered
         import core.signals  # noqa
+
+        # Sampled per-request timing (Server-Timing header, audit records)
+        from django.db.backends.signals import connection_created
+        from core.timing import install_query_timer, instrument_serializers
+
+        connection_created.connect(install_query_timer, dispatch_uid="core.timing")
+        instrument_serializers()
+
+        # Sampled N+1 and slow query detection (QueryInspectorMiddleware)
+        from core.query_inspector import install_query_inspector
+
+        connection_created.connect(
+            install_query_inspector, dispatch_uid="core.query_inspector"
+        )
@@ -0,0 +1,38 @@
+# backend/core/cache.py
+"""
+django-redis client that reports hits and misses to core.metrics.
+
+Select it with ``"CLIENT_CLASS": "core.cache.InstrumentedRedisClient"`` in a
+CACHES entry; ``OPTIONS["METRICS_NAME"]`` labels the cache (default
+"django"). Only reads are counted: get, get_many and has_key.
+"""
+
+from django_redis.client import DefaultClient
+from .metrics import observe_cache
+
+_MISSING = object()
+
+
+class InstrumentedRedisClient(DefaultClient):
+    """DefaultClient recording a hit or miss for every key read"""
+
+    def __init__(self, server, params, backend):
+        super().__init__(server, params, backend)
+        self.metrics_name = self._options.get("METRICS_NAME", "django")
+
+    def get(self, key, default=None, version=None, client=None):
+        value = super().get(key, default=_MISSING, version=version, client=client)
+        observe_cache(self.metrics_name, value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None, client=None):
+        values = super().get_many(keys, version=version, client=client)
+        if keys:
+            observe_cache(self.metrics_name, True, len(values))
+            observe_cache(self.metrics_name, False, len(keys) - len(values))
+        return values
+
+    def has_key(self, key, version=None, client=None):
+        found = super().has_key(key, version=version, client=client)
+        observe_cache(self.metrics_name, found)
+        return found
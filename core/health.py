@@ -0,0 +1,203 @@
+# backend/core/health.py
+"""
+Dependency readiness probes for TheraCare API.
+
+ReadinessChecker probes the database, cache, channel layer and Celery
+broker concurrently, each bounded by a timeout, and caches the combined
+result for a few seconds. Only one probe round runs at a time per process;
+callers arriving meanwhile get the previous result, and a probe still stuck
+from an earlier round is reported as timed out rather than started again, so
+a wedged dependency holds at most one probe thread.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.db import connections
+from django.utils.functional import SimpleLazyObject
+
+logger = logging.getLogger("theracare.middleware")
+
+
+def probe_database(timeout: float) -> None:
+    connection = connections["default"]
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                # The server cancels the probe instead of leaving it blocked
+                cursor.execute(f"SET statement_timeout = {max(int(timeout * 1000), 1)}")
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+    finally:
+        # Probe threads are not request threads; do not leak connections
+        connection.close()
+
+
+def probe_cache(timeout: float) -> None:
+    key = f"readiness_probe_{uuid.uuid4().hex}"
+    cache.set(key, "1", timeout=max(int(timeout), 1))
+    value = cache.get(key)
+    cache.delete(key)
+    # The dummy cache used in development stores nothing
+    if value != "1" and not isinstance(caches["default"], DummyCache):
+        raise RuntimeError("Cache read back a different value")
+
+
+def probe_channel_layer(timeout: float) -> None:
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+
+    layer = get_channel_layer()
+    if layer is None:
+        raise RuntimeError("No channel layer configured")
+
+    async def round_trip():
+        channel = await layer.new_channel()
+        await layer.send(channel, {"type": "readiness.probe"})
+        await layer.receive(channel)
+
+    async def bounded_round_trip():
+        await asyncio.wait_for(round_trip(), timeout)
+
+    async_to_sync(bounded_round_trip)()
+
+
+def probe_celery_broker(timeout: float) -> None:
+    from theracare.celery import app
+
+    with app.connection_for_write(connect_timeout=timeout) as connection:
+        connection.ensure_connection(
+            max_retries=1, timeout=timeout, interval_start=0, interval_step=0.2
+        )
+
+
+PROBES: Dict[str, Callable[[float], None]] = {
+    "database": probe_database,
+    "cache": probe_cache,
+    "channel_layer": probe_channel_layer,
+    "celery_broker": probe_celery_broker,
+}
+
+
+class ReadinessChecker:
+    """Concurrent, cached dependency probes"""
+
+    def __init__(
+        self,
+        probes: Optional[Dict[str, Callable[[float], None]]] = None,
+        critical: Optional[List[str]] = None,
+        timeout: float = 2.0,
+        ttl: float = 5.0,
+    ):
+        self.probes = dict(probes or PROBES)
+        self.critical = set(self.probes if critical is None else critical)
+        self.timeout = timeout
+        self.ttl = ttl
+        # A probe that hangs past its timeout keeps its thread, but is not
+        # submitted again until it returns: one thread per probe suffices
+        self.executor = ThreadPoolExecutor(
+            max_workers=len(self.probes), thread_name_prefix="readiness"
+        )
+        self._futures: Dict[str, Future] = {}
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "ReadinessChecker":
+        config = getattr(settings, "READINESS_SETTINGS", {})
+        probes = {
+            name: PROBES[name]
+            for name in config.get("CHECKS", PROBES)
+            if name in PROBES
+        }
+        return cls(
+            probes=probes,
+            critical=config.get("CRITICAL"),
+            timeout=config.get("TIMEOUT", 2.0),
+            ttl=config.get("CACHE_SECONDS", 5.0),
+        )
+
+    def cached(self) -> Optional[Dict[str, Any]]:
+        """The last report if it is still fresh, without probing"""
+        if self._result is not None and time.monotonic() - self._checked_at < self.ttl:
+            return self._result
+        return None
+
+    def check(self) -> Dict[str, Any]:
+        """Latest readiness report, probing again once it is ttl seconds old"""
+        result = self.cached()
+        if result is not None:
+            return result
+
+        # Single flight: whoever holds the lock probes, everyone else reuses
+        # the previous report (or waits for the very first one)
+        if not self._lock.acquire(blocking=self._result is None):
+            return self._result
+        try:
+            if self._result is None or time.monotonic() - self._checked_at >= self.ttl:
+                self._result = self.run_probes()
+                self._checked_at = time.monotonic()
+            return self._result
+        finally:
+            self._lock.release()
+
+    def run_probes(self) -> Dict[str, Any]:
+        futures = {}
+        for name, probe in self.probes.items():
+            previous = self._futures.get(name)
+            if previous is not None and not previous.done():
+                # Still stuck from an earlier round; report it as timed out
+                futures[name] = previous
+            else:
+                futures[name] = self.executor.submit(self._timed, probe)
+        self._futures = futures
+        wait(futures.values(), timeout=self.timeout)
+
+        checks = {}
+        for name, future in futures.items():
+            if not future.done():
+                checks[name] = {
+                    "status": "timeout",
+                    "latency_ms": round(self.timeout * 1000, 1),
+                }
+                continue
+            error, elapsed = future.result()
+            checks[name] = {"status": "ok" if error is None else "error"}
+            checks[name]["latency_ms"] = round(elapsed * 1000, 1)
+            if error is not None:
+                checks[name]["error"] = error
+
+        failed = [name for name, check in checks.items() if check["status"] != "ok"]
+        if any(name in self.critical for name in failed):
+            status = "unavailable"
+        elif failed:
+            status = "degraded"
+        else:
+            status = "ok"
+        if failed:
+            logger.warning(f"Readiness {status}: {', '.join(failed)} failing")
+
+        return {"status": status, "checks": checks}
+
+    def _timed(self, probe: Callable[[float], None]):
+        """Run probe, returning (error message or None, seconds taken)"""
+        started = time.perf_counter()
+        try:
+            probe(self.timeout)
+            error = None
+        except Exception as e:
+            # Only the exception type is reported; details may name hosts
+            logger.warning(f"Readiness probe {probe.__name__} failed: {str(e)}")
+            error = type(e).__name__
+        return error, time.perf_counter() - started
+
+
+readiness_checker = SimpleLazyObject(ReadinessChecker.from_settings)
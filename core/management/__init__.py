@@ -0,0 +1 @@
+# backend/core/management/__init__.py
@@ -0,0 +1 @@
+# backend/core/management/commands/__init__.py
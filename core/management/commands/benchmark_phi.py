@@ -0,0 +1,257 @@
+# backend/core/management/commands/benchmark_phi.py
+"""
+Django management command to benchmark the PHI encryption hot path.
+
+Measures latency and throughput of field, batch and JSON encryption across
+realistic payload sizes plus list-page serialization of encrypted models,
+and compares the results against a JSON baseline:
+
+    python manage.py benchmark_phi --save-baseline   # record a baseline
+    python manage.py benchmark_phi                   # fail on regression
+
+The command exits non-zero when any case's median latency regresses by more
+than --threshold relative to the baseline, so it can gate CI jobs.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from core.security import (
+    decrypt_field,
+    decrypt_fields,
+    encrypt_field,
+    encrypt_fields,
+    encryption,
+)
+import json
+import os
+import platform
+import statistics
+import time
+import uuid
+
+NAME = "Alexandra Montgomery-Washington"
+SOAP_NOTE = (
+    "Client reports improved sleep and reduced anxiety since last session. "
+    "Discussed coping strategies for workplace stress; practiced grounding "
+    "exercises. Mood euthymic, affect congruent, no SI/HI reported. "
+) * 20
+JSON_BLOB = {
+    "diagnosis_codes": ["F41.1", "F32.0", "Z63.0"],
+    "medications": [
+        {"name": f"medication-{i}", "dose_mg": 10 * i, "frequency": "daily"}
+        for i in range(15)
+    ],
+    "insurance": {"carrier": "Example Health", "member_id": "XJ9-2231-004"},
+    "history": SOAP_NOTE[:1500],
+}
+PAGE_SIZE = 50
+
+
+class Command(BaseCommand):
+    help = "Benchmark PHI encryption and encrypted-model serialization"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=300,
+            help="Timed operations per case (default: 300)",
+        )
+        parser.add_argument(
+            "--baseline",
+            default=str(settings.BASE_DIR / "benchmarks" / "phi_baseline.json"),
+            help="Baseline JSON file to compare against or save to",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Allowed median slowdown before failing, e.g. 0.25 = 25%%",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Write the results as the new baseline instead of comparing",
+        )
+        parser.add_argument(
+            "--case",
+            action="append",
+            help="Only run cases whose name starts with this (repeatable)",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print results as JSON",
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        if iterations < 10:
+            raise CommandError("--iterations must be at least 10")
+
+        # Key derivation happens once per process; keep it out of the numbers
+        encryption.encryption_key
+
+        results = {}
+        for name, setup, func, ops_per_call in self.get_cases():
+            if options["case"] and not any(name.startswith(c) for c in options["case"]):
+                continue
+            results[name] = self.measure(setup, func, ops_per_call, iterations)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.print_results(results)
+
+        if options["save_baseline"]:
+            self.save_baseline(options["baseline"], results)
+            return
+
+        baseline = self.load_baseline(options["baseline"])
+        if baseline is not None:
+            self.compare(baseline, results, options["threshold"])
+
+    def get_cases(self):
+        """(name, setup, func, ops per call); func receives setup()'s result"""
+        name_ct = encrypt_field(NAME)
+        note_ct = encrypt_field(SOAP_NOTE)
+        json_ct = encryption.encrypt(JSON_BLOB)
+        names = [f"{NAME} {i}" for i in range(PAGE_SIZE)]
+        name_cts = encrypt_fields(names)
+
+        def fixed(value):
+            return lambda: value
+
+        return [
+            ("encrypt_field.name", fixed(NAME), encrypt_field, 1),
+            ("decrypt_field.name", fixed(name_ct), decrypt_field, 1),
+            ("encrypt_field.soap_note", fixed(SOAP_NOTE), encrypt_field, 1),
+            ("decrypt_field.soap_note", fixed(note_ct), decrypt_field, 1),
+            # encrypt() serializes dicts itself; decrypt_json() is its inverse
+            ("encrypt_json.blob", fixed(JSON_BLOB), encryption.encrypt, 1),
+            ("decrypt_json.blob", fixed(json_ct), encryption.decrypt_json, 1),
+            ("encrypt_fields.page", fixed(names), encrypt_fields, PAGE_SIZE),
+            ("decrypt_fields.page", fixed(name_cts), decrypt_fields, PAGE_SIZE),
+            (
+                "serializer.appointment_notes_page",
+                self.build_appointment_page,
+                self.serialize_appointment_page,
+                PAGE_SIZE,
+            ),
+        ]
+
+    def build_appointment_page(self):
+        """Unsaved appointments with encrypted notes, fresh for every call"""
+        from appointments.models import Appointment, AppointmentType
+        from users.models import User
+
+        therapist = User(id=uuid.uuid4(), first_name="Dana", last_name="Reyes")
+        appointment_type = AppointmentType(id=1, name="Individual Therapy")
+        notes_ct = encrypt_field(SOAP_NOTE[:1000])
+        complaint_ct = encrypt_field("Difficulty sleeping, racing thoughts")
+        now = timezone.now()
+
+        page = []
+        for i in range(PAGE_SIZE):
+            appointment = Appointment(
+                id=uuid.uuid4(),
+                appointment_number=f"APT-{i:06d}",
+                patient=User(id=uuid.uuid4(), first_name="Pat", last_name=str(i)),
+                therapist=therapist,
+                appointment_type=appointment_type,
+                start_datetime=now,
+                end_datetime=now,
+                created_at=now,
+                updated_at=now,
+            )
+            appointment._notes = notes_ct
+            appointment._chief_complaint = complaint_ct
+            page.append(appointment)
+        return page
+
+    def serialize_appointment_page(self, page):
+        # The clinician notes list, whose page is decrypted in one batch
+        from appointments.serializers import AppointmentNotesSerializer
+
+        return AppointmentNotesSerializer(page, many=True).data
+
+    def measure(self, setup, func, ops_per_call, iterations):
+        """Time func(setup()) per call; setup time is excluded"""
+        calls = max(iterations // ops_per_call, 10)
+        for _ in range(min(calls, 10)):
+            func(setup())  # Warm up caches and lazy imports
+
+        samples = []
+        for _ in range(calls):
+            arg = setup()
+            started = time.perf_counter_ns()
+            func(arg)
+            samples.append((time.perf_counter_ns() - started) / 1000 / ops_per_call)
+
+        samples.sort()
+        total_us = sum(samples)
+        return {
+            "ops": calls * ops_per_call,
+            "p50_us": round(statistics.median(samples), 2),
+            "p95_us": round(samples[int(len(samples) * 0.95) - 1], 2),
+            "ops_per_sec": round(len(samples) * 1_000_000 / total_us, 1),
+        }
+
+    def print_results(self, results):
+        self.stdout.write(self.style.SUCCESS("PHI encryption benchmark (per op)"))
+        self.stdout.write(f"  {'case':36} {'p50 us':>10} {'p95 us':>10} {'ops/s':>12}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"  {name:36} {result['p50_us']:10.2f} {result['p95_us']:10.2f} "
+                f"{result['ops_per_sec']:12.1f}"
+            )
+
+    def load_baseline(self, path):
+        try:
+            with open(path) as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"No baseline at {path}; run with --save-baseline to create one"
+                )
+            )
+            return None
+
+    def save_baseline(self, path, results):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        baseline = {
+            "recorded_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }
+        with open(path, "w") as fh:
+            json.dump(baseline, fh, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Baseline saved to {path}"))
+
+    def compare(self, baseline, results, threshold):
+        """Raise CommandError if any case's p50 regressed beyond threshold"""
+        regressions = []
+        self.stdout.write(f"\nCompared with baseline from {baseline['recorded_at']}:")
+
+        for name, result in results.items():
+            previous = baseline["results"].get(name)
+            if not previous:
+                self.stdout.write(f"  {name:36} (new case)")
+                continue
+            change = result["p50_us"] / previous["p50_us"] - 1
+            line = f"  {name:36} {change:+8.1%}"
+            if change > threshold:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(line + "  REGRESSION"))
+            else:
+                self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} case(s) regressed more than {threshold:.0%}: "
+                + ", ".join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS("No regressions"))
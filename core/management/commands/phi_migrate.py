@@ -0,0 +1,179 @@
+# backend/core/management/commands/phi_migrate.py
+"""
+Django management command to run a declared PHI data migration (see
+``core.phi.PHI_MIGRATIONS``) over keyset-paginated chunks in a process pool.
+
+Each chunk is transformed and written with bulk_update in its own
+transaction. Progress is checkpointed in key order, so an interrupted run
+resumes where it stopped:
+
+    python manage.py phi_migrate --list
+    python manage.py phi_migrate decrypt_patients --dry-run
+    python manage.py phi_migrate decrypt_patients --workers 4
+"""
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from core.phi import PHI_MIGRATIONS, Checkpoint, iter_pk_batches, run_migration_chunk
+import django
+import time
+
+
+def _init_worker():
+    """Make sure Django is set up in each worker process"""
+    django.setup()
+
+
+class _InlineExecutor:
+    """Executor that runs chunks in this process, for --workers 1"""
+
+    def submit(self, func, *args):
+        future = Future()
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class Command(BaseCommand):
+    help = "Run a declared PHI data migration in parallel, resumable chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "migration",
+            nargs="?",
+            help="Name of the migration to run (see --list)",
+        )
+        parser.add_argument(
+            "--list",
+            action="store_true",
+            help="List available migrations",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows per chunk and transaction (default: 500)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Worker processes; 1 runs chunks in-process (default: 4)",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="Checkpoint file path (default: logs/phi_migrate.checkpoint.json)",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore any saved checkpoint and start from the first row",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report rows that would change without writing",
+        )
+
+    def handle(self, *args, **options):
+        if options["list"] or not options["migration"]:
+            self.stdout.write("Available PHI migrations:")
+            for name, migration in PHI_MIGRATIONS.items():
+                self.stdout.write(
+                    f"  {name:24} {migration.model:22} {migration.description}"
+                )
+            return
+
+        name = options["migration"]
+        if name not in PHI_MIGRATIONS:
+            raise CommandError(f"Unknown PHI migration: {name} (see --list)")
+        if options["batch_size"] < 1 or options["workers"] < 1:
+            raise CommandError("--batch-size and --workers must be positive")
+
+        migration = PHI_MIGRATIONS[name]
+        model = migration.get_model()
+        dry_run = options["dry_run"]
+
+        checkpoint = Checkpoint(options["checkpoint"], name="phi_migrate")
+        if options["restart"]:
+            checkpoint.clear(name)
+        after = None if dry_run else checkpoint.get(name)
+
+        queryset = model._default_manager.all()
+        remaining = (queryset.filter(pk__gt=after) if after else queryset).count()
+        if after:
+            self.stdout.write(f"Resuming {name} after {after}")
+        self.stdout.write(
+            f"{name}: {remaining} {model._meta.label} rows, "
+            f"{options['workers']} worker(s){' (dry run)' if dry_run else ''}"
+        )
+
+        totals = {"scanned": 0, "changed": 0, "errors": 0}
+        started = time.monotonic()
+        pending = deque()
+        max_in_flight = options["workers"] * 2
+
+        def drain(block):
+            """Collect finished chunks in key order, advancing the checkpoint"""
+            while pending and (block or pending[0][1].done()):
+                last_pk, future = pending.popleft()
+                for key, value in future.result().items():
+                    totals[key] += value
+                if not dry_run:
+                    checkpoint.set(name, last_pk)
+                self.report_progress(totals, remaining, started)
+                if block:
+                    break
+
+        if options["workers"] == 1:
+            executor = _InlineExecutor()
+        else:
+            # Forked workers must not share the parent's database sockets
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                max_workers=options["workers"], initializer=_init_worker
+            )
+
+        with executor:
+            for pks in iter_pk_batches(queryset, options["batch_size"], after):
+                while len(pending) >= max_in_flight:
+                    drain(block=True)
+                future = executor.submit(run_migration_chunk, name, pks, dry_run)
+                pending.append((pks[-1], future))
+                drain(block=False)
+
+            while pending:
+                drain(block=True)
+
+        verb = "would change" if dry_run else "changed"
+        style = self.style.WARNING if totals["errors"] else self.style.SUCCESS
+        self.stdout.write(
+            style(
+                f"{name}: scanned {totals['scanned']} rows, {verb} "
+                f"{totals['changed']}, {totals['errors']} value(s) failed"
+            )
+        )
+        if not dry_run:
+            # Completed; a later run rescans from the start
+            checkpoint.clear(name)
+
+    def report_progress(self, totals, remaining, started):
+        elapsed = time.monotonic() - started
+        rate = totals["scanned"] / elapsed if elapsed else 0
+        percent = totals["scanned"] / remaining * 100 if remaining else 100
+        eta = (remaining - totals["scanned"]) / rate if rate else 0
+        self.stdout.write(
+            f"  {totals['scanned']}/{remaining} ({percent:.0f}%) "
+            f"changed={totals['changed']} errors={totals['errors']} "
+            f"{rate:.0f} rows/s, ETA {eta:.0f}s"
+        )
@@ -0,0 +1,175 @@
+# backend/core/management/commands/rotate_phi_keys.py
+"""
+Django management command to re-encrypt PHI columns under the current
+ENCRYPTION_KEY while the application keeps serving traffic.
+
+Workflow:
+    1. Move the old key into RETIRED_ENCRYPTION_KEYS and set the new
+       ENCRYPTION_KEY; both keys can now decrypt.
+    2. Run ``python manage.py rotate_phi_keys``; it is safe to interrupt and
+       re-run, it resumes from its checkpoint. A model's checkpoint is
+       cleared once it completes, so the next rotation starts from the top.
+    3. Once it completes, drop the old key from RETIRED_ENCRYPTION_KEYS.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from core.phi import Checkpoint, iter_pk_batches
+from core.security import ENCRYPTED_MODEL_FIELDS, encryption
+import logging
+import time
+
+logger = logging.getLogger("theracare.security")
+
+
+class Command(BaseCommand):
+    help = "Re-encrypt PHI columns under the current encryption key"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            action="append",
+            dest="models",
+            help="Model label to rotate, e.g. appointments.Appointment "
+            "(repeatable; defaults to every model with encrypted columns)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows locked and re-encrypted per transaction (default: 500)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Worker threads processing batches concurrently (default: 4)",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.0,
+            help="Seconds to pause between batches to limit database load",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="Checkpoint file path (default: logs/rotate_phi_keys.checkpoint.json)",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore any saved checkpoint and start from the first row",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count rows that need re-encryption without writing",
+        )
+
+    def handle(self, *args, **options):
+        labels = options["models"] or list(ENCRYPTED_MODEL_FIELDS)
+        for label in labels:
+            if label not in ENCRYPTED_MODEL_FIELDS:
+                raise CommandError(f"No encrypted columns registered for {label}")
+        if options["batch_size"] < 1 or options["workers"] < 1:
+            raise CommandError("--batch-size and --workers must be positive")
+
+        checkpoint = Checkpoint(options["checkpoint"], name="rotate_phi_keys")
+        if options["restart"]:
+            checkpoint.clear()
+
+        for label in labels:
+            scanned, rotated = self.rotate_model(
+                label, ENCRYPTED_MODEL_FIELDS[label], checkpoint, options
+            )
+            verb = "would re-encrypt" if options["dry_run"] else "re-encrypted"
+            self.stdout.write(
+                self.style.SUCCESS(f"{label}: scanned {scanned} rows, {verb} {rotated}")
+            )
+
+    def rotate_model(self, label, fields, checkpoint, options):
+        """Dispatch keyset batches to the worker pool, advancing the checkpoint
+        only past batches whose predecessors have all committed."""
+        model = apps.get_model(label)
+        after = None if options["dry_run"] else checkpoint.get(label)
+        if after:
+            self.stdout.write(f"  {label}: resuming after {after}")
+
+        scanned = rotated = 0
+        max_in_flight = options["workers"] * 2
+        pending = deque()
+
+        def drain(block):
+            nonlocal scanned, rotated
+            while pending and (block or pending[0][1].done()):
+                last_pk, future = pending.popleft()
+                batch_scanned, batch_rotated = future.result()
+                scanned += batch_scanned
+                rotated += batch_rotated
+                if not options["dry_run"]:
+                    checkpoint.set(label, last_pk)
+                self.stdout.write(f"  {label}: {scanned} rows scanned...")
+                if block:
+                    break
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            for pks in iter_pk_batches(
+                model._default_manager.all(), options["batch_size"], after
+            ):
+                while len(pending) >= max_in_flight:
+                    drain(block=True)
+                future = executor.submit(
+                    self.rotate_batch, model, fields, pks, options["dry_run"]
+                )
+                pending.append((pks[-1], future))
+                drain(block=False)
+                if options["sleep"]:
+                    time.sleep(options["sleep"])
+
+            while pending:
+                drain(block=True)
+
+        if not options["dry_run"]:
+            # Completed; the next rotation must rescan every row
+            checkpoint.clear(label)
+        return scanned, rotated
+
+    def rotate_batch(self, model, fields, pks, dry_run):
+        """Re-encrypt one batch of rows inside its own transaction."""
+        try:
+            with transaction.atomic():
+                queryset = model._default_manager.filter(pk__in=pks).only("pk", *fields)
+                if not dry_run:
+                    queryset = queryset.select_for_update()
+
+                changed = []
+                for row in queryset:
+                    row_changed = False
+                    for field in fields:
+                        value = getattr(row, field)
+                        if not encryption.is_encrypted(value):
+                            continue
+                        try:
+                            new_value = encryption.rotate_ciphertext(value)
+                        except Exception as e:
+                            logger.error(
+                                f"Could not re-encrypt {model._meta.label}.{field} "
+                                f"for {row.pk}: {str(e)}"
+                            )
+                            continue
+                        if new_value != value:
+                            setattr(row, field, new_value)
+                            row_changed = True
+                    if row_changed:
+                        changed.append(row)
+
+                if changed and not dry_run:
+                    model._default_manager.bulk_update(changed, fields)
+
+            return len(pks), len(changed)
+        finally:
+            # Each worker thread holds its own connection
+            connection.close()
@@ -0,0 +1,116 @@
+# backend/core/management/commands/startup_profile.py
+"""
+Django management command to report cold-start cost: module import time per
+installed app, django.setup() time and encryption key derivation time.
+
+The measurement runs in a fresh interpreter so that modules already imported
+by this process do not hide their cost.
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+import json
+import os
+import subprocess
+import sys
+
+PROBE_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+from core.security import encryption
+encryption.encryption_key
+encryption_done = time.perf_counter()
+print(json.dumps({
+    "django_setup_ms": (setup_done - started) * 1000,
+    "encryption_init_ms": (encryption_done - setup_done) * 1000,
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Report import and initialization cost per installed app"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=0,
+            help="Only show the N most expensive entries",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the report as JSON",
+        )
+
+    def handle(self, *args, **options):
+        env = dict(os.environ)
+        env.setdefault("DJANGO_SETTINGS_MODULE", "theracare.settings")
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE_SCRIPT],
+            capture_output=True,
+            text=True,
+            env=env,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Startup probe failed:\n{result.stderr[-2000:]}")
+
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        per_app = self.aggregate_import_times(result.stderr)
+
+        rows = sorted(per_app.items(), key=lambda item: item[1], reverse=True)
+        if options["top"]:
+            rows = rows[: options["top"]]
+
+        if options["json"]:
+            report = dict(timings)
+            report["imports_ms"] = {name: round(ms, 2) for name, ms in rows}
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(self.style.SUCCESS("Startup profile"))
+        self.stdout.write(
+            f"  django.setup():        {timings['django_setup_ms']:.1f} ms"
+        )
+        self.stdout.write(
+            f"  encryption key init:   {timings['encryption_init_ms']:.1f} ms"
+        )
+        self.stdout.write("\nImport time by app (self time, ms):")
+        for name, ms in rows:
+            self.stdout.write(f"  {ms:10.1f}  {name}")
+
+    def aggregate_import_times(self, importtime_output):
+        """Sum ``-X importtime`` self times by owning installed app."""
+        app_names = sorted(
+            (config.name for config in apps.get_app_configs()), key=len, reverse=True
+        )
+        totals = {}
+
+        for line in importtime_output.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            try:
+                self_us, _cumulative_us, module = line[len("import time:") :].split(
+                    "|", 2
+                )
+                self_ms = int(self_us) / 1000
+            except ValueError:
+                continue  # Header line
+            module = module.strip()
+
+            owner = next(
+                (
+                    name
+                    for name in app_names
+                    if module == name or module.startswith(name + ".")
+                ),
+                None,
+            )
+            if owner is None:
+                owner = f"(library) {module.split('.')[0]}"
+            totals[owner] = totals.get(owner, 0) + self_ms
+
+        return totals
@@ -0,0 +1,110 @@
+# backend/core/management/commands/upgrade_phi_ciphertext.py
+"""
+Django management command to rewrite legacy (v1) encrypted columns in the
+compact v2 ciphertext format.
+
+Run it only once every deployed instance can read v2, then set
+HIPAA_SETTINGS["CIPHERTEXT_FORMAT"] to "v2" so new writes use it too.
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from core.security import ENCRYPTED_MODEL_FIELDS, encryption
+import logging
+
+logger = logging.getLogger("theracare.security")
+
+
+class Command(BaseCommand):
+    help = "Rewrite legacy encrypted PHI columns in the compact v2 format"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            action="append",
+            dest="models",
+            help="Model label to upgrade, e.g. appointments.Appointment "
+            "(repeatable; defaults to every model with encrypted columns)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows fetched and updated per chunk (default: 500)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report how many rows would change without writing",
+        )
+
+    def handle(self, *args, **options):
+        labels = options["models"] or list(ENCRYPTED_MODEL_FIELDS)
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be a positive integer")
+
+        for label in labels:
+            if label not in ENCRYPTED_MODEL_FIELDS:
+                raise CommandError(f"No encrypted columns registered for {label}")
+
+            model = apps.get_model(label)
+            scanned, upgraded = self.upgrade_model(
+                model, ENCRYPTED_MODEL_FIELDS[label], batch_size, options["dry_run"]
+            )
+
+            verb = "would upgrade" if options["dry_run"] else "upgraded"
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{label}: scanned {scanned} rows, {verb} {upgraded} rows"
+                )
+            )
+
+    def upgrade_model(self, model, fields, batch_size, dry_run):
+        """Walk the table in primary-key order and upgrade one chunk at a time."""
+        queryset = model._default_manager.order_by("pk").only("pk", *fields)
+        scanned = upgraded = 0
+        last_pk = None
+
+        while True:
+            chunk_queryset = queryset
+            if last_pk is not None:
+                chunk_queryset = chunk_queryset.filter(pk__gt=last_pk)
+
+            # Rows stay locked from read to write so concurrent edits are
+            # not overwritten with the values read here
+            with transaction.atomic():
+                if not dry_run:
+                    chunk_queryset = chunk_queryset.select_for_update()
+                chunk = list(chunk_queryset[:batch_size])
+                if not chunk:
+                    break
+
+                changed = []
+                for row in chunk:
+                    row_changed = False
+                    for field in fields:
+                        value = getattr(row, field)
+                        if encryption.ciphertext_version(value) != 1:
+                            continue
+                        try:
+                            setattr(row, field, encryption.upgrade_ciphertext(value))
+                            row_changed = True
+                        except Exception as e:
+                            logger.error(
+                                f"Could not upgrade {model._meta.label}.{field} "
+                                f"for {row.pk}: {str(e)}"
+                            )
+                    if row_changed:
+                        changed.append(row)
+
+                if changed and not dry_run:
+                    model._default_manager.bulk_update(changed, fields)
+
+            scanned += len(chunk)
+            upgraded += len(changed)
+            last_pk = chunk[-1].pk
+            self.stdout.write(f"  {model._meta.label}: {scanned} rows scanned...")
+
+        return scanned, upgraded
@@ -0,0 +1,201 @@
+# backend/core/metrics.py
+"""
+Prometheus metrics for TheraCare API, served at /api/health/metrics.
+
+Run every worker process with PROMETHEUS_MULTIPROC_DIR pointing at a shared,
+initially empty directory so that counters and histograms from all
+processes on the host are aggregated at scrape time. Without it the
+endpoint reports the serving process only. prometheus-client is optional:
+when it is missing every recording function is a no-op.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Histogram
+    from prometheus_client.core import GaugeMetricFamily
+    from prometheus_client.multiprocess import MultiProcessCollector
+except ImportError:  # pragma: no cover - optional dependency
+    prometheus_client = None
+
+logger = logging.getLogger("theracare.middleware")
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CHANNEL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+if prometheus_client is not None:
+    REQUESTS = Counter(
+        "theracare_http_requests",
+        "HTTP requests by view, method and status class",
+        ["view", "method", "status"],
+    )
+    REQUEST_LATENCY = Histogram(
+        "theracare_http_request_duration_seconds",
+        "Request latency by view",
+        ["view"],
+        buckets=LATENCY_BUCKETS,
+    )
+    DB_QUERIES = Histogram(
+        "theracare_db_queries_per_request",
+        "Database queries per request by view",
+        ["view"],
+        buckets=QUERY_COUNT_BUCKETS,
+    )
+    DB_TIME = Histogram(
+        "theracare_db_time_per_request_seconds",
+        "Database time per request by view",
+        ["view"],
+        buckets=LATENCY_BUCKETS,
+    )
+    CACHE_REQUESTS = Counter(
+        "theracare_cache_requests",
+        "Cache lookups by cache and result (hit or miss)",
+        ["cache", "result"],
+    )
+    CHANNEL_SEND_LATENCY = Histogram(
+        "theracare_channel_send_duration_seconds",
+        "Channel layer send latency",
+        ["method"],
+        buckets=CHANNEL_BUCKETS,
+    )
+    RATE_LIMITED = Counter(
+        "theracare_rate_limit_rejections",
+        "Requests rejected by the rate limiter, by policy",
+        ["policy"],
+    )
+
+
+def is_enabled() -> bool:
+    return prometheus_client is not None and getattr(
+        settings, "METRICS_SETTINGS", {}
+    ).get("ENABLED", False)
+
+
+def view_label(request: HttpRequest) -> str:
+    """Bounded label for the view that served request"""
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match is not None else "unresolved"
+
+
+def observe_request(request: HttpRequest, response: HttpResponse, timings) -> None:
+    """Record a finished request; timings is the request's RequestTimings"""
+    if not is_enabled():
+        return
+    view = view_label(request)
+    REQUESTS.labels(view, request.method, f"{response.status_code // 100}xx").inc()
+    REQUEST_LATENCY.labels(view).observe(timings.seconds("total"))
+    DB_QUERIES.labels(view).observe(timings.count("db"))
+    DB_TIME.labels(view).observe(timings.seconds("db"))
+
+
+def observe_cache(cache_name: str, hit: bool, count: int = 1) -> None:
+    if is_enabled() and count:
+        CACHE_REQUESTS.labels(cache_name, "hit" if hit else "miss").inc(count)
+
+
+def observe_rate_limited(policy: str) -> None:
+    if is_enabled():
+        RATE_LIMITED.labels(policy).inc()
+
+
+@contextmanager
+def channel_send_timer(method: str):
+    """Time a channel layer send, e.g. ``with channel_send_timer("group_send"):``"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if is_enabled():
+            CHANNEL_SEND_LATENCY.labels(method).observe(time.perf_counter() - started)
+
+
+class CeleryQueueCollector:
+    """
+    Reports broker queue lengths at scrape time. Only Redis brokers are
+    supported; results are cached briefly so frequent scrapes stay cheap.
+    """
+
+    def __init__(self, broker_url: str, queues, ttl: float = 15):
+        self.broker_url = broker_url
+        self.queues = list(queues)
+        self.ttl = ttl
+        self._depths: Dict[str, int] = {}
+        self._fetched = 0.0
+        self._lock = threading.Lock()
+
+    def get_depths(self) -> Dict[str, int]:
+        with self._lock:
+            if time.monotonic() - self._fetched < self.ttl:
+                return self._depths
+            self._fetched = time.monotonic()
+            self._depths = {}
+            if not self.broker_url.startswith(("redis://", "rediss://")):
+                return self._depths
+            try:
+                import redis
+
+                client = redis.Redis.from_url(
+                    self.broker_url, socket_timeout=1, socket_connect_timeout=1
+                )
+                pipe = client.pipeline()
+                for queue in self.queues:
+                    pipe.llen(queue)
+                self._depths = dict(zip(self.queues, pipe.execute()))
+            except Exception as e:
+                logger.warning(f"Celery queue depth unavailable: {str(e)}")
+            return self._depths
+
+    def collect(self):
+        gauge = GaugeMetricFamily(
+            "theracare_celery_queue_depth",
+            "Messages waiting in each Celery queue",
+            labels=["queue"],
+        )
+        for queue, depth in self.get_depths().items():
+            gauge.add_metric([queue], depth)
+        yield gauge
+
+
+_celery_collector: Optional[CeleryQueueCollector] = None
+_collector_lock = threading.Lock()
+
+
+def get_celery_collector() -> CeleryQueueCollector:
+    global _celery_collector
+    with _collector_lock:
+        if _celery_collector is None:
+            _celery_collector = CeleryQueueCollector(
+                getattr(settings, "CELERY_BROKER_URL", ""),
+                getattr(settings, "METRICS_SETTINGS", {}).get(
+                    "CELERY_QUEUES", ["celery"]
+                ),
+            )
+            if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+                prometheus_client.REGISTRY.register(_celery_collector)
+    return _celery_collector
+
+
+def get_registry():
+    """Registry to expose: all processes on the host when multiprocess is on"""
+    collector = get_celery_collector()
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return prometheus_client.REGISTRY
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    registry.register(collector)
+    return registry
+
+
+def render_metrics() -> HttpResponse:
+    """Prometheus text exposition of every metric"""
+    data = prometheus_client.generate_latest(get_registry())
+    return HttpResponse(data, content_type=prometheus_client.CONTENT_TYPE_LATEST)
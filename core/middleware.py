@@ -3,37 +3,97 @@ import logging
 import time
 from datetime import datetime
 from typing import Any, Dict, Optional
+from asgiref.sync import sync_to_async
 from django.http import HttpRequest, HttpResponse
 from django.utils.deprecation import MiddlewareMixin
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
 from django.conf import settings
-from .security import AccessLogging, SessionSecurity
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from audit.writer import record_audit_event
+from . import metrics, timing
+from .query_inspector import query_inspector
+from .ratelimit import rate_limiter
+from .routes import get_route_policy
+from .security import AccessLogging, DecryptionMemo
+from .session_activity import session_activity
 
 User = get_user_model()
 logger = logging.getLogger("theracare.middleware")
 audit_logger = logging.getLogger("audit")
 
 
+async def aresolve_user(request: HttpRequest):
+    """Resolve request.user from async code without a sync DB query"""
+    auser = getattr(request, "auser", None)
+    if auser is not None:
+        # Django 5.0+
+        return await auser()
+
+    def load_user():
+        request.user.is_authenticated  # Evaluates the lazy user
+        return request.user
+
+    return await sync_to_async(load_user)()
+
+
+async def alog(log_func, *args, **kwargs) -> None:
+    """
+    Emit a log record from async code. Handlers may do blocking file I/O,
+    so they run in the shared thread pool rather than the serialized sync
+    thread.
+    """
+    await sync_to_async(log_func, thread_sensitive=False)(*args, **kwargs)
+
+
 class HIPAAComplianceMiddleware(MiddlewareMixin):
     """Middleware to enforce HIPAA compliance requirements"""
 
-    def process_request(self, request: HttpRequest) -> Optional[HttpResponse]:
-        """Process incoming requests for HIPAA compliance"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        # Everything after this middleware is reported as view time
+        self.get_response = timing.timed_view(self.get_response)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        """Native async path: session and cache reads are awaited"""
+        response = await self.aprocess_request(request)
+        if response is None:
+            response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def begin_request(self, request: HttpRequest) -> None:
+        """Per-request setup shared by the sync and async paths"""
 
         # Record request start time for performance monitoring
         request.start_time = time.time()
 
+        # Decrypted values are memoized for the lifetime of this request only
+        request.decryption_memo_token = DecryptionMemo.start()
+
         # Get client IP address
         request.client_ip = self.get_client_ip(request)
 
+        # Timing breakdown, reported in process_response when sampled; all
+        # requests are timed while Prometheus metrics are enabled
+        request.timing_token = timing.start(
+            request.start_time, always=metrics.is_enabled()
+        )
+
+    def process_request(self, request: HttpRequest) -> Optional[HttpResponse]:
+        """Process incoming requests for HIPAA compliance"""
+        self.begin_request(request)
+
         # Check session timeout for authenticated users
         if request.user.is_authenticated:
             session_key = request.session.session_key
             if session_key:
-                last_activity = SessionSecurity.get_session_activity(session_key)
-                if last_activity and SessionSecurity.is_session_expired(last_activity):
+                if session_activity.is_expired(session_key):
                     # Force logout for expired session
+                    session_activity.forget(session_key)
                     request.session.flush()
                     AccessLogging.log_failed_access(
                         user_id=str(request.user.id),
@@ -41,22 +101,62 @@ class HIPAAComplianceMiddleware(MiddlewareMixin):
                         ip_address=request.client_ip,
                         reason="Session expired",
                     )
-                    return HttpResponse(
-                        json.dumps({"error": "Session expired"}),
-                        status=401,
-                        content_type="application/json",
-                    )
+                    return self.session_expired_response()
 
-                # Update session activity
-                SessionSecurity.update_session_activity(session_key)
+                # Update session activity (written to the cache in batches)
+                session_activity.touch(session_key)
 
         return None
 
+    async def aprocess_request(self, request: HttpRequest) -> Optional[HttpResponse]:
+        """Async version of process_request"""
+        self.begin_request(request)
+
+        user = await aresolve_user(request)
+        if not user.is_authenticated:
+            return None
+
+        session_key = request.session.session_key
+        if not session_key:
+            return None
+
+        if await session_activity.ais_expired(session_key):
+            # Force logout for expired session
+            session_activity.forget(session_key)
+            aflush = getattr(request.session, "aflush", None)  # Django 5.1+
+            if aflush is not None:
+                await aflush()
+            else:
+                await sync_to_async(request.session.flush)()
+            await alog(
+                AccessLogging.log_failed_access,
+                user_id=str(user.id),
+                resource=request.path,
+                ip_address=request.client_ip,
+                reason="Session expired",
+            )
+            return self.session_expired_response()
+
+        session_activity.touch(session_key)
+        return None
+
+    def session_expired_response(self) -> HttpResponse:
+        return HttpResponse(
+            json.dumps({"error": "Session expired"}),
+            status=401,
+            content_type="application/json",
+        )
+
     def process_response(
         self, request: HttpRequest, response: HttpResponse
     ) -> HttpResponse:
         """Process outgoing responses for HIPAA compliance"""
 
+        memo_token = getattr(request, "decryption_memo_token", None)
+        if memo_token is not None:
+            DecryptionMemo.end(memo_token)
+            request.decryption_memo_token = None
+
         # Add security headers
         response["X-Content-Type-Options"] = "nosniff"
         response["X-Frame-Options"] = "DENY"
@@ -68,6 +168,16 @@ class HIPAAComplianceMiddleware(MiddlewareMixin):
         response["Pragma"] = "no-cache"
         response["Expires"] = "0"
 
+        timing_token = getattr(request, "timing_token", None)
+        if timing_token is not None:
+            timings = timing.end(timing_token)
+            request.timing_token = None
+            metrics.observe_request(request, response, timings)
+            if timings.sampled:
+                # Picked up by AuditMiddleware for the audit record
+                request.server_timing = timings.as_dict()
+                response["Server-Timing"] = timings.header_value()
+
         return response
 
     def get_client_ip(self, request: HttpRequest) -> str:
@@ -83,28 +193,50 @@ class HIPAAComplianceMiddleware(MiddlewareMixin):
 class AuditMiddleware(MiddlewareMixin):
     """Middleware for comprehensive audit logging"""
 
-    def __init__(self, get_response):
-        super().__init__(get_response)
-        self.sensitive_paths = [
-            "/api/patients/",
-            "/api/soap-notes/",
-            "/api/messages/",
-            "/api/billing/",
-        ]
+    sync_capable = True
+    async_capable = True
+
+    def use_db_writer(self) -> bool:
+        """Whether records go to the buffered AuditLog writer or the audit log file"""
+        return getattr(settings, "HIPAA_SETTINGS", {}).get("AUDIT_DB_WRITER", False)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        """Native async path: the audit record is written off the event loop"""
+        if get_route_policy(request).audit:
+            request.audit_data = self.build_audit_data(
+                request, await aresolve_user(request)
+            )
+
+        response = await self.get_response(request)
+
+        record = self.complete_audit_data(request, response)
+        if record is not None:
+            if self.use_db_writer():
+                # Enqueueing never blocks
+                self.emit_audit(*record)
+            else:
+                await alog(self.emit_audit, *record)
+        return response
 
     def process_request(self, request: HttpRequest) -> None:
         """Log request for audit purposes"""
 
-        # Skip audit logging for certain paths
-        if self.should_skip_audit(request.path):
+        # Skip audit logging for routes that opt out (health checks, static)
+        if not get_route_policy(request).audit:
             return
 
+        # Store audit data in request for later use
+        request.audit_data = self.build_audit_data(request, request.user)
+
+    def build_audit_data(self, request: HttpRequest, user) -> Dict[str, Any]:
+        """Collect the request half of the audit record"""
+
         # Prepare audit data
         audit_data = {
             "timestamp": datetime.now().isoformat(),
             "method": request.method,
             "path": request.path,
-            "user_id": str(request.user.id) if request.user.is_authenticated else None,
+            "user_id": str(user.id) if user.is_authenticated else None,
             "ip_address": getattr(request, "client_ip", "unknown"),
             "user_agent": request.META.get("HTTP_USER_AGENT", "")[:500],  # Limit length
             "query_params": dict(request.GET),
@@ -112,9 +244,7 @@ class AuditMiddleware(MiddlewareMixin):
         }
 
         # Add POST data for sensitive endpoints (encrypted)
-        if request.method in ["POST", "PUT", "PATCH"] and self.is_sensitive_path(
-            request.path
-        ):
+        if request.method in ["POST", "PUT", "PATCH"] and get_route_policy(request).phi:
             try:
                 if request.content_type == "application/json":
                     body_data = json.loads(request.body) if request.body else {}
@@ -124,16 +254,23 @@ class AuditMiddleware(MiddlewareMixin):
             except json.JSONDecodeError:
                 audit_data["request_body"] = "Invalid JSON"
 
-        # Store audit data in request for later use
-        request.audit_data = audit_data
+        return audit_data
 
     def process_response(
         self, request: HttpRequest, response: HttpResponse
     ) -> HttpResponse:
         """Log response for audit purposes"""
 
+        record = self.complete_audit_data(request, response)
+        if record is not None:
+            self.emit_audit(*record)
+        return response
+
+    def complete_audit_data(self, request: HttpRequest, response: HttpResponse):
+        """Return (kind, audit data) for the finished request, or None"""
+
         if not hasattr(request, "audit_data"):
-            return response
+            return None
 
         # Complete audit data
         audit_data = request.audit_data
@@ -144,30 +281,38 @@ class AuditMiddleware(MiddlewareMixin):
                 - getattr(request, "start_time", time.time()),
             }
         )
+        server_timing = getattr(request, "server_timing", None)
+        if server_timing is not None:
+            audit_data["timing"] = server_timing
 
-        # Log based on response status
+        # Classify based on response status
         if response.status_code >= 400:
-            audit_logger.error(f"HTTP_ERROR: {json.dumps(audit_data)}")
-        elif self.is_sensitive_path(request.path):
-            audit_logger.info(f"PHI_REQUEST: {json.dumps(audit_data)}")
-        else:
-            audit_logger.info(f"REQUEST: {json.dumps(audit_data)}")
-
-        return response
+            return "HTTP_ERROR", audit_data
+        elif get_route_policy(request).phi:
+            return "PHI_REQUEST", audit_data
+        return "REQUEST", audit_data
+
+    def emit_audit(self, kind: str, audit_data: Dict[str, Any]) -> None:
+        """Queue the record for AuditLog, or write it to the audit log file"""
+        if not self.use_db_writer():
+            log_func = audit_logger.error if kind == "HTTP_ERROR" else audit_logger.info
+            log_func(f"{kind}: {json.dumps(audit_data)}")
+            return
 
-    def is_sensitive_path(self, path: str) -> bool:
-        """Check if path contains sensitive PHI data"""
-        return any(sensitive_path in path for sensitive_path in self.sensitive_paths)
-
-    def should_skip_audit(self, path: str) -> bool:
-        """Determine if path should skip audit logging"""
-        skip_paths = [
-            "/api/health/",
-            "/admin/jsi18n/",
-            "/static/",
-            "/media/",
-        ]
-        return any(skip_path in path for skip_path in skip_paths)
+        details = {
+            key: value
+            for key, value in audit_data.items()
+            if key not in ("user_id", "ip_address", "user_agent", "timestamp")
+        }
+        record_audit_event(
+            action=kind.lower(),
+            user_id=audit_data["user_id"],
+            resource_type="http_request",
+            resource_id=audit_data["path"],
+            details=details,
+            ip_address=audit_data["ip_address"],
+            user_agent=audit_data["user_agent"],
+        )
 
     def mask_sensitive_fields(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Mask sensitive fields in request data"""
@@ -198,76 +343,139 @@ class AuditMiddleware(MiddlewareMixin):
 class RateLimitMiddleware(MiddlewareMixin):
     """Rate limiting middleware for security"""
 
-    def __init__(self, get_response):
-        super().__init__(get_response)
-        self.rate_limits = {
-            "login": {"requests": 5, "window": 300},  # 5 attempts per 5 minutes
-            "api": {"requests": 1000, "window": 3600},  # 1000 requests per hour
-            "sensitive": {
-                "requests": 100,
-                "window": 3600,
-            },  # 100 sensitive requests per hour
-        }
+    sync_capable = True
+    async_capable = True
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        """Native async path: Redis checks run off the event loop"""
+        policy = rate_limiter.get_policy(get_route_policy(request).rate_limit)
+        if policy is None:
+            return await self.get_response(request)
+
+        user = await aresolve_user(request)
+        identity = self.get_identity(request, user)
+        if rate_limiter.uses_shared_store():
+            result = await sync_to_async(rate_limiter.hit, thread_sensitive=False)(
+                policy, identity
+            )
+        else:
+            result = rate_limiter.hit(policy, identity)
+
+        if not result.allowed:
+            metrics.observe_rate_limited(policy.name)
+            await alog(self.log_rate_limited, request, user)
+            return self.add_headers(self.rate_limited_response(), result)
+
+        response = await self.get_response(request)
+        return self.add_headers(response, result)
 
     def process_request(self, request: HttpRequest) -> Optional[HttpResponse]:
         """Check rate limits for incoming requests"""
 
-        client_ip = getattr(request, "client_ip", "unknown")
-
-        # Determine rate limit type
-        limit_type = "api"
-        if "login" in request.path:
-            limit_type = "login"
-        elif any(
-            sensitive_path in request.path
-            for sensitive_path in ["/patients/", "/soap-notes/"]
-        ):
-            limit_type = "sensitive"
-
-        # Check rate limit
-        if self.is_rate_limited(client_ip, limit_type, request.user):
-            AccessLogging.log_failed_access(
-                user_id=str(request.user.id) if request.user.is_authenticated else None,
-                resource=request.path,
-                ip_address=client_ip,
-                reason="Rate limit exceeded",
-            )
+        policy = rate_limiter.get_policy(get_route_policy(request).rate_limit)
+        if policy is None:
+            return None
 
-            return HttpResponse(
-                json.dumps({"error": "Rate limit exceeded"}),
-                status=429,
-                content_type="application/json",
-            )
+        result = rate_limiter.hit(policy, self.get_identity(request, request.user))
+        request.rate_limit = result
 
-        return None
+        if not result.allowed:
+            metrics.observe_rate_limited(policy.name)
+            self.log_rate_limited(request, request.user)
+            return self.rate_limited_response()
 
-    def is_rate_limited(self, client_ip: str, limit_type: str, user) -> bool:
-        """Check if client has exceeded rate limit"""
+        return None
 
-        rate_config = self.rate_limits.get(limit_type, self.rate_limits["api"])
+    def process_response(
+        self, request: HttpRequest, response: HttpResponse
+    ) -> HttpResponse:
+        """Report the caller's remaining budget"""
+        result = getattr(request, "rate_limit", None)
+        if result is not None:
+            self.add_headers(response, result)
+        return response
 
-        # Create cache key
+    def get_identity(self, request: HttpRequest, user) -> str:
+        """Buckets are per user when authenticated, else per client IP"""
         if user.is_authenticated:
-            cache_key = f"rate_limit_{limit_type}_{user.id}"
-        else:
-            cache_key = f"rate_limit_{limit_type}_{client_ip}"
+            return f"user:{user.id}"
+        # API clients authenticate in DRF, after middleware; their access
+        # token already names the user
+        user_id = self.get_token_user_id(request)
+        if user_id:
+            return f"user:{user_id}"
+        return f"ip:{getattr(request, 'client_ip', 'unknown')}"
+
+    def get_token_user_id(self, request: HttpRequest) -> Optional[str]:
+        """User id claim of a valid JWT access token, without a database query"""
+        authentication = JWTAuthentication()
+        header = authentication.get_header(request)
+        raw_token = authentication.get_raw_token(header) if header else None
+        if raw_token is None:
+            return None
+        try:
+            token = authentication.get_validated_token(raw_token)
+        except (InvalidToken, TokenError):
+            return None
+        return token.get(jwt_settings.USER_ID_CLAIM)
+
+    def log_rate_limited(self, request: HttpRequest, user) -> None:
+        AccessLogging.log_failed_access(
+            user_id=str(user.id) if user.is_authenticated else None,
+            resource=request.path,
+            ip_address=getattr(request, "client_ip", "unknown"),
+            reason="Rate limit exceeded",
+        )
 
-        # Get current count
-        current_count = cache.get(cache_key, 0)
+    def add_headers(self, response: HttpResponse, result) -> HttpResponse:
+        for header, value in result.headers().items():
+            response[header] = value
+        return response
+
+    def rate_limited_response(self) -> HttpResponse:
+        return HttpResponse(
+            json.dumps({"error": "Rate limit exceeded"}),
+            status=429,
+            content_type="application/json",
+        )
 
-        # Check if limit exceeded
-        if current_count >= rate_config["requests"]:
-            return True
 
-        # Increment counter
-        cache.set(cache_key, current_count + 1, timeout=rate_config["window"])
+class QueryInspectorMiddleware(MiddlewareMixin):
+    """Flags repeated query shapes (N+1) and slow statements on sampled requests"""
 
-        return False
+    sync_capable = True
+    async_capable = True
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        """Native async path: sampling and reporting need no I/O"""
+        self.process_request(request)
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_request(self, request: HttpRequest) -> None:
+        request.query_inspection_token = query_inspector.start()
+
+    def process_response(
+        self, request: HttpRequest, response: HttpResponse
+    ) -> HttpResponse:
+        token = getattr(request, "query_inspection_token", None)
+        if token is not None:
+            request.query_inspection_token = None
+            query_inspector.finish(token, metrics.view_label(request))
+        return response
 
 
 class SecurityHeadersMiddleware(MiddlewareMixin):
     """Middleware to add security headers"""
 
+    sync_capable = True
+    async_capable = True
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        """Native async path: headers are added without a thread hop"""
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
     def process_response(
         self, request: HttpRequest, response: HttpResponse
     ) -> HttpResponse:
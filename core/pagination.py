@@ -3,9 +3,15 @@
 Custom pagination classes for TheraCare API.
 """
 
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 from collections import OrderedDict
+import base64
+import json
 
 
 class CustomPageNumberPagination(PageNumberPagination):
@@ -99,3 +105,200 @@ class SmallResultsPagination(PageNumberPagination):
                 ]
             )
         )
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on (ordering_field, pk), newest first. Each page is
+    one index range scan from the previous page's last row, so deep pages
+    cost the same as the first. The total count is included unless the
+    client opts out with ``count=false``.
+
+    The view may set ``cursor_ordering_field`` to a datetime field other
+    than ``timestamp``; an ``ordering`` query parameter does not apply.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    ordering_field = "timestamp"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.field = getattr(view, "cursor_ordering_field", self.ordering_field)
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        self.count = None
+        if self.include_count(request):
+            self.count = queryset.count()
+
+        reverse = False
+        if position is not None:
+            value, pk, reverse = position
+            if reverse:
+                queryset = queryset.filter(
+                    Q(**{f"{self.field}__gt": value})
+                    | Q(**{self.field: value, "pk__gt": pk})
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(**{f"{self.field}__lt": value})
+                    | Q(**{self.field: value, "pk__lt": pk})
+                )
+        order = (self.field, "pk") if reverse else (f"-{self.field}", "-pk")
+
+        results = list(queryset.order_by(*order)[: page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+
+        # Moving backwards implies a page after this one, and vice versa
+        self.has_next = has_more if not reverse else True
+        self.has_previous = has_more if reverse else position is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        fields = [("page_size", self.get_page_size(self.request))]
+        if self.count is not None:
+            fields.insert(0, ("count", self.count))
+        fields += [
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]
+        return Response(OrderedDict(fields))
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                page_size = int(request.query_params[self.page_size_query_param])
+                if page_size > 0:
+                    return min(page_size, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+
+        return self.page_size
+
+    def include_count(self, request) -> bool:
+        value = request.query_params.get(self.count_query_param, "true")
+        return value.lower() not in ("false", "0", "no")
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Walked past the end; the previous page is the last one
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, obj, reverse: bool) -> str:
+        position = {
+            "v": getattr(obj, self.field).isoformat(),
+            "pk": str(obj.pk),
+            "r": int(reverse),
+        }
+        token = base64.urlsafe_b64encode(
+            json.dumps(position, separators=(",", ":")).encode()
+        ).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        """(ordering value, pk, reverse) from the cursor parameter, or None"""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(token.encode()))
+            value = parse_datetime(position["v"])
+            if value is None:
+                raise ValueError(position["v"])
+            return value, position["pk"], bool(position.get("r"))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound("Invalid cursor")
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to false to skip the total count.",
+                "schema": {"type": "boolean"},
+            },
+        ]
+
+
+class SelectablePagination(CustomPageNumberPagination):
+    """
+    Page-number pagination by default; ``pagination=cursor`` (or a
+    ``cursor`` parameter, as in the next/previous links) switches the
+    request to KeysetPagination for append-heavy lists.
+    """
+
+    mode_query_param = "pagination"
+    cursor_class = KeysetPagination
+
+    def __init__(self):
+        self.keyset = None
+
+    def wants_cursor(self, request) -> bool:
+        return (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or self.cursor_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.wants_cursor(request):
+            self.keyset = self.cursor_class()
+            self.keyset.page_size = self.page_size
+            self.keyset.max_page_size = self.max_page_size
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append(
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to cursor for keyset pagination.",
+                "schema": {"type": "string", "enum": ["page", "cursor"]},
+            }
+        )
+        names = {parameter["name"] for parameter in parameters}
+        return parameters + [
+            parameter
+            for parameter in self.cursor_class().get_schema_operation_parameters(view)
+            if parameter["name"] not in names
+        ]
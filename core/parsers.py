@@ -0,0 +1,72 @@
+# backend/core/parsers.py
+"""
+Custom request parsers for TheraCare API.
+"""
+
+import io
+import zlib
+from django.conf import settings
+from django.http.multipartparser import MultiPartParser as DjangoMultiPartParser
+from django.http.multipartparser import MultiPartParserError
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import DataAndFiles, JSONParser, MultiPartParser
+from .storage import EncryptedFileUploadHandler
+
+
+class CompressedJSONParser(JSONParser):
+    """
+    JSON parser that also accepts ``Content-Encoding: gzip`` (or
+    ``deflate``) bodies. The decompressed size is capped by
+    DATA_UPLOAD_MAX_MEMORY_SIZE so a small body cannot expand without bound.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context.get("request")
+        encoding = ""
+        if request is not None:
+            encoding = request.META.get("HTTP_CONTENT_ENCODING", "").strip().lower()
+
+        if encoding in ("gzip", "deflate"):
+            stream = io.BytesIO(self.decompress(stream.read(), encoding))
+        elif encoding not in ("", "identity"):
+            raise ParseError(f"Unsupported Content-Encoding: {encoding}")
+
+        return super().parse(stream, media_type, parser_context)
+
+    def decompress(self, data: bytes, encoding: str) -> bytes:
+        limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        # zlib handles both: wbits 16+ reads a gzip header, 15 a zlib one
+        wbits = 16 + zlib.MAX_WBITS if encoding == "gzip" else zlib.MAX_WBITS
+        decompressor = zlib.decompressobj(wbits)
+        try:
+            body = decompressor.decompress(data, limit + 1 if limit else 0)
+        except zlib.error as e:
+            raise ParseError(f"Invalid {encoding} body: {str(e)}")
+        if limit and len(body) > limit:
+            raise ParseError("Decompressed request body is too large")
+        return body
+
+
+class EncryptedMultiPartParser(MultiPartParser):
+    """
+    Multipart parser whose files are encrypted as each chunk arrives
+    (EncryptedFileUploadHandler) instead of being buffered in memory or
+    spooled to a plaintext temporary file. Use it for PHI uploads stored
+    with EncryptedFileSystemStorage.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context["request"]
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        meta = request.META.copy()
+        meta["CONTENT_TYPE"] = media_type
+        upload_handlers = [EncryptedFileUploadHandler(request)]
+
+        try:
+            parser = DjangoMultiPartParser(meta, stream, upload_handlers, encoding)
+            data, files = parser.parse()
+            return DataAndFiles(data, files)
+        except MultiPartParserError as e:
+            raise ParseError(f"Multipart form parse error - {str(e)}")
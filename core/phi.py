@@ -0,0 +1,244 @@
+# backend/core/phi.py
+"""
+Helpers for long-running maintenance jobs over encrypted PHI tables.
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger("theracare.security")
+
+
+class Checkpoint:
+    """
+    JSON file recording the last primary key processed per model, so that an
+    interrupted job can resume where it stopped.
+    """
+
+    def __init__(self, path: Optional[str] = None, name: str = "phi_job"):
+        self.path = (
+            Path(path)
+            if path
+            else Path(settings.BASE_DIR) / "logs" / (f"{name}.checkpoint.json")
+        )
+        self._lock = threading.Lock()
+        self._state = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path) as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {str(e)}")
+            return {}
+
+    def get(self, label: str) -> Optional[str]:
+        """Return the last completed primary key for label"""
+        return self._state.get(label)
+
+    def set(self, label: str, pk: Any) -> None:
+        """Record pk as completed for label and persist atomically"""
+        with self._lock:
+            self._state[label] = str(pk)
+            self._write()
+
+    def clear(self, label: Optional[str] = None) -> None:
+        """Forget progress for label, or for every model"""
+        with self._lock:
+            if label is None:
+                self._state = {}
+            else:
+                self._state.pop(label, None)
+            self._write()
+
+    def _write(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as fh:
+            json.dump(self._state, fh)
+        os.replace(tmp_path, self.path)
+
+
+def iter_pk_batches(
+    queryset, batch_size: int, after: Optional[Any] = None
+) -> Iterator[List[Any]]:
+    """
+    Yield lists of primary keys in ascending order using keyset pagination,
+    starting after the given primary key.
+    """
+    queryset = queryset.order_by("pk").values_list("pk", flat=True)
+    while True:
+        batch_queryset = queryset if after is None else queryset.filter(pk__gt=after)
+        batch = list(batch_queryset[:batch_size])
+        if not batch:
+            return
+        yield batch
+        after = batch[-1]
+
+
+class PHIMigration:
+    """
+    Declarative data migration over the PHI columns of one model.
+
+    ``transform`` maps a stored value to its new value; returning the value
+    unchanged leaves the row alone. ``after_chunk`` optionally receives the
+    changed rows of each chunk inside the chunk's transaction, e.g. to
+    refresh derived columns that bulk_update bypasses.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        fields: List[str],
+        transform: Callable[[Any], Any],
+        description: str = "",
+        after_chunk: Optional[Callable[[List[Any]], None]] = None,
+    ):
+        self.model = model
+        self.fields = list(fields)
+        self.transform = transform
+        self.description = description
+        self.after_chunk = after_chunk
+
+    def get_model(self):
+        return apps.get_model(self.model)
+
+
+def decrypt_value(value: Any) -> Any:
+    """
+    Transform: replace ciphertext with its plaintext, removing every layer
+    of values that were encrypted more than once
+    """
+    from .security import encryption
+
+    while encryption.is_encrypted(value):
+        value = encryption.decrypt(value)
+    return value
+
+
+def encrypt_value(value: Any) -> Any:
+    """Transform: encrypt plaintext values, leaving ciphertext alone"""
+    from .security import encryption
+
+    if not value or encryption.is_encrypted(value):
+        return value
+    return encryption.encrypt(value)
+
+
+def refresh_user_search_indexes(users: List[Any]) -> None:
+    """after_chunk hook: recompute blind indexes for rewritten users"""
+    from users.models import User
+
+    for user in users:
+        for field in User.BLIND_INDEXED_FIELDS:
+            setattr(user, f"{field}_bidx", user.compute_blind_index(field))
+        user.update_search_tokens()
+    User.objects.bulk_update(
+        users, [f"{field}_bidx" for field in User.BLIND_INDEXED_FIELDS]
+    )
+
+
+PATIENT_PHI_FIELDS = [
+    "first_name",
+    "last_name",
+    "middle_name",
+    "email",
+    "phone",
+    "phone_secondary",
+    "street_address",
+    "city",
+    "zip_code",
+    "ssn",
+    "medical_record_number",
+    "emergency_contact_name",
+    "emergency_contact_phone",
+    "emergency_contact_relationship",
+]
+USER_PHI_FIELDS = ["first_name", "last_name", "phone", "license_number"]
+
+# Migrations runnable with ``python manage.py phi_migrate <name>``
+PHI_MIGRATIONS: Dict[str, PHIMigration] = {
+    "decrypt_patients": PHIMigration(
+        "patients.Patient",
+        PATIENT_PHI_FIELDS,
+        decrypt_value,
+        "Store patient identity and contact fields as plaintext",
+    ),
+    "decrypt_users": PHIMigration(
+        "users.User",
+        USER_PHI_FIELDS,
+        decrypt_value,
+        "Store user names, phone and license number as plaintext",
+        after_chunk=refresh_user_search_indexes,
+    ),
+    # User fields are stored as plaintext, so every layer is removed (as the
+    # original fix_double_encryption.py script did before saving)
+    "fix_double_encryption": PHIMigration(
+        "users.User",
+        USER_PHI_FIELDS,
+        decrypt_value,
+        "Decrypt double-encrypted user fields back to plaintext",
+        after_chunk=refresh_user_search_indexes,
+    ),
+}
+
+
+def register_phi_migration(name: str, migration: PHIMigration) -> None:
+    """Make a migration available to the phi_migrate command"""
+    PHI_MIGRATIONS[name] = migration
+
+
+def run_migration_chunk(name: str, pks: List[Any], dry_run: bool = False) -> Dict:
+    """
+    Apply migration name to the rows with the given primary keys in one
+    transaction. Runs in phi_migrate worker processes.
+
+    Values whose transform fails are left unchanged and counted as errors.
+    """
+    migration = PHI_MIGRATIONS[name]
+    model = migration.get_model()
+    label = model._meta.label
+    changed = []
+    errors = 0
+
+    with transaction.atomic():
+        queryset = model._default_manager.filter(pk__in=pks)
+        if migration.after_chunk is None:
+            queryset = queryset.only("pk", *migration.fields)
+        if not dry_run:
+            queryset = queryset.select_for_update()
+
+        for row in queryset:
+            row_changed = False
+            for field in migration.fields:
+                value = getattr(row, field)
+                try:
+                    new_value = migration.transform(value)
+                except Exception as e:
+                    errors += 1
+                    logger.error(
+                        f"phi_migrate {name}: {label}.{field} for {row.pk} "
+                        f"failed: {str(e)}"
+                    )
+                    continue
+                if new_value != value:
+                    setattr(row, field, new_value)
+                    row_changed = True
+            if row_changed:
+                changed.append(row)
+
+        if changed and not dry_run:
+            model._default_manager.bulk_update(changed, migration.fields)
+            if migration.after_chunk:
+                migration.after_chunk(changed)
+
+    return {"scanned": len(pks), "changed": len(changed), "errors": errors}
@@ -0,0 +1,159 @@
+# backend/core/query_inspector.py
+"""
+Sampled detection of N+1 query patterns and slow statements.
+
+For a sampled request every query is reduced to a fingerprint (the SQL
+template with literals and IN lists collapsed) and counted. When the
+request finishes, fingerprints executed more than REPEAT_THRESHOLD times
+are logged with the view name and the first project frame that issued them,
+as are statements slower than SLOW_QUERY_MS. Only
+SQL templates are logged, never parameters, so no PHI reaches the logs.
+"""
+
+import logging
+import random
+import re
+import time
+import traceback
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+logger = logging.getLogger("theracare.queries")
+
+# Execute wrappers between the caller and the database
+INSTRUMENTATION_MODULES = ("core/query_inspector.py", "core/timing.py")
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"(VALUES \([^)]*\))(?:, \([^)]*\))+", re.IGNORECASE)
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> str:
+    """Normalize a SQL template so that queries of the same shape compare equal"""
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _VALUES_LIST.sub(r"\1, ...", sql)
+
+
+def find_origin() -> Optional[str]:
+    """Innermost project frame on the stack, as path:line in function"""
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        filename = frame.filename
+        if (
+            filename.startswith(base_dir)
+            and "site-packages" not in filename
+            and not filename.endswith(INSTRUMENTATION_MODULES)
+        ):
+            return f"{filename[len(base_dir) + 1:]}:{frame.lineno} in {frame.name}"
+    return None
+
+
+class QueryProfile:
+    """Query shapes seen during one request"""
+
+    __slots__ = ("counts", "origins", "slow", "total")
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        # Where each repeated shape was issued from
+        self.origins: Dict[str, Optional[str]] = {}
+        # (milliseconds, shape, origin) of slow statements
+        self.slow: List[Tuple[float, str, Optional[str]]] = []
+        self.total = 0
+
+
+_current: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+
+
+class QueryInspector:
+    """Samples requests and reports repeated and slow queries"""
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        repeat_threshold: int = 5,
+        slow_query_ms: float = 200,
+    ):
+        self.sample_rate = sample_rate
+        self.repeat_threshold = repeat_threshold
+        self.slow_query_ms = slow_query_ms
+
+    @classmethod
+    def from_settings(cls) -> "QueryInspector":
+        config = getattr(settings, "QUERY_INSPECTOR_SETTINGS", {})
+        return cls(
+            sample_rate=config.get("SAMPLE_RATE", 0.0),
+            repeat_threshold=config.get("REPEAT_THRESHOLD", 5),
+            slow_query_ms=config.get("SLOW_QUERY_MS", 200),
+        )
+
+    def start(self):
+        """Begin profiling this request if sampled; returns a token or None"""
+        rate = self.sample_rate
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return None
+        return _current.set(QueryProfile())
+
+    def finish(self, token, view_name: str) -> Optional[QueryProfile]:
+        """Stop profiling and log repeated query shapes and slow statements"""
+        profile = _current.get()
+        _current.reset(token)
+        if profile is None:
+            return None
+
+        for shape, count in profile.counts.items():
+            if count > self.repeat_threshold:
+                logger.warning(
+                    f"Repeated query in {view_name}: {count}x "
+                    f"(of {profile.total} queries) from "
+                    f"{profile.origins.get(shape) or 'unknown'}: {shape[:500]}"
+                )
+        for elapsed_ms, shape, origin in profile.slow:
+            logger.warning(
+                f"Slow query in {view_name} ({elapsed_ms:.0f}ms) from "
+                f"{origin or 'unknown'}: {shape[:500]}"
+            )
+        return profile
+
+    def record(self, profile: QueryProfile, execute, sql, params, many, context):
+        """Run and account for one query of a profiled request"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            shape = fingerprint(sql)
+            count = profile.counts.get(shape, 0) + 1
+            profile.counts[shape] = count
+            profile.total += 1
+            # Walk the stack once per offending shape, not per query
+            if count == self.repeat_threshold + 1:
+                profile.origins[shape] = find_origin()
+            if elapsed_ms >= self.slow_query_ms:
+                profile.slow.append((elapsed_ms, shape, find_origin()))
+
+
+query_inspector = SimpleLazyObject(QueryInspector.from_settings)
+
+
+def inspect_queries(execute, sql, params, many, context):
+    """Connection execute wrapper; a context variable lookup when not sampled"""
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return query_inspector.record(profile, execute, sql, params, many, context)
+
+
+def install_query_inspector(sender, connection, **kwargs) -> None:
+    """connection_created receiver adding inspect_queries to every connection"""
+    if inspect_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(inspect_queries)
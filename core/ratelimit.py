@@ -0,0 +1,200 @@
+# backend/core/ratelimit.py
+"""
+Token-bucket rate limiting for TheraCare API.
+
+Each policy allows ``requests`` per ``window`` seconds as a bucket of that
+capacity refilled continuously, so bursts are bounded without the counter
+resetting on every request. With django-redis configured, a bucket is
+checked and updated atomically by one Lua script call shared by every
+process; otherwise (or while Redis is unreachable) an in-process store is
+used.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.functional import SimpleLazyObject
+
+logger = logging.getLogger("theracare.security")
+
+DEFAULT_POLICIES = {
+    "login": {"requests": 5, "window": 300},  # 5 attempts per 5 minutes
+    "api": {"requests": 1000, "window": 3600},  # 1000 requests per hour
+    "sensitive": {"requests": 100, "window": 3600},  # 100 sensitive requests per hour
+}
+
+# KEYS[1] bucket; ARGV capacity, refill rate (tokens/s), cost.
+# Returns {allowed, tokens left, seconds until a token is available}.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(tokens), tostring(wait)}
+"""
+
+
+class RatePolicy:
+    """A named bucket: capacity ``requests`` refilled over ``window`` seconds"""
+
+    def __init__(self, name: str, requests: int, window: int):
+        self.name = name
+        self.requests = requests
+        self.window = window
+
+    @property
+    def rate(self) -> float:
+        """Tokens added per second"""
+        return self.requests / self.window
+
+
+class RateLimitResult:
+    """Outcome of a bucket check, with the values for the response headers"""
+
+    def __init__(self, policy: RatePolicy, allowed: bool, tokens: float, wait: float):
+        self.policy = policy
+        self.allowed = allowed
+        self.remaining = max(int(tokens), 0)
+        self.retry_after = math.ceil(wait) if not allowed else 0
+        # Seconds until the bucket is full again
+        self.reset = math.ceil((policy.requests - tokens) / policy.rate)
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.policy.requests),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(self.reset),
+            "X-RateLimit-Policy": f"{self.policy.requests};w={self.policy.window}",
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(self.retry_after, 1))
+        return headers
+
+
+class LocalBucketStore:
+    """In-process token buckets, bounded to the most recently used keys"""
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(
+        self, key: str, policy: RatePolicy, cost: int = 1
+    ) -> Tuple[bool, float, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.pop(key, (policy.requests, now))
+            tokens = min(policy.requests, tokens + (now - ts) * policy.rate)
+            if tokens >= cost:
+                allowed, wait = True, 0.0
+                tokens -= cost
+            else:
+                allowed, wait = False, (cost - tokens) / policy.rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, tokens, wait
+
+
+class RateLimiter:
+    """Looks up rate policies and checks the caller's bucket"""
+
+    # After a Redis error, use the local store for this long before retrying
+    REDIS_RETRY_SECONDS = 30
+
+    def __init__(
+        self,
+        policies: Optional[Dict[str, Dict[str, int]]] = None,
+        cache_alias: str = "default",
+    ):
+        self.policies = {
+            name: RatePolicy(name, config["requests"], config["window"])
+            for name, config in (policies or DEFAULT_POLICIES).items()
+        }
+        self.cache_alias = cache_alias
+        self.local = LocalBucketStore()
+        self._script = None
+        self._key_prefix = ""
+        self._redis_down_until = 0.0
+
+    @classmethod
+    def from_settings(cls) -> "RateLimiter":
+        config = getattr(settings, "RATE_LIMIT_SETTINGS", {})
+        return cls(
+            policies=config.get("POLICIES"),
+            cache_alias=config.get("CACHE_ALIAS", "default"),
+        )
+
+    def get_policy(self, name: Optional[str]) -> Optional[RatePolicy]:
+        """Policy by name (see core.routes); None means the route is not limited"""
+        return self.policies.get(name) if name else None
+
+    def hit(self, policy: RatePolicy, identity: str, cost: int = 1) -> RateLimitResult:
+        """Take cost tokens from identity's bucket for policy"""
+        key = f"ratelimit:{policy.name}:{identity}"
+        script = self._get_script()
+        if script is not None:
+            try:
+                allowed, tokens, wait = script(
+                    keys=[self._key_prefix + key],
+                    args=[policy.requests, policy.rate, cost],
+                )
+                return RateLimitResult(
+                    policy, bool(allowed), float(tokens), float(wait)
+                )
+            except Exception as e:
+                logger.warning(f"Rate limiter falling back to local buckets: {str(e)}")
+                self._redis_down_until = time.monotonic() + self.REDIS_RETRY_SECONDS
+
+        return RateLimitResult(policy, *self.local.hit(key, policy, cost))
+
+    def uses_shared_store(self) -> bool:
+        """Whether checks go to Redis (network I/O) rather than local memory"""
+        return self._get_script() is not None
+
+    def _get_script(self):
+        """Registered Lua script when the cache is django-redis, else None"""
+        if time.monotonic() < self._redis_down_until:
+            return None
+        if self._script is None:
+            backend = settings.CACHES.get(self.cache_alias, {}).get("BACKEND", "")
+            if "django_redis" not in backend:
+                return None
+            try:
+                from django_redis import get_redis_connection
+
+                client = get_redis_connection(self.cache_alias)
+            except Exception as e:
+                logger.warning(f"Rate limiter cannot reach Redis: {str(e)}")
+                self._redis_down_until = time.monotonic() + self.REDIS_RETRY_SECONDS
+                return None
+            # Namespace keys like the cache itself does
+            prefix = caches[self.cache_alias].key_prefix
+            self._key_prefix = f"{prefix}:" if prefix else ""
+            # EVALSHA with a transparent EVAL fallback: one round trip per check
+            self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        return self._script
+
+
+rate_limiter = SimpleLazyObject(RateLimiter.from_settings)
@@ -0,0 +1,205 @@
+# backend/core/routes.py
+"""
+Route classification shared by the core middlewares.
+
+Every view in the URLconf is assigned a RoutePolicy once, from (lowest to
+highest precedence) the defaults, ROUTE_POLICIES entries for its installed
+app, view module or URL name, and a ``route_policy`` declared on the view
+itself:
+
+    @route_policy(audit=False, rate_limit=None)
+    @api_view(["GET"])
+    def health_check(request): ...
+
+    class LoginView(APIView):
+        route_policy = {"rate_limit": "login"}
+
+Requests are classified by resolving the path once and looking the view up
+in that table; results are memoized per path, so repeated paths cost a
+single dict lookup.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from django.apps import apps
+from django.conf import settings
+from django.http import HttpRequest
+from django.urls import URLResolver, get_resolver
+from django.urls.exceptions import Resolver404
+from django.utils.functional import SimpleLazyObject
+
+logger = logging.getLogger("theracare.middleware")
+
+
+class RoutePolicy:
+    """How middleware treats requests to one view"""
+
+    __slots__ = ("audit", "phi", "rate_limit")
+
+    def __init__(
+        self, audit: bool = True, phi: bool = False, rate_limit: Optional[str] = "api"
+    ):
+        # Write an audit record for the request
+        self.audit = audit
+        # Record it as PHI access
+        self.phi = phi
+        # RATE_LIMIT_SETTINGS policy name, or None for no limit
+        self.rate_limit = rate_limit
+
+    def updated(self, overrides: Dict[str, Any]) -> "RoutePolicy":
+        values = {name: getattr(self, name) for name in self.__slots__}
+        unknown = set(overrides) - set(values)
+        if unknown:
+            raise ValueError(f"Unknown route policy fields: {', '.join(unknown)}")
+        values.update(overrides)
+        return RoutePolicy(**values)
+
+    def __repr__(self):
+        return (
+            f"RoutePolicy(audit={self.audit}, phi={self.phi}, "
+            f"rate_limit={self.rate_limit!r})"
+        )
+
+
+def route_policy(**overrides) -> Callable:
+    """Declare RoutePolicy fields on a function view"""
+
+    def decorator(view):
+        view.route_policy = overrides
+        return view
+
+    return decorator
+
+
+def get_declared_policy(callback) -> Optional[Dict[str, Any]]:
+    """route_policy declared on a view function, DRF view or Django CBV"""
+    for target in (
+        callback,
+        getattr(callback, "cls", None),
+        getattr(callback, "view_class", None),
+    ):
+        declared = getattr(target, "route_policy", None)
+        if declared is not None:
+            return declared
+    return None
+
+
+def iter_url_patterns(
+    patterns, namespace: Optional[str] = None, urlconf: Optional[str] = None
+) -> Iterator[Tuple[Callable, Optional[str], Optional[str]]]:
+    """
+    Yield (callback, namespaced URL name, including URLconf module) for every
+    pattern in a URLconf
+    """
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            child_namespace = pattern.namespace
+            if namespace and child_namespace:
+                child_namespace = f"{namespace}:{child_namespace}"
+            child_urlconf = pattern.urlconf_name
+            if not isinstance(child_urlconf, str):
+                child_urlconf = getattr(child_urlconf, "__name__", urlconf)
+            yield from iter_url_patterns(
+                pattern.url_patterns, child_namespace or namespace, child_urlconf
+            )
+        else:
+            name = pattern.name
+            if name and namespace:
+                name = f"{namespace}:{name}"
+            yield pattern.callback, name, urlconf
+
+
+class RouteClassifier:
+    """Precomputed view -> RoutePolicy table with a per-path memo"""
+
+    def __init__(
+        self,
+        overrides: Optional[Dict[str, Dict[str, Any]]] = None,
+        default: Optional[RoutePolicy] = None,
+        urlconf: Optional[str] = None,
+        cache_size: int = 4096,
+    ):
+        self.overrides = overrides or {}
+        self.default = default or RoutePolicy()
+        self.urlconf = urlconf
+        self.cache_size = cache_size
+        self._by_view: Dict[Callable, RoutePolicy] = {}
+        self._by_path: "OrderedDict[str, RoutePolicy]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.build()
+
+    @classmethod
+    def from_settings(cls) -> "RouteClassifier":
+        rate_limits = getattr(settings, "RATE_LIMIT_SETTINGS", {})
+        return cls(
+            overrides=getattr(settings, "ROUTE_POLICIES", {}),
+            default=RoutePolicy(rate_limit=rate_limits.get("DEFAULT_POLICY", "api")),
+        )
+
+    def build(self) -> None:
+        """Classify every view in the URLconf"""
+        resolver = get_resolver(self.urlconf)
+        table = {}
+        for callback, name, urlconf in iter_url_patterns(resolver.url_patterns):
+            if callback not in table:
+                table[callback] = self.policy_for_view(callback, name, urlconf)
+        self._by_view = table
+        self._by_path.clear()
+        logger.debug(f"Route classifier built for {len(table)} views")
+
+    def policy_for_view(
+        self, callback, name: Optional[str], urlconf: Optional[str] = None
+    ) -> RoutePolicy:
+        policy = self.default
+        module = getattr(callback, "__module__", "") or ""
+        # The app is the one whose URLconf routes here (so router API roots
+        # count as that app), else the one defining the view
+        keys = [self.app_name(urlconf), self.app_name(module), module, name]
+        for key in dict.fromkeys(keys):
+            if key and key in self.overrides:
+                policy = policy.updated(self.overrides[key])
+
+        declared = get_declared_policy(callback)
+        if declared:
+            policy = policy.updated(declared)
+        return policy
+
+    @staticmethod
+    def app_name(module: Optional[str]) -> Optional[str]:
+        app_config = apps.get_containing_app_config(module) if module else None
+        return app_config.name if app_config else None
+
+    def classify(self, path: str) -> RoutePolicy:
+        """Policy for the view serving path"""
+        policy = self._by_path.get(path)
+        if policy is not None:
+            return policy
+
+        try:
+            match = get_resolver(self.urlconf).resolve(path)
+        except Resolver404:
+            policy = self.default
+        else:
+            policy = self._by_view.get(match.func)
+            if policy is None:
+                policy = self.policy_for_view(match.func, match.view_name)
+
+        with self._lock:
+            self._by_path[path] = policy
+            while len(self._by_path) > self.cache_size:
+                self._by_path.popitem(last=False)
+        return policy
+
+
+route_classifier = SimpleLazyObject(RouteClassifier.from_settings)
+
+
+def get_route_policy(request: HttpRequest) -> RoutePolicy:
+    """Route policy for request, classified once per request"""
+    policy = getattr(request, "route_policy", None)
+    if policy is None:
+        policy = route_classifier.classify(request.path_info)
+        request.route_policy = policy
+    return policy
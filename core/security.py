@@ -2,25 +2,79 @@
 
 import base64
 import hashlib
+import hmac
 import logging
-from typing import Any, Dict, Optional, Union
-from cryptography.fernet import Fernet
+import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Union
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from django.conf import settings
 from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+from .metrics import observe_cache
+from .timing import timed
 from datetime import datetime, timedelta
 import json
 
 logger = logging.getLogger("theracare.security")
 
+# Ciphertext formats:
+#   v1 - base64(Fernet token), written by the original implementation
+#   v2 - "v2:" + Fernet token, the token is already urlsafe base64
+CIPHERTEXT_V2_PREFIX = "v2:"
+FERNET_TOKEN_PREFIX = "gAAAAA"
+LEGACY_TOKEN_PREFIX = "Z0FBQUFB"  # base64 of FERNET_TOKEN_PREFIX
+# Fernet token bytes besides the ciphertext: version, timestamp, IV, HMAC
+FERNET_OVERHEAD = 1 + 8 + 16 + 32
+FERNET_MIN_LENGTH = FERNET_OVERHEAD + 16
+
+# Encrypted columns per model, used by the PHI maintenance commands
+ENCRYPTED_MODEL_FIELDS = {
+    "appointments.Appointment": ["_notes", "_chief_complaint", "_internal_notes"],
+    "appointments.AppointmentReminder": ["_message_content"],
+    "users.UserProfile": [
+        "street_address",
+        "city",
+        "zip_code",
+        "emergency_contact_name",
+        "emergency_contact_phone",
+        "emergency_contact_relationship",
+    ],
+}
+
+
+@lru_cache(maxsize=8)
+def derive_fernet_key(key_string: str) -> bytes:
+    """Derive a Fernet key from a key string, cached for the process lifetime"""
+    # Derive key from password using PBKDF2
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=b"theracare_salt",  # In production, use a random salt
+        iterations=100000,
+    )
+    return base64.urlsafe_b64encode(kdf.derive(key_string.encode()))
+
 
 class HIPAAEncryption:
     """HIPAA-compliant encryption utility class"""
 
     def __init__(self):
         self.encryption_key = self._get_encryption_key()
-        self.fernet = Fernet(self.encryption_key)
+        self.primary_fernet = Fernet(self.encryption_key)
+        # Current key first; retired keys are only used to decrypt
+        self.fernet = MultiFernet(
+            [self.primary_fernet]
+            + [Fernet(key) for key in self._get_retired_encryption_keys()]
+        )
+        self.ciphertext_format = getattr(settings, "HIPAA_SETTINGS", {}).get(
+            "CIPHERTEXT_FORMAT", "v1"
+        )
 
     def _get_encryption_key(self) -> bytes:
         """Generate or retrieve encryption key"""
@@ -28,43 +82,181 @@ class HIPAAEncryption:
         if not key_string:
             raise ValueError("ENCRYPTION_KEY not found in HIPAA_SETTINGS")
 
-        # Derive key from password using PBKDF2
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=b"theracare_salt",  # In production, use a random salt
-            iterations=100000,
+        return self._derive_key(key_string)
+
+    def _get_retired_encryption_keys(self) -> List[bytes]:
+        """Derive keys that may still protect existing rows"""
+        key_strings = getattr(settings, "HIPAA_SETTINGS", {}).get(
+            "RETIRED_ENCRYPTION_KEYS", []
         )
-        key = base64.urlsafe_b64encode(kdf.derive(key_string.encode()))
-        return key
+        return [self._derive_key(key_string) for key_string in key_strings]
+
+    @staticmethod
+    def _derive_key(key_string: str) -> bytes:
+        """Derive a Fernet key from a key string"""
+        return derive_fernet_key(key_string)
 
+    @timed("crypto")
     def encrypt(self, data: Union[str, Dict[str, Any]]) -> str:
         """Encrypt sensitive data"""
         try:
-            if isinstance(data, dict):
-                data = json.dumps(data)
-
-            if isinstance(data, str):
-                data = data.encode("utf-8")
-
-            encrypted_data = self.fernet.encrypt(data)
-            return base64.urlsafe_b64encode(encrypted_data).decode("utf-8")
+            return self._encrypt_one(data)
 
         except Exception as e:
             logger.error(f"Encryption error: {str(e)}")
             raise
 
+    @timed("crypto")
     def decrypt(self, encrypted_data: str) -> str:
         """Decrypt sensitive data"""
         try:
-            decoded_data = base64.urlsafe_b64decode(encrypted_data.encode("utf-8"))
-            decrypted_data = self.fernet.decrypt(decoded_data)
-            return decrypted_data.decode("utf-8")
+            return self._decrypt_one(encrypted_data)
 
         except Exception as e:
             logger.error(f"Decryption error: {str(e)}")
             raise
 
+    @timed("crypto")
+    def encrypt_many(
+        self,
+        values: Iterable[Union[str, Dict[str, Any]]],
+        max_workers: Optional[int] = None,
+    ) -> List[str]:
+        """Encrypt a batch of values, preserving order"""
+        values = list(values)
+        try:
+            return self._map(self._encrypt_one, values, max_workers)
+        except Exception as e:
+            logger.error(f"Batch encryption error ({len(values)} values): {str(e)}")
+            raise
+
+    @timed("crypto")
+    def decrypt_many(
+        self, encrypted_values: Iterable[str], max_workers: Optional[int] = None
+    ) -> List[str]:
+        """Decrypt a batch of values, preserving order"""
+        encrypted_values = list(encrypted_values)
+        try:
+            return self._map(self._decrypt_one, encrypted_values, max_workers)
+        except Exception as e:
+            logger.error(
+                f"Batch decryption error ({len(encrypted_values)} values): {str(e)}"
+            )
+            raise
+
+    def _encrypt_one(self, data: Union[str, Dict[str, Any]]) -> str:
+        """Encrypt a single value without per-call logging"""
+        if isinstance(data, dict):
+            data = json.dumps(data)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        token = self.fernet.encrypt(data)
+        if self.ciphertext_format == "v1":
+            return base64.urlsafe_b64encode(token).decode("utf-8")
+        return CIPHERTEXT_V2_PREFIX + token.decode("ascii")
+
+    def _decrypt_one(self, encrypted_data: str) -> str:
+        """Decrypt a single value without per-call logging"""
+        return self.fernet.decrypt(self._extract_token(encrypted_data)).decode("utf-8")
+
+    @staticmethod
+    def _extract_token(encrypted_data: str) -> bytes:
+        """Return the raw Fernet token from any supported ciphertext format"""
+        if encrypted_data.startswith(CIPHERTEXT_V2_PREFIX):
+            return encrypted_data[len(CIPHERTEXT_V2_PREFIX) :].encode("ascii")
+        if encrypted_data.startswith(FERNET_TOKEN_PREFIX):
+            # Bare tokens written by older scripts
+            return encrypted_data.encode("ascii")
+        return base64.urlsafe_b64decode(encrypted_data.encode("utf-8"))
+
+    @staticmethod
+    def is_fernet_token(token: bytes) -> bool:
+        """Whether token has the structure of a Fernet token (without the key)"""
+        try:
+            data = base64.urlsafe_b64decode(token)
+        except (ValueError, TypeError):
+            return False
+        # Version byte, timestamp, IV, AES-CBC blocks and HMAC
+        return (
+            len(data) >= FERNET_MIN_LENGTH
+            and data[0] == 0x80
+            and (len(data) - FERNET_OVERHEAD) % 16 == 0
+        )
+
+    @staticmethod
+    def ciphertext_version(value: Optional[str]) -> Optional[int]:
+        """
+        Return the ciphertext format version of value, or None if plaintext.
+        The token is parsed, so plaintext that merely starts like ciphertext
+        (e.g. "v2:...") is not mistaken for it.
+        """
+        if not value or not isinstance(value, str):
+            return None
+        if value.startswith(CIPHERTEXT_V2_PREFIX):
+            version = 2
+        elif value.startswith(LEGACY_TOKEN_PREFIX) or value.startswith(
+            FERNET_TOKEN_PREFIX
+        ):
+            version = 1
+        else:
+            return None
+        try:
+            token = HIPAAEncryption._extract_token(value)
+        except (ValueError, TypeError, UnicodeError):
+            return None
+        return version if HIPAAEncryption.is_fernet_token(token) else None
+
+    def is_encrypted(self, value: Optional[str]) -> bool:
+        """Check whether value is ciphertext in any supported format"""
+        return self.ciphertext_version(value) is not None
+
+    def upgrade_ciphertext(self, encrypted_data: str) -> str:
+        """
+        Rewrite a legacy ciphertext in the v2 format.
+
+        The Fernet token is carried over unchanged, so no decryption is needed.
+        """
+        if self.ciphertext_version(encrypted_data) != 1:
+            return encrypted_data
+        token = self._extract_token(encrypted_data)
+        if not token.startswith(FERNET_TOKEN_PREFIX.encode("ascii")):
+            raise ValueError("Value is not a Fernet token")
+        return CIPHERTEXT_V2_PREFIX + token.decode("ascii")
+
+    @staticmethod
+    def _map(func, values: List[Any], max_workers: Optional[int]) -> List[Any]:
+        """Apply func to values, optionally across a thread pool"""
+        if max_workers is None:
+            max_workers = getattr(settings, "HIPAA_SETTINGS", {}).get(
+                "BATCH_CRYPTO_WORKERS", 0
+            )
+        # Thread start-up only pays off for reasonably large batches
+        if not max_workers or max_workers < 2 or len(values) < 2 * max_workers:
+            return [func(value) for value in values]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(func, values))
+
+    def rotate_ciphertext(self, encrypted_data: str) -> str:
+        """
+        Re-encrypt a value under the current key.
+
+        Values already encrypted with the current key in the configured format
+        are returned unchanged so that callers can skip the write.
+        """
+        token = self._extract_token(encrypted_data)
+        target_version = 1 if self.ciphertext_format == "v1" else 2
+        if self.ciphertext_version(encrypted_data) == target_version:
+            try:
+                self.primary_fernet.decrypt(token)
+                return encrypted_data
+            except InvalidToken:
+                pass
+
+        rotated = self.fernet.rotate(token)
+        if self.ciphertext_format == "v1":
+            return base64.urlsafe_b64encode(rotated).decode("utf-8")
+        return CIPHERTEXT_V2_PREFIX + rotated.decode("ascii")
+
     def decrypt_json(self, encrypted_data: str) -> Dict[str, Any]:
         """Decrypt and parse JSON data"""
         decrypted_string = self.decrypt(encrypted_data)
@@ -180,6 +372,76 @@ class AccessLogging:
         audit_logger.warning(f"FAILED_ACCESS: {json.dumps(log_data)}")
 
 
+class BlindIndex:
+    """
+    Keyed HMAC tokens that allow equality lookups on sensitive values
+    without storing or comparing the values themselves.
+    """
+
+    TOKEN_LENGTH = 32  # hex characters kept from the HMAC digest
+    MIN_PREFIX_LENGTH = 2
+    MAX_PREFIX_LENGTH = 20
+
+    @staticmethod
+    @lru_cache(maxsize=4)
+    def _get_key(key_string: str) -> bytes:
+        """Derive the index key, separate from the encryption key"""
+        return hmac.new(
+            key_string.encode("utf-8"), b"theracare-blind-index", hashlib.sha256
+        ).digest()
+
+    @staticmethod
+    def get_key() -> bytes:
+        """Get the blind index key from settings"""
+        hipaa_settings = getattr(settings, "HIPAA_SETTINGS", {})
+        key_string = hipaa_settings.get("BLIND_INDEX_KEY") or hipaa_settings.get(
+            "ENCRYPTION_KEY"
+        )
+        if not key_string:
+            raise ValueError("BLIND_INDEX_KEY not found in HIPAA_SETTINGS")
+        return BlindIndex._get_key(key_string)
+
+    @staticmethod
+    def normalize(value: Optional[str], kind: str = "text") -> str:
+        """Normalize a value so that equivalent spellings share a token"""
+        if not value:
+            return ""
+        if kind == "phone":
+            return re.sub(r"[^\d]", "", value)
+        return " ".join(value.lower().split())
+
+    @staticmethod
+    def token(scope: str, normalized_value: str) -> str:
+        """HMAC an already-normalized value within a scope (e.g. a field name)"""
+        message = f"{scope}:{normalized_value}".encode("utf-8")
+        digest = hmac.new(BlindIndex.get_key(), message, hashlib.sha256).hexdigest()
+        return digest[: BlindIndex.TOKEN_LENGTH]
+
+    @staticmethod
+    def exact(scope: str, value: Optional[str], kind: str = "text") -> str:
+        """Token for an exact (normalized) match, or "" for empty values"""
+        normalized = BlindIndex.normalize(value, kind)
+        return BlindIndex.token(scope, normalized) if normalized else ""
+
+    @staticmethod
+    def prefix_tokens(scope: str, value: Optional[str]) -> List[str]:
+        """Tokens for every word prefix of value, used for starts-with search"""
+        tokens = set()
+        for word in BlindIndex.normalize(value).split():
+            longest = min(len(word), BlindIndex.MAX_PREFIX_LENGTH)
+            for length in range(BlindIndex.MIN_PREFIX_LENGTH, longest + 1):
+                tokens.add(BlindIndex.token(f"{scope}:prefix", word[:length]))
+        return sorted(tokens)
+
+    @staticmethod
+    def search_token(scope: str, term: str) -> Optional[str]:
+        """Token matching words in scope that start with term"""
+        word = BlindIndex.normalize(term)[: BlindIndex.MAX_PREFIX_LENGTH]
+        if len(word) < BlindIndex.MIN_PREFIX_LENGTH or " " in word:
+            return None
+        return BlindIndex.token(f"{scope}:prefix", word)
+
+
 class DataMasking:
     """Data masking utilities for HIPAA compliance"""
 
@@ -218,8 +480,56 @@ class DataMasking:
         return "*** ***"
 
 
-# Initialize encryption instance
-encryption = HIPAAEncryption()
+_decryption_memo: ContextVar[Optional[OrderedDict]] = ContextVar(
+    "decryption_memo", default=None
+)
+
+
+class DecryptionMemo:
+    """Bounded, request-scoped memo of decrypted values keyed by ciphertext"""
+
+    @staticmethod
+    def get_max_size() -> int:
+        """Get memo size from settings"""
+        return getattr(settings, "HIPAA_SETTINGS", {}).get("DECRYPTION_MEMO_SIZE", 512)
+
+    @staticmethod
+    def start():
+        """Open a memo for the current request; returns a token for end()"""
+        return _decryption_memo.set(OrderedDict())
+
+    @staticmethod
+    def end(token) -> None:
+        """Discard the memo opened by start()"""
+        _decryption_memo.reset(token)
+
+    @staticmethod
+    def get(encrypted_value: str) -> Optional[str]:
+        """Return a memoized plaintext, or None"""
+        memo = _decryption_memo.get()
+        if memo is None:
+            return None
+        value = memo.get(encrypted_value)
+        if value is not None:
+            memo.move_to_end(encrypted_value)
+        observe_cache("decryption_memo", value is not None)
+        return value
+
+    @staticmethod
+    def put(encrypted_value: str, value: str) -> None:
+        """Memoize a plaintext, evicting the least recently used entry"""
+        memo = _decryption_memo.get()
+        if memo is None:
+            return
+        memo[encrypted_value] = value
+        memo.move_to_end(encrypted_value)
+        if len(memo) > DecryptionMemo.get_max_size():
+            memo.popitem(last=False)
+
+
+# Encryption instance, initialized on first use so that importing this module
+# does not pay for key derivation
+encryption = SimpleLazyObject(HIPAAEncryption)
 
 
 # Convenience functions for model field encryption
@@ -238,10 +548,87 @@ def decrypt_field(encrypted_value: str) -> str:
     """Decrypt a field value from database"""
     if not encrypted_value:
         return encrypted_value
+    memoized = DecryptionMemo.get(encrypted_value)
+    if memoized is not None:
+        return memoized
     try:
-        return encryption.decrypt(encrypted_value)
+        value = encryption.decrypt(encrypted_value)
+        DecryptionMemo.put(encrypted_value, value)
+        return value
     except Exception as e:
         logger.error(
             f"Field decryption error: {str(e)} - This likely means the ENCRYPTION_KEY has changed or is different between environments"
         )
         return "[Message could not be decrypted - encryption key mismatch]"  # Clear error message instead of gibberish
+
+
+def encrypt_fields(values: Iterable[str]) -> List[str]:
+    """Encrypt a batch of field values; empty values are passed through"""
+    values = list(values)
+    positions = [i for i, value in enumerate(values) if value]
+    if not positions:
+        return values
+    try:
+        encrypted = encryption.encrypt_many(values[i] for i in positions)
+    except Exception as e:
+        logger.error(f"Field encryption error: {str(e)}")
+        return values  # Return original values if encryption fails
+    result = list(values)
+    for i, value in zip(positions, encrypted):
+        result[i] = value
+    return result
+
+
+def decrypt_fields(encrypted_values: Iterable[str]) -> List[str]:
+    """Decrypt a batch of field values; empty values are passed through"""
+    result = list(encrypted_values)
+    positions = []
+    for i, value in enumerate(result):
+        if not value:
+            continue
+        memoized = DecryptionMemo.get(value)
+        if memoized is not None:
+            result[i] = memoized
+        else:
+            positions.append(i)
+    if not positions:
+        return result
+    try:
+        decrypted = encryption.decrypt_many(result[i] for i in positions)
+        for i, value in zip(positions, decrypted):
+            DecryptionMemo.put(result[i], value)
+    except Exception:
+        # Fall back to per-value decryption so one bad value does not
+        # blank out the whole batch
+        decrypted = [decrypt_field(result[i]) for i in positions]
+    for i, value in zip(positions, decrypted):
+        result[i] = value
+    return result
+
+
+def encrypted_property(column_name: str) -> property:
+    """
+    Model property exposing the plaintext of an encrypted column.
+
+    The plaintext is cached on the instance and reused for as long as the
+    column still holds the ciphertext it was decrypted from, so repeated
+    reads decrypt at most once. Assigning through the property (or to the
+    column directly, e.g. via refresh_from_db) invalidates the cache.
+    """
+    cache_attr = f"_plaintext_cache{column_name}"
+
+    def getter(instance):
+        ciphertext = getattr(instance, column_name)
+        cached = instance.__dict__.get(cache_attr)
+        if cached is not None and cached[0] == ciphertext:
+            return cached[1]
+        value = decrypt_field(ciphertext) if ciphertext else ""
+        instance.__dict__[cache_attr] = (ciphertext, value)
+        return value
+
+    def setter(instance, value):
+        ciphertext = encrypt_field(value) if value else None
+        setattr(instance, column_name, ciphertext)
+        instance.__dict__[cache_attr] = (ciphertext, value or "")
+
+    return property(getter, setter)
@@ -0,0 +1,69 @@
+# backend/core/serializers.py
+"""
+Shared serializer helpers for TheraCare API.
+"""
+
+from django.db import models
+from rest_framework import serializers
+from .security import decrypt_field, decrypt_fields
+
+
+class BatchDecryptListSerializer(serializers.ListSerializer):
+    """
+    List serializer that decrypts the encrypted columns of a whole page
+    in one pass before the child serializer renders each row.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        instances = list(iterable)
+
+        encrypted_fields = self.child.get_encrypted_fields()
+        sources = list(encrypted_fields.values())
+        ciphertexts = [
+            getattr(instance, source) for instance in instances for source in sources
+        ]
+        plaintexts = iter(decrypt_fields(ciphertexts))
+
+        for instance in instances:
+            instance._batch_decrypted = {
+                name: next(plaintexts) or "" for name in encrypted_fields
+            }
+
+        return super().to_representation(instances)
+
+
+class BatchDecryptMixin:
+    """
+    Serializer mixin for models that store encrypted columns.
+
+    Declare ``Meta.encrypted_fields`` as a mapping of output field name to
+    the model attribute holding the ciphertext, e.g.
+    ``{"notes": "_notes"}``, and set ``Meta.list_serializer_class`` to
+    ``BatchDecryptListSerializer`` so that with ``many=True`` all ciphertexts
+    on the page are decrypted together. A single instance falls back to
+    ``decrypt_field``.
+
+    Only names the serializer also declares in its fields are decrypted, so
+    ``encrypted_fields`` never adds PHI to a response.
+    """
+
+    def get_encrypted_fields(self):
+        """Return the output name -> ciphertext attribute mapping"""
+        return {
+            name: source
+            for name, source in getattr(self.Meta, "encrypted_fields", {}).items()
+            if name in self.fields
+        }
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        decrypted = getattr(instance, "_batch_decrypted", None)
+
+        for name, source in self.get_encrypted_fields().items():
+            if decrypted is not None and name in decrypted:
+                data[name] = decrypted[name]
+            else:
+                data[name] = decrypt_field(getattr(instance, source, None)) or ""
+
+        return data
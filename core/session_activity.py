@@ -0,0 +1,187 @@
+# backend/core/session_activity.py
+"""
+Write-behind tracking of session activity for idle-timeout enforcement.
+
+Activity is recorded in process memory on every request and written to the
+cache (the same ``session_activity_<key>`` entries SessionSecurity uses) at
+most once per SESSION_ACTIVITY_GRANULARITY seconds per session, in batches
+from a background thread. The stored timestamp therefore lags the true last
+activity by at most granularity + flush interval, and a session's final
+activity is still written once that time has passed, so idle timeouts stay
+accurate while chatty clients cause one write per granularity window
+instead of one per request.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+from .metrics import observe_cache
+from .security import SessionSecurity
+
+logger = logging.getLogger("theracare.security")
+
+ACTIVITY_CACHE_TIMEOUT = 3600
+
+
+def activity_cache_key(session_key: str) -> str:
+    return f"session_activity_{session_key}"
+
+
+class _Entry:
+    __slots__ = ("last_seen", "persisted")
+
+    def __init__(self, last_seen: Optional[datetime], persisted: Optional[datetime]):
+        # Latest activity known to this process (local or read from cache)
+        self.last_seen = last_seen
+        # Value this process last wrote to or read from the cache
+        self.persisted = persisted
+
+
+class SessionActivityTracker:
+    """In-process session activity map flushed to the cache in batches"""
+
+    def __init__(
+        self,
+        granularity: float = 60,
+        flush_interval: float = 5,
+        max_sessions: int = 50000,
+    ):
+        self.granularity = timedelta(seconds=granularity)
+        self.flush_interval = flush_interval
+        self.max_sessions = max_sessions
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._evicted: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    @classmethod
+    def from_settings(cls) -> "SessionActivityTracker":
+        hipaa_settings = getattr(settings, "HIPAA_SETTINGS", {})
+        return cls(
+            granularity=hipaa_settings.get("SESSION_ACTIVITY_GRANULARITY", 60),
+            flush_interval=hipaa_settings.get("SESSION_ACTIVITY_FLUSH_INTERVAL", 5),
+        )
+
+    def touch(self, session_key: str) -> None:
+        """Record activity now; no cache I/O"""
+        self._ensure_started()
+        now = datetime.now()
+        with self._lock:
+            entry = self._entries.pop(session_key, None) or _Entry(None, None)
+            entry.last_seen = now
+            self._entries[session_key] = entry
+            while len(self._entries) > self.max_sessions:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                if self._is_dirty(evicted):
+                    self._evicted[evicted_key] = evicted.last_seen
+
+    def forget(self, session_key: str) -> None:
+        """Drop a session, e.g. after it was flushed for expiring"""
+        with self._lock:
+            self._entries.pop(session_key, None)
+            self._evicted.pop(session_key, None)
+
+    def is_expired(self, session_key: str) -> bool:
+        """Idle-timeout check; reads the cache only when memory cannot decide"""
+        last_seen = self._fresh_last_seen(session_key)
+        observe_cache("session_activity", last_seen is not None)
+        if last_seen is not None:
+            return False
+        return self._record_stored(
+            session_key, cache.get(activity_cache_key(session_key))
+        )
+
+    async def ais_expired(self, session_key: str) -> bool:
+        """Async version of is_expired"""
+        last_seen = self._fresh_last_seen(session_key)
+        observe_cache("session_activity", last_seen is not None)
+        if last_seen is not None:
+            return False
+        stored = await cache.aget(activity_cache_key(session_key))
+        return self._record_stored(session_key, stored)
+
+    def _fresh_last_seen(self, session_key: str) -> Optional[datetime]:
+        """Last activity if it alone proves the session is not idle"""
+        with self._lock:
+            entry = self._entries.get(session_key)
+        if entry is None or entry.last_seen is None:
+            return None
+        if SessionSecurity.is_session_expired(entry.last_seen):
+            return None
+        return entry.last_seen
+
+    def _record_stored(self, session_key: str, stored: Optional[datetime]) -> bool:
+        with self._lock:
+            entry = self._entries.get(session_key)
+            if entry is not None and stored is not None:
+                entry.persisted = stored
+                if entry.last_seen is None or stored > entry.last_seen:
+                    entry.last_seen = stored
+            last_seen = entry.last_seen if entry is not None else stored
+        return last_seen is not None and SessionSecurity.is_session_expired(last_seen)
+
+    def _is_dirty(self, entry: _Entry) -> bool:
+        return entry.last_seen is not None and (
+            entry.persisted is None or entry.last_seen > entry.persisted
+        )
+
+    def collect_due(self) -> Dict[str, datetime]:
+        """Activity values that should be written now, marked as persisted"""
+        now = datetime.now()
+        due = {}
+        with self._lock:
+            for session_key, entry in self._entries.items():
+                if not self._is_dirty(entry):
+                    continue
+                # At most one write per granularity window per session
+                if entry.persisted is None or now - entry.persisted >= self.granularity:
+                    due[activity_cache_key(session_key)] = entry.last_seen
+                    entry.persisted = entry.last_seen
+            for session_key, last_seen in self._evicted.items():
+                due[activity_cache_key(session_key)] = last_seen
+            self._evicted = {}
+        return due
+
+    def flush(self) -> int:
+        """Write due activity to the cache in one batch"""
+        due = self.collect_due()
+        if due:
+            try:
+                cache.set_many(due, timeout=ACTIVITY_CACHE_TIMEOUT)
+            except Exception as e:
+                logger.error(f"Session activity flush failed: {str(e)}")
+        return len(due)
+
+    def _ensure_started(self) -> None:
+        # A forked worker inherits the map but not the flusher thread
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name="session-activity", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Session activity tracker error: {str(e)}")
+
+
+session_activity = SimpleLazyObject(SessionActivityTracker.from_settings)
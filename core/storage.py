@@ -0,0 +1,428 @@
+# backend/core/storage.py
+"""
+Encrypted file storage for PHI documents.
+
+Files are written as a 16-byte header followed by fixed-size AES-GCM chunks,
+so uploads are encrypted while streaming to disk and any byte range can be
+decrypted by reading only the chunks that cover it:
+
+    header  = b"TCE1" | chunk_size (uint32) | nonce prefix (8 bytes)
+    chunk i = AES-GCM(plaintext[i], nonce = prefix | i,
+                      aad = header | i | is_last)
+
+Binding the chunk index and the last-chunk flag into the AAD means chunks
+cannot be reordered, dropped or truncated without failing authentication.
+Files without the header are treated as legacy plaintext.
+"""
+
+import base64
+import errno
+import io
+import os
+import shutil
+import struct
+import tempfile
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.utils.deconstruct import deconstructible
+from .security import derive_fernet_key
+
+MAGIC = b"TCE1"
+HEADER_SIZE = 16
+TAG_SIZE = 16
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class EncryptedFileError(Exception):
+    """Raised when an encrypted file cannot be authenticated"""
+
+
+@lru_cache(maxsize=8)
+def _derive_file_key(key_string: str) -> bytes:
+    """Derive an AES-256 file key from a key string"""
+    master = base64.urlsafe_b64decode(derive_fernet_key(key_string))
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=b"theracare-file-encryption",
+    ).derive(master)
+
+
+def get_file_keys() -> List[bytes]:
+    """File keys for the current ENCRYPTION_KEY followed by retired keys"""
+    hipaa_settings = getattr(settings, "HIPAA_SETTINGS", {})
+    key_strings = [hipaa_settings.get("ENCRYPTION_KEY")]
+    key_strings += hipaa_settings.get("RETIRED_ENCRYPTION_KEYS", [])
+    if not key_strings[0]:
+        raise ValueError("ENCRYPTION_KEY not found in HIPAA_SETTINGS")
+    return [_derive_file_key(key_string) for key_string in key_strings]
+
+
+def _chunk_aad(header: bytes, index: int, is_last: bool) -> bytes:
+    return header + struct.pack(">I?", index, is_last)
+
+
+def _chunk_nonce(header: bytes, index: int) -> bytes:
+    return header[8:16] + struct.pack(">I", index)
+
+
+class StreamEncryptor:
+    """
+    Push-style encryptor: plaintext is written in pieces of any size and
+    sealed into fh one chunk at a time. Memory use is bounded by chunk_size.
+    """
+
+    def __init__(self, fh, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.fh = fh
+        self.chunk_size = chunk_size
+        self.header = MAGIC + struct.pack(">I", chunk_size) + os.urandom(8)
+        self.aead = AESGCM(get_file_keys()[0])
+        self.buffer = bytearray()
+        self.index = 0
+        self.total = 0
+        fh.write(self.header)
+
+    def _seal(self, plaintext: bytes, is_last: bool) -> None:
+        self.fh.write(
+            self.aead.encrypt(
+                _chunk_nonce(self.header, self.index),
+                plaintext,
+                _chunk_aad(self.header, self.index, is_last),
+            )
+        )
+        self.index += 1
+
+    def write(self, data: bytes) -> None:
+        self.buffer.extend(data)
+        self.total += len(data)
+        # Keep at least one full chunk buffered so the last chunk is known
+        while len(self.buffer) > self.chunk_size:
+            plaintext = bytes(self.buffer[: self.chunk_size])
+            del self.buffer[: self.chunk_size]
+            self._seal(plaintext, False)
+
+    def finish(self) -> int:
+        """Seal the last chunk; returns the number of plaintext bytes"""
+        self._seal(bytes(self.buffer), True)
+        self.buffer = bytearray()
+        return self.total
+
+
+def encrypt_stream(chunks, fh, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Encrypt an iterable of byte strings into fh chunk by chunk.
+
+    Memory use is bounded by chunk_size regardless of the input size.
+    Returns the number of plaintext bytes written.
+    """
+    encryptor = StreamEncryptor(fh, chunk_size)
+    for data in chunks:
+        encryptor.write(data)
+    return encryptor.finish()
+
+
+class EncryptedFileReader:
+    """Random-access, chunk-wise decrypting reader for an encrypted file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "rb")
+        self.header = self.file.read(HEADER_SIZE)
+        self.encrypted = len(self.header) == HEADER_SIZE and self.header[:4] == MAGIC
+        stored_size = os.fstat(self.file.fileno()).st_size
+
+        if not self.encrypted:
+            self.size = stored_size
+            self.chunk_size = DEFAULT_CHUNK_SIZE
+            return
+
+        self.chunk_size = struct.unpack(">I", self.header[4:8])[0]
+        stored_chunk = self.chunk_size + TAG_SIZE
+        body_size = stored_size - HEADER_SIZE
+        self.chunk_count = max(1, -(-body_size // stored_chunk))
+        self.size = body_size - self.chunk_count * TAG_SIZE
+        self._aead = None
+        # Last chunk decrypted, for sequential reads smaller than a chunk
+        self._cached: Tuple[int, bytes] = (-1, b"")
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _read_chunk(self, index: int) -> bytes:
+        if self._cached[0] == index:
+            return self._cached[1]
+        plaintext = self._decrypt_chunk(index)
+        self._cached = (index, plaintext)
+        return plaintext
+
+    def _decrypt_chunk(self, index: int) -> bytes:
+        stored_chunk = self.chunk_size + TAG_SIZE
+        self.file.seek(HEADER_SIZE + index * stored_chunk)
+        ciphertext = self.file.read(stored_chunk)
+        is_last = index == self.chunk_count - 1
+        nonce = _chunk_nonce(self.header, index)
+        aad = _chunk_aad(self.header, index, is_last)
+
+        if self._aead is not None:
+            return self._aead.decrypt(nonce, ciphertext, aad)
+
+        # First chunk read: find which key (current or retired) wrote the file
+        for key in get_file_keys():
+            aead = AESGCM(key)
+            try:
+                plaintext = aead.decrypt(nonce, ciphertext, aad)
+            except InvalidTag:
+                continue
+            self._aead = aead
+            return plaintext
+        raise EncryptedFileError(f"Could not authenticate {self.path}")
+
+    def iter_range(self, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Yield plaintext bytes from start to end (inclusive)"""
+        if end is None or end >= self.size:
+            end = self.size - 1
+        if start > end:
+            return
+
+        if not self.encrypted:
+            self.file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = self.file.read(min(self.chunk_size, remaining))
+                if not data:
+                    return
+                remaining -= len(data)
+                yield data
+            return
+
+        try:
+            for index in range(start // self.chunk_size, end // self.chunk_size + 1):
+                plaintext = self._read_chunk(index)
+                chunk_start = index * self.chunk_size
+                low = max(start - chunk_start, 0)
+                high = min(end - chunk_start + 1, len(plaintext))
+                yield plaintext[low:high]
+        except InvalidTag as e:
+            raise EncryptedFileError(f"Could not authenticate {self.path}") from e
+
+    def read(self) -> bytes:
+        return b"".join(self.iter_range())
+
+
+class DecryptedStream(io.RawIOBase):
+    """Seekable, read-only plaintext view of an EncryptedFileReader"""
+
+    def __init__(self, reader: EncryptedFileReader):
+        self.reader = reader
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.reader.size
+        if offset < 0:
+            raise ValueError("Negative seek position")
+        self.position = offset
+        return offset
+
+    def readinto(self, buffer) -> int:
+        if self.position >= self.reader.size:
+            return 0
+        end = min(self.position + len(buffer), self.reader.size) - 1
+        data = b"".join(self.reader.iter_range(self.position, end))
+        buffer[: len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            self.reader.close()
+        super().close()
+
+
+def open_stream(reader: EncryptedFileReader) -> io.BufferedReader:
+    """Buffered plaintext stream over reader, decrypting one chunk per read"""
+    return io.BufferedReader(DecryptedStream(reader), buffer_size=reader.chunk_size)
+
+
+class EncryptedUploadedFile(UploadedFile):
+    """
+    Upload encrypted while it is received (see EncryptedFileUploadHandler).
+    The ciphertext sits in a temporary file that EncryptedFileSystemStorage
+    moves into place; reading the object yields plaintext, chunk by chunk.
+    """
+
+    def __init__(self, name, content_type, size, charset, content_type_extra=None):
+        _, ext = os.path.splitext(name)
+        fd, self.encrypted_path = tempfile.mkstemp(
+            suffix=".upload" + ext + ".enc", dir=settings.FILE_UPLOAD_TEMP_DIR
+        )
+        self._ciphertext = os.fdopen(fd, "wb")
+        self._encryptor = StreamEncryptor(self._ciphertext)
+        super().__init__(None, name, content_type, size, charset, content_type_extra)
+
+    def write_chunk(self, data: bytes) -> None:
+        self._encryptor.write(data)
+
+    def finish(self) -> None:
+        self.size = self._encryptor.finish()
+        self._ciphertext.close()
+        self.file = open_stream(EncryptedFileReader(self.encrypted_path))
+
+    def close(self):
+        try:
+            if self.file is not None:
+                self.file.close()
+            if not self._ciphertext.closed:
+                self._ciphertext.close()
+        finally:
+            try:
+                os.remove(self.encrypted_path)
+            except FileNotFoundError:
+                # Already moved into storage
+                pass
+
+
+class EncryptedFileUploadHandler(FileUploadHandler):
+    """
+    Upload handler that encrypts file data chunk by chunk as it arrives, so
+    plaintext is never buffered whole in memory nor written to a temporary
+    file
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = EncryptedUploadedFile(
+            self.file_name, self.content_type, 0, self.charset, self.content_type_extra
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        self.file.write_chunk(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.finish()
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, "file"):
+            self.file.close()
+
+
+@deconstructible
+class EncryptedFileSystemStorage(FileSystemStorage):
+    """FileSystemStorage that encrypts files at rest in authenticated chunks"""
+
+    def __init__(self, *args, chunk_size: int = DEFAULT_CHUNK_SIZE, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.chunk_size = chunk_size
+
+    def _save(self, name, content):
+        full_path = self.path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+        while True:
+            try:
+                fd = os.open(
+                    full_path,
+                    os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0),
+                    0o600,
+                )
+            except FileExistsError:
+                # A new name is needed if the file was created concurrently
+                name = self.get_available_name(name)
+                full_path = self.path(name)
+                continue
+
+            try:
+                with os.fdopen(fd, "wb") as fh:
+                    if isinstance(content, EncryptedUploadedFile):
+                        # Already encrypted on arrival; copy the ciphertext
+                        with open(content.encrypted_path, "rb") as source:
+                            shutil.copyfileobj(source, fh)
+                    else:
+                        if hasattr(content, "seek"):
+                            content.seek(0)
+                        encrypt_stream(content.chunks(), fh, self.chunk_size)
+            except BaseException:
+                try:
+                    os.remove(full_path)
+                except OSError as e:
+                    if e.errno != errno.ENOENT:
+                        raise
+                raise
+            break
+
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+
+        return str(name).replace("\\", "/")
+
+    def open_decrypted(self, name) -> EncryptedFileReader:
+        """Open a stored file for streaming, range-capable decryption"""
+        return EncryptedFileReader(self.path(name))
+
+    def _open(self, name, mode="rb"):
+        reader = self.open_decrypted(name)
+        file = File(open_stream(reader), name=name)
+        file.size = reader.size
+        return file
+
+    def size(self, name) -> int:
+        """Plaintext size of a stored file"""
+        with self.open_decrypted(name) as reader:
+            return reader.size
+
+
+def parse_range_header(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single ``bytes=`` range against a resource of the given size.
+
+    Returns (start, end) inclusive, None when the header is absent or not a
+    single byte range, and raises ValueError for unsatisfiable ranges.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_text, _, end_text = header[len("bytes=") :].strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            # Suffix range: the last N bytes
+            length = int(end_text)
+            if length <= 0:
+                raise ValueError("Empty suffix range")
+            start = max(size - length, 0)
+            end = size - 1
+    except ValueError:
+        raise ValueError(f"Invalid range: {header}")
+
+    if start >= size or start > end:
+        raise ValueError(f"Unsatisfiable range: {header}")
+    return start, min(end, size - 1)
@@ -0,0 +1,61 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+from core.management.commands.benchmark_phi import SOAP_NOTE, Command
+
+
+class BenchmarkPHITests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.baseline = os.path.join(root, "baseline.json")
+
+    def run_benchmark(self, *args):
+        stdout = StringIO()
+        call_command(
+            "benchmark_phi",
+            "--iterations",
+            "10",
+            "--baseline",
+            self.baseline,
+            *args,
+            stdout=stdout,
+        )
+        return stdout.getvalue()
+
+    def test_case_filter_and_save_baseline(self):
+        self.run_benchmark("--case", "decrypt_field.", "--save-baseline")
+        with open(self.baseline) as fh:
+            results = json.load(fh)["results"]
+        self.assertEqual(
+            set(results), {"decrypt_field.name", "decrypt_field.soap_note"}
+        )
+        self.assertGreater(results["decrypt_field.name"]["p50_us"], 0)
+
+    def test_serializer_case_decrypts_the_notes(self):
+        command = Command()
+        data = command.serialize_appointment_page(command.build_appointment_page())
+        self.assertEqual(data[0]["notes"], SOAP_NOTE[:1000])
+        self.assertTrue(data[0]["chief_complaint"].startswith("Difficulty sleeping"))
+        output = self.run_benchmark("--case", "serializer")
+        self.assertIn("serializer.appointment_notes_page", output)
+
+    def test_regression_beyond_threshold_fails(self):
+        self.run_benchmark("--case", "encrypt_field.name", "--save-baseline")
+        with open(self.baseline) as fh:
+            baseline = json.load(fh)
+        baseline["results"]["encrypt_field.name"]["p50_us"] /= 1000
+        with open(self.baseline, "w") as fh:
+            json.dump(baseline, fh)
+
+        with self.assertRaisesMessage(CommandError, "encrypt_field.name"):
+            self.run_benchmark("--case", "encrypt_field.name")
+        # A generous threshold lets the same run pass
+        output = self.run_benchmark(
+            "--case", "encrypt_field.name", "--threshold", "100000"
+        )
+        self.assertIn("No regressions", output)
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+from django.test import SimpleTestCase
+from core.health import ReadinessChecker, probe_channel_layer
+
+
+class WedgedChannelLayer:
+    async def new_channel(self):
+        return "probe!1"
+
+    async def send(self, channel, message):
+        pass
+
+    async def receive(self, channel):
+        await asyncio.sleep(60)
+
+
+class ReadinessCheckerTests(SimpleTestCase):
+    def test_stuck_probe_is_not_submitted_again(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        calls = []
+
+        def stuck(timeout):
+            calls.append(timeout)
+            release.wait(5)
+
+        checker = ReadinessChecker(
+            probes={"stuck": stuck, "fine": lambda timeout: None},
+            critical=["stuck"],
+            timeout=0.05,
+            ttl=0,
+        )
+        for _ in range(3):
+            report = checker.check()
+            self.assertEqual(report["status"], "unavailable")
+            self.assertEqual(report["checks"]["stuck"]["status"], "timeout")
+            self.assertEqual(report["checks"]["fine"]["status"], "ok")
+        self.assertEqual(len(calls), 1)
+
+        release.set()
+        checker._futures["stuck"].result(timeout=1)
+        report = checker.check()
+        self.assertEqual(report["status"], "ok")
+        self.assertEqual(len(calls), 2)
+
+    def test_failing_probe_reports_error_type(self):
+        def broken(timeout):
+            raise ConnectionError("db.internal:5432 refused")
+
+        checker = ReadinessChecker(probes={"broken": broken}, critical=[], ttl=0)
+        report = checker.check()
+        self.assertEqual(report["status"], "degraded")
+        self.assertEqual(report["checks"]["broken"]["error"], "ConnectionError")
+
+    def test_channel_layer_probe_times_out(self):
+        started = time.monotonic()
+        with mock.patch(
+            "channels.layers.get_channel_layer", return_value=WedgedChannelLayer()
+        ):
+            with self.assertRaises(asyncio.TimeoutError):
+                probe_channel_layer(0.05)
+        self.assertLess(time.monotonic() - started, 5)
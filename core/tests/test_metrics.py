@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+try:
+    import fakeredis
+    import prometheus_client
+except ImportError:  # pragma: no cover
+    fakeredis = prometheus_client = None
+
+METRICS_URL = "/api/health/metrics"
+
+
+def metrics_settings(**overrides):
+    return override_settings(
+        METRICS_SETTINGS={**settings.METRICS_SETTINGS, **overrides}
+    )
+
+
+class MetricsViewTests(TestCase):
+    def setUp(self):
+        if prometheus_client is None:
+            self.skipTest("prometheus-client is not installed")
+
+    def test_disabled_by_default(self):
+        self.assertFalse(settings.METRICS_SETTINGS["ENABLED"])
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 404)
+
+    @metrics_settings(ENABLED=True, TOKEN="")
+    def test_denied_without_token_or_staff_user(self):
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 401)
+        user = get_user_model().objects.create_user(
+            "metrics", "metrics@example.com", "pw-Metrics-1"
+        )
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 401)
+        user.is_staff = True
+        user.save()
+        response = self.client.get(METRICS_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"theracare_http_requests", response.content)
+
+    @metrics_settings(ENABLED=True, TOKEN="scrape-me")
+    def test_bearer_token(self):
+        response = self.client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer scrape-me")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, 401)
+
+
+@metrics_settings(ENABLED=True)
+class InstrumentedRedisClientTests(TestCase):
+    def setUp(self):
+        if fakeredis is None or prometheus_client is None:
+            self.skipTest("fakeredis and prometheus-client are required")
+        server = fakeredis.FakeServer()
+        caches_setting = {
+            **settings.CACHES,
+            "instrumented": {
+                "BACKEND": "django_redis.cache.RedisCache",
+                "LOCATION": "redis://localhost:6379/0",
+                "OPTIONS": {
+                    "CLIENT_CLASS": "core.cache.InstrumentedRedisClient",
+                    "METRICS_NAME": "instrumented",
+                    "CONNECTION_POOL_KWARGS": {
+                        "connection_class": fakeredis.FakeConnection,
+                        "server": server,
+                    },
+                },
+            },
+        }
+        override = override_settings(CACHES=caches_setting)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.cache = caches["instrumented"]
+
+    def count(self, result):
+        value = prometheus_client.REGISTRY.get_sample_value(
+            "theracare_cache_requests_total",
+            {"cache": "instrumented", "result": result},
+        )
+        return value or 0
+
+    def test_counts_hits_and_misses(self):
+        hits, misses = self.count("hit"), self.count("miss")
+        self.cache.set("a", 1)
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertEqual(self.cache.get("b", "fallback"), "fallback")
+        self.assertEqual(self.cache.get_many(["a", "b", "c"]), {"a": 1})
+        self.assertTrue(self.cache.has_key("a"))
+        self.assertEqual(self.count("hit") - hits, 3)
+        self.assertEqual(self.count("miss") - misses, 3)
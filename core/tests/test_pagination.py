@@ -0,0 +1,92 @@
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from audit.models import AuditLog
+from audit.views import AuditLogViewSet
+
+URL = "/api/audit/logs/"
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_user(
+            "auditor", "auditor@example.com", "pw-Auditor-1", is_staff=True
+        )
+        now = timezone.now()
+        # Three records share one timestamp: pages must split ties by pk
+        timestamps = [now, now, now, now - timedelta(minutes=1), now - timedelta(2)]
+        for i, timestamp in enumerate(timestamps):
+            AuditLog.objects.create(action=f"event-{i}", timestamp=timestamp)
+        cls.expected = [
+            str(pk)
+            for pk in AuditLog.objects.order_by("-timestamp", "-pk").values_list(
+                "pk", flat=True
+            )
+        ]
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.view = AuditLogViewSet.as_view({"get": "list"})
+
+    def get(self, url, **params):
+        request = self.factory.get(url, params)
+        force_authenticate(request, user=self.admin)
+        response = self.view(request)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def ids(self, page):
+        return [log["id"] for log in page["results"]]
+
+    def test_walks_forward_without_gaps_or_repeats(self):
+        page = self.get(URL, pagination="cursor", page_size=2)
+        self.assertEqual(page["count"], 5)
+        self.assertIsNone(page["previous"])
+        seen = self.ids(page)
+        while page["next"]:
+            page = self.get(page["next"])
+            seen += self.ids(page)
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_link_returns_the_earlier_page(self):
+        first = self.get(URL, pagination="cursor", page_size=2)
+        second = self.get(first["next"])
+        self.assertEqual(self.ids(second), self.expected[2:4])
+        back = self.get(second["previous"])
+        self.assertEqual(self.ids(back), self.expected[:2])
+        self.assertIsNotNone(back["next"])
+
+    def test_count_is_optional(self):
+        with CaptureQueriesContext(connection) as queries:
+            page = self.get(URL, pagination="cursor", count="false")
+        self.assertNotIn("count", page)
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_deep_pages_seek_instead_of_offset(self):
+        first = self.get(URL, pagination="cursor", page_size=2)
+        with CaptureQueriesContext(connection) as queries:
+            self.get(first["next"])
+        selects = [
+            query["sql"]
+            for query in queries.captured_queries
+            if 'FROM "audit_auditlog"' in query["sql"] and "COUNT(" not in query["sql"]
+        ]
+        self.assertTrue(selects)
+        self.assertFalse(any("OFFSET" in sql for sql in selects))
+
+    def test_invalid_cursor(self):
+        request = self.factory.get(URL, {"cursor": "not-a-cursor"})
+        force_authenticate(request, user=self.admin)
+        self.assertEqual(self.view(request).status_code, 404)
+
+    def test_page_numbers_remain_the_default(self):
+        page = self.get(URL, page_size=2)
+        self.assertEqual(page["current_page"], 1)
+        self.assertEqual(page["total_pages"], 3)
@@ -0,0 +1,48 @@
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from core.phi import decrypt_value
+from core.security import BlindIndex, encryption
+from users.models import User
+from users.search import matching_user_ids
+
+
+class DoubleEncryptionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("jane", "jane@example.com", "pw")
+        # Fixture as left by the old double-encrypting save()
+        User.objects.filter(pk=self.user.pk).update(
+            first_name=encryption.encrypt(encryption.encrypt("Jane")),
+            last_name=encryption.encrypt("Doe"),
+            phone=encryption.encrypt(encryption.encrypt("555-123-4567")),
+        )
+
+    def test_decrypt_value_removes_every_layer(self):
+        self.assertEqual(
+            decrypt_value(encryption.encrypt(encryption.encrypt("Jane"))), "Jane"
+        )
+        self.assertEqual(decrypt_value("Jane"), "Jane")
+        self.assertEqual(decrypt_value(""), "")
+
+    def test_fix_double_encryption_restores_plaintext(self):
+        call_command(
+            "phi_migrate",
+            "fix_double_encryption",
+            "--workers",
+            "1",
+            "--checkpoint",
+            os.path.join(tempfile.mkdtemp(), "checkpoint.json"),
+            stdout=StringIO(),
+        )
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(
+            (user.first_name, user.last_name, user.phone),
+            ("Jane", "Doe", "555-123-4567"),
+        )
+        self.assertEqual(user.first_name_bidx, BlindIndex.exact("first_name", "Jane"))
+        self.assertEqual(
+            user.phone_bidx, BlindIndex.exact("phone", "5551234567", "phone")
+        )
+        self.assertIn(user.pk, [row["pk"] for row in matching_user_ids("ja")])
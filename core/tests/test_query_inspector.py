@@ -0,0 +1,105 @@
+from unittest import mock
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from core import query_inspector as inspector_module
+from core.query_inspector import QueryInspector, fingerprint, inspect_queries
+from users.models import User
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_literals_collapse(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE a = 'x''y'  AND\n b = 42.5"),
+            "SELECT * FROM t WHERE a = ? AND b = ?",
+        )
+
+    def test_in_lists_collapse_whatever_their_length(self):
+        one = fingerprint('SELECT "id" FROM t WHERE "id" IN (%s)')
+        three = fingerprint('SELECT "id" FROM t WHERE "id" IN (%s, %s, %s)')
+        self.assertEqual(one, three)
+        self.assertEqual(one, 'SELECT "id" FROM t WHERE "id" IN (...)')
+
+    def test_multi_row_values_collapse(self):
+        self.assertEqual(
+            fingerprint("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s), (%s, %s)"),
+            "INSERT INTO t (a, b) VALUES (%s, %s), ...",
+        )
+        self.assertEqual(
+            fingerprint("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)"),
+            fingerprint("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s), (%s, %s)"),
+        )
+
+
+class QueryInspectorTests(SimpleTestCase):
+    def setUp(self):
+        self.inspector = QueryInspector(
+            sample_rate=1.0, repeat_threshold=2, slow_query_ms=100
+        )
+
+    def run_queries(self, *statements, elapsed=0.001):
+        token = self.inspector.start()
+        profile = inspector_module._current.get()
+        clock = iter(value for _ in statements for value in (0.0, elapsed))
+        with mock.patch.object(
+            inspector_module.time, "perf_counter", side_effect=lambda: next(clock)
+        ):
+            for sql in statements:
+                self.inspector.record(profile, lambda *args: None, sql, (), False, {})
+        return token
+
+    def test_unsampled_requests_are_not_profiled(self):
+        inspector = QueryInspector(sample_rate=0)
+        with mock.patch.object(inspector_module.random, "random") as random:
+            self.assertIsNone(inspector.start())
+        random.assert_not_called()
+
+    def test_shapes_repeated_past_the_threshold_are_logged(self):
+        sql = 'SELECT * FROM "patients" WHERE "id" = %s'
+        token = self.run_queries(sql, sql, sql, "SELECT 1")
+        with self.assertLogs("theracare.queries", "WARNING") as logs:
+            profile = self.inspector.finish(token, "patients.views.PatientViewSet")
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn(
+            "Repeated query in patients.views.PatientViewSet: 3x", logs.output[0]
+        )
+        self.assertIn("(of 4 queries)", logs.output[0])
+        self.assertIn("core/tests/test_query_inspector.py", logs.output[0])
+        self.assertEqual(profile.counts[sql], 3)
+        self.assertIsNone(inspector_module._current.get())
+
+    def test_shapes_at_the_threshold_are_not_logged(self):
+        sql = "SELECT 1"
+        token = self.run_queries(sql, sql)
+        with self.assertNoLogs("theracare.queries", "WARNING"):
+            self.inspector.finish(token, "view")
+
+    def test_slow_statements_are_logged_with_the_view(self):
+        token = self.run_queries("SELECT pg_sleep(1)", elapsed=0.25)
+        with self.assertLogs("theracare.queries", "WARNING") as logs:
+            self.inspector.finish(token, "audit.views.AuditLogViewSet")
+        self.assertIn(
+            "Slow query in audit.views.AuditLogViewSet (250ms)", logs.output[0]
+        )
+
+
+class InspectQueriesWrapperTests(TestCase):
+    def test_repeated_orm_queries_are_traced_to_their_caller(self):
+        inspector = QueryInspector(sample_rate=1.0, repeat_threshold=2)
+        connection.ensure_connection()
+        self.assertIn(inspect_queries, connection.execute_wrappers)
+
+        with mock.patch.object(inspector_module, "query_inspector", inspector):
+            token = inspector.start()
+            for pk in range(3):
+                User.objects.filter(pk=pk).exists()
+            with self.assertLogs("theracare.queries", "WARNING") as logs:
+                inspector.finish(token, "users.views.UserListView")
+        self.assertIn("3x", logs.output[0])
+        self.assertIn("core/tests/test_query_inspector.py", logs.output[0])
+        # Only the SQL template is logged, never the parameters
+        self.assertIn("LIMIT", logs.output[0])
+
+    def test_unsampled_requests_pass_straight_through(self):
+        with mock.patch.object(inspector_module, "query_inspector") as inspector:
+            User.objects.exists()
+        inspector.record.assert_not_called()
@@ -0,0 +1,159 @@
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from core.middleware import RateLimitMiddleware
+from core.ratelimit import (
+    TOKEN_BUCKET_SCRIPT,
+    LocalBucketStore,
+    RateLimiter,
+    RatePolicy,
+)
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover
+    fakeredis = None
+
+POLICIES = {"api": {"requests": 2, "window": 60}}
+
+
+class LocalBucketTests(SimpleTestCase):
+    def test_capacity_then_refill(self):
+        store = LocalBucketStore()
+        policy = RatePolicy("api", 2, 60)
+        with mock.patch("core.ratelimit.time.monotonic", return_value=100.0):
+            self.assertTrue(store.hit("k", policy)[0])
+            self.assertTrue(store.hit("k", policy)[0])
+            allowed, tokens, wait = store.hit("k", policy)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 30.0)
+        # One token back after window / requests seconds
+        with mock.patch("core.ratelimit.time.monotonic", return_value=130.0):
+            self.assertTrue(store.hit("k", policy)[0])
+            self.assertFalse(store.hit("k", policy)[0])
+
+    def test_keys_are_bounded(self):
+        store = LocalBucketStore(max_keys=2)
+        policy = RatePolicy("api", 2, 60)
+        for key in ("a", "b", "c"):
+            store.hit(key, policy)
+        self.assertEqual(list(store._buckets), ["b", "c"])
+
+    def test_limiter_without_redis_uses_local_store(self):
+        limiter = RateLimiter(POLICIES)
+        policy = limiter.get_policy("api")
+        results = [limiter.hit(policy, "ip:1.2.3.4") for _ in range(3)]
+        self.assertEqual([r.allowed for r in results], [True, True, False])
+        self.assertFalse(limiter.uses_shared_store())
+        self.assertEqual(results[2].headers()["Retry-After"], "30")
+
+
+class RedisBucketTests(SimpleTestCase):
+    def setUp(self):
+        if fakeredis is None:
+            self.skipTest("fakeredis is not installed")
+        self.redis = fakeredis.FakeRedis()
+        self.limiter = RateLimiter(POLICIES)
+        self.limiter._script = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+        self.policy = self.limiter.get_policy("api")
+
+    def test_lua_bucket(self):
+        results = [self.limiter.hit(self.policy, "user:1") for _ in range(3)]
+        self.assertEqual([r.allowed for r in results], [True, True, False])
+        self.assertEqual(results[1].remaining, 0)
+        self.assertGreater(results[2].retry_after, 0)
+        # State lives in Redis, not the local store, and expires
+        self.assertEqual(self.limiter.local._buckets, {})
+        self.assertGreater(self.redis.pttl("ratelimit:api:user:1"), 0)
+        # Buckets are per identity
+        self.assertTrue(self.limiter.hit(self.policy, "user:2").allowed)
+
+    def test_falls_back_to_local_store_on_redis_error(self):
+        self.limiter._script = mock.Mock(side_effect=ConnectionError("down"))
+        self.assertTrue(self.limiter.hit(self.policy, "user:1").allowed)
+        self.assertIn("ratelimit:api:user:1", self.limiter.local._buckets)
+        # Redis is not retried until REDIS_RETRY_SECONDS have passed
+        self.assertFalse(self.limiter.uses_shared_store())
+        self.assertEqual(self.limiter._script.call_count, 1)
+
+
+class RateLimitMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = RateLimitMiddleware(lambda request: HttpResponse("ok"))
+        patcher = mock.patch("core.middleware.rate_limiter", RateLimiter(POLICIES))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request(self, client_ip="10.0.0.1", **extra):
+        request = self.factory.get("/api/appointments/", **extra)
+        request.user = AnonymousUser()
+        request.client_ip = client_ip
+        return request
+
+    def test_registered_after_authentication(self):
+        middleware = settings.MIDDLEWARE
+        self.assertGreater(
+            middleware.index("core.middleware.RateLimitMiddleware"),
+            middleware.index("django.contrib.auth.middleware.AuthenticationMiddleware"),
+        )
+
+    def test_limits_per_client_ip(self):
+        statuses = [self.middleware(self.request()).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        response = self.middleware(self.request(client_ip="10.0.0.2"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-RateLimit-Remaining"], "1")
+
+    def test_access_token_identifies_user(self):
+        token = AccessToken()
+        token["user_id"] = "42"
+        request = self.request(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(self.middleware.get_identity(request, request.user), "user:42")
+        request = self.request(HTTP_AUTHORIZATION="Bearer not-a-token")
+        self.assertEqual(
+            self.middleware.get_identity(request, request.user), "ip:10.0.0.1"
+        )
+
+    def test_exempt_routes_are_not_limited(self):
+        for _ in range(3):
+            request = self.factory.get("/api/health/")
+            request.user = AnonymousUser()
+            response = self.middleware(request)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("X-RateLimit-Limit", response)
+
+    def async_middleware(self):
+        async def get_response(request):
+            return HttpResponse("ok")
+
+        return RateLimitMiddleware(get_response)
+
+    def test_async_exempt_routes_skip_resolving_the_user(self):
+        middleware = self.async_middleware()
+        with mock.patch(
+            "core.middleware.aresolve_user", new_callable=mock.AsyncMock
+        ) as aresolve_user:
+            for _ in range(3):
+                request = self.factory.get("/api/health/")
+                response = async_to_sync(middleware)(request)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn("X-RateLimit-Limit", response)
+        aresolve_user.assert_not_awaited()
+
+    def test_async_limits_per_client_ip(self):
+        middleware = self.async_middleware()
+        with mock.patch(
+            "core.middleware.aresolve_user",
+            new_callable=mock.AsyncMock,
+            return_value=AnonymousUser(),
+        ) as aresolve_user:
+            statuses = [
+                async_to_sync(middleware)(self.request()).status_code for _ in range(3)
+            ]
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(aresolve_user.await_count, 3)
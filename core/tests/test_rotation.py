@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from core.security import HIPAAEncryption
+from users.models import User, UserProfile
+
+OLD_KEY = "old-rotation-test-key"
+NEW_KEY = "new-rotation-test-key"
+THIRD_KEY = "third-rotation-test-key"
+
+
+def keys(current, retired=()):
+    return override_settings(
+        HIPAA_SETTINGS={
+            **settings.HIPAA_SETTINGS,
+            "ENCRYPTION_KEY": current,
+            "RETIRED_ENCRYPTION_KEYS": list(retired),
+        }
+    )
+
+
+class RotatePHIKeysTests(TransactionTestCase):
+    def setUp(self):
+        with keys(OLD_KEY):
+            old = HIPAAEncryption()
+        with mock.patch("users.models.encryption", old):
+            user = User.objects.create_user("jane", "jane@example.com", "pw")
+            self.profile = UserProfile.objects.get(user=user)
+            self.profile.city = "Springfield"
+            self.profile.save()
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), "rotate.json")
+
+    def rotate(self, *args, current=NEW_KEY, retired=(OLD_KEY,)):
+        with keys(current, retired):
+            rotating = HIPAAEncryption()
+            with mock.patch(
+                "core.management.commands.rotate_phi_keys.encryption", rotating
+            ):
+                call_command(
+                    "rotate_phi_keys",
+                    "--model",
+                    "users.UserProfile",
+                    "--workers",
+                    "1",
+                    "--checkpoint",
+                    self.checkpoint,
+                    *args,
+                    stdout=StringIO(),
+                )
+
+    def test_rows_are_re_encrypted_under_the_new_key(self):
+        self.rotate()
+        self.profile.refresh_from_db()
+        with keys(NEW_KEY):
+            self.assertEqual(
+                HIPAAEncryption().decrypt(self.profile.city), "Springfield"
+            )
+        with open(self.checkpoint) as fh:
+            self.assertNotIn("users.UserProfile", json.load(fh))
+
+    def test_consecutive_rotations_re_encrypt_every_row(self):
+        self.rotate()
+        first = UserProfile.objects.get(pk=self.profile.pk).city
+        # A later rotation to a third key must not resume past the first run
+        self.rotate(current=THIRD_KEY, retired=(NEW_KEY, OLD_KEY))
+        second = UserProfile.objects.get(pk=self.profile.pk).city
+        self.assertNotEqual(second, first)
+        with keys(THIRD_KEY):
+            self.assertEqual(HIPAAEncryption().decrypt(second), "Springfield")
+
+    def test_checkpoint_resumes_past_processed_rows(self):
+        with open(self.checkpoint, "w") as fh:
+            json.dump({"users.UserProfile": str(self.profile.pk)}, fh)
+        before = UserProfile.objects.get(pk=self.profile.pk).city
+        self.rotate()
+        self.assertEqual(UserProfile.objects.get(pk=self.profile.pk).city, before)
+
+        self.rotate("--restart")
+        self.assertNotEqual(UserProfile.objects.get(pk=self.profile.pk).city, before)
+
+    def test_dry_run_writes_nothing(self):
+        before = UserProfile.objects.get(pk=self.profile.pk).city
+        self.rotate("--dry-run")
+        self.assertEqual(UserProfile.objects.get(pk=self.profile.pk).city, before)
+        self.assertFalse(os.path.exists(self.checkpoint))
@@ -0,0 +1,91 @@
+from unittest import mock
+from django.conf import settings
+from django.test import RequestFactory, SimpleTestCase
+from core import routes
+from core.routes import RouteClassifier, RoutePolicy, get_route_policy
+
+
+class RouteClassifierTests(SimpleTestCase):
+    def classifier(self, **overrides):
+        return RouteClassifier(overrides={**settings.ROUTE_POLICIES, **overrides})
+
+    def assertPolicy(self, policy, audit=True, phi=False, rate_limit="api"):
+        self.assertEqual(
+            (policy.audit, policy.phi, policy.rate_limit), (audit, phi, rate_limit)
+        )
+
+    def test_installed_apps_get_their_policies(self):
+        classifier = self.classifier()
+        self.assertPolicy(
+            classifier.classify("/api/patients/"), phi=True, rate_limit="sensitive"
+        )
+        # A router's API root belongs to the app whose URLconf includes it
+        self.assertPolicy(
+            classifier.classify("/api/soap-notes/"), phi=True, rate_limit="sensitive"
+        )
+        self.assertPolicy(classifier.classify("/api/appointments/"))
+
+    def test_namespaced_url_names(self):
+        self.assertPolicy(self.classifier().classify("/admin/jsi18n/"), audit=False)
+        classifier = self.classifier(**{"users:logout": {"audit": False}})
+        self.assertPolicy(classifier.classify("/api/auth/logout/"), audit=False)
+        self.assertPolicy(classifier.classify("/api/auth/refresh/"))
+
+    def test_declared_policies_override_settings(self):
+        classifier = self.classifier(
+            core={"audit": True, "rate_limit": "api"},
+            users={"rate_limit": "sensitive"},
+        )
+        self.assertPolicy(
+            classifier.classify("/api/health/"), audit=False, rate_limit=None
+        )
+        self.assertPolicy(classifier.classify("/api/auth/login/"), rate_limit="login")
+        self.assertPolicy(
+            classifier.classify("/api/auth/current/"), rate_limit="sensitive"
+        )
+
+    def test_login_is_matched_by_view_not_by_substring(self):
+        classifier = self.classifier()
+        self.assertPolicy(classifier.classify("/api/auth/login/"), rate_limit="login")
+        # Paths that merely contain "login" keep their own view's policy
+        self.assertPolicy(
+            classifier.classify("/api/patients/login-history/"),
+            phi=True,
+            rate_limit="sensitive",
+        )
+        self.assertPolicy(classifier.classify("/api/auth/login/extra/"))
+
+    def test_unresolved_paths_get_the_default(self):
+        classifier = RouteClassifier(default=RoutePolicy(rate_limit="strict"))
+        self.assertPolicy(classifier.classify("/no/such/path/"), rate_limit="strict")
+
+    def test_paths_are_memoized(self):
+        classifier = self.classifier()
+        classifier.cache_size = 2
+        with mock.patch.object(
+            routes, "get_resolver", wraps=routes.get_resolver
+        ) as get_resolver:
+            first = classifier.classify("/api/patients/")
+            self.assertIs(classifier.classify("/api/patients/"), first)
+            self.assertEqual(get_resolver.call_count, 1)
+            classifier.classify("/api/health/")
+            classifier.classify("/api/auth/login/")
+        self.assertEqual(
+            list(classifier._by_path), ["/api/health/", "/api/auth/login/"]
+        )
+
+    def test_unknown_policy_fields_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.classifier(patients={"logged": False})
+
+    def test_request_is_classified_once(self):
+        request = RequestFactory().get("/api/patients/")
+        with mock.patch.object(
+            routes, "route_classifier", self.classifier()
+        ) as classifier, mock.patch.object(
+            classifier, "classify", wraps=classifier.classify
+        ) as classify:
+            policy = get_route_policy(request)
+            self.assertIs(get_route_policy(request), policy)
+        classify.assert_called_once_with("/api/patients/")
+        self.assertTrue(policy.phi)
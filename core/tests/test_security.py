@@ -0,0 +1,64 @@
+import base64
+from io import StringIO
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.conf import settings
+from core.security import HIPAAEncryption
+from users.models import User, UserProfile
+
+
+def hipaa_settings(**overrides):
+    return override_settings(HIPAA_SETTINGS={**settings.HIPAA_SETTINGS, **overrides})
+
+
+class CiphertextFormatTests(SimpleTestCase):
+    def test_v1_is_written_by_default(self):
+        value = HIPAAEncryption().encrypt("123 Main St")
+        self.assertEqual(HIPAAEncryption.ciphertext_version(value), 1)
+        self.assertTrue(base64.urlsafe_b64decode(value).startswith(b"gAAAAA"))
+
+    def test_v2_round_trip(self):
+        with hipaa_settings(CIPHERTEXT_FORMAT="v2"):
+            encryption = HIPAAEncryption()
+            value = encryption.encrypt("123 Main St")
+        self.assertTrue(value.startswith("v2:"))
+        self.assertEqual(HIPAAEncryption().decrypt(value), "123 Main St")
+
+    def test_upgrade_keeps_the_token(self):
+        encryption = HIPAAEncryption()
+        legacy = encryption.encrypt("Jane")
+        upgraded = encryption.upgrade_ciphertext(legacy)
+        self.assertEqual(encryption.ciphertext_version(upgraded), 2)
+        self.assertEqual(encryption.decrypt(upgraded), "Jane")
+        self.assertEqual(encryption.upgrade_ciphertext(upgraded), upgraded)
+
+    def test_plaintext_resembling_ciphertext_is_not_encrypted(self):
+        encryption = HIPAAEncryption()
+        for value in ("v2:hello", "v2:gAAAAAnotatoken", "gAAAAA", "Z0FBQUFBxyz", ""):
+            self.assertFalse(encryption.is_encrypted(value), value)
+        self.assertTrue(encryption.is_encrypted(encryption.encrypt("x")))
+
+
+class UpgradeCommandTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("jane", "jane@example.com", "pw")
+        # A profile is created with every user
+        self.profile = UserProfile.objects.get(user=user)
+        self.profile.street_address = "v2:1 Elm St"
+        self.profile.city = "Springfield"
+        self.profile.save()
+
+    def test_plaintext_with_prefix_is_encrypted_on_save(self):
+        self.profile.refresh_from_db()
+        self.assertNotEqual(self.profile.street_address, "v2:1 Elm St")
+        self.assertEqual(
+            self.profile.get_decrypted_field("street_address"), "v2:1 Elm St"
+        )
+
+    def test_upgrade_rewrites_v1_columns(self):
+        call_command(
+            "upgrade_phi_ciphertext", "--model", "users.UserProfile", stdout=StringIO()
+        )
+        self.profile.refresh_from_db()
+        self.assertEqual(HIPAAEncryption.ciphertext_version(self.profile.city), 2)
+        self.assertEqual(self.profile.get_decrypted_field("city"), "Springfield")
@@ -0,0 +1,139 @@
+import uuid
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory, force_authenticate
+from appointments.models import Appointment, AppointmentType
+from appointments.serializers import AppointmentNotesSerializer, AppointmentSerializer
+from appointments.views import AppointmentViewSet
+from core.security import encryption
+from core.serializers import BatchDecryptListSerializer, BatchDecryptMixin
+from users.models import User
+
+
+class Record:
+    def __init__(self, pk, notes, secret):
+        self.pk = pk
+        self._notes = notes
+        self._secret = secret
+
+
+class RecordSerializer(BatchDecryptMixin, serializers.Serializer):
+    pk = serializers.IntegerField()
+    notes = serializers.CharField(source="_notes")
+
+    class Meta:
+        encrypted_fields = {"notes": "_notes", "secret": "_secret"}
+        list_serializer_class = BatchDecryptListSerializer
+
+
+class BatchDecryptMixinTests(SimpleTestCase):
+    def setUp(self):
+        self.records = [
+            Record(index, encryption.encrypt(f"note {index}"), encryption.encrypt("x"))
+            for index in range(3)
+        ]
+
+    def test_page_is_decrypted_in_one_pass(self):
+        data = RecordSerializer(self.records, many=True).data
+        self.assertEqual([row["notes"] for row in data], ["note 0", "note 1", "note 2"])
+
+    def test_single_instance(self):
+        self.assertEqual(RecordSerializer(self.records[1]).data["notes"], "note 1")
+
+    def test_undeclared_encrypted_fields_are_not_added(self):
+        for data in (
+            RecordSerializer(self.records[0]).data,
+            RecordSerializer(self.records, many=True).data[0],
+        ):
+            self.assertEqual(set(data), {"pk", "notes"})
+
+    def test_appointment_response_excludes_clinical_notes(self):
+        fields = set(AppointmentSerializer().fields)
+        self.assertNotIn("notes", fields)
+        self.assertNotIn("chief_complaint", fields)
+
+
+def appointment_page(size):
+    """Unsaved appointments with distinct encrypted notes"""
+    now = timezone.now()
+    therapist = User(id=uuid.uuid4(), first_name="Dana", last_name="Reyes")
+    appointment_type = AppointmentType(id=1, name="Individual Therapy")
+    page = []
+    for i in range(size):
+        appointment = Appointment(
+            id=uuid.uuid4(),
+            appointment_number=f"APT-{i:06d}",
+            patient=User(id=uuid.uuid4(), first_name="Pat", last_name=str(i)),
+            therapist=therapist,
+            appointment_type=appointment_type,
+            start_datetime=now,
+            end_datetime=now,
+            created_at=now,
+            updated_at=now,
+        )
+        appointment.notes = f"note {i}"
+        appointment.chief_complaint = f"complaint {i}" if i % 2 else ""
+        # Drop the plaintext cached by the setter, as a freshly loaded row would
+        appointment.__dict__.pop("_plaintext_cache_notes")
+        appointment.__dict__.pop("_plaintext_cache_chief_complaint")
+        page.append(appointment)
+    return page
+
+
+class AppointmentNotesSerializerTests(SimpleTestCase):
+    def test_page_is_decrypted_with_one_batch_call(self):
+        page = appointment_page(4)
+        with mock.patch.object(
+            encryption, "decrypt_many", wraps=encryption.decrypt_many
+        ) as decrypt_many, mock.patch(
+            "core.serializers.decrypt_field"
+        ) as decrypt_field:
+            data = AppointmentNotesSerializer(page, many=True).data
+        decrypt_many.assert_called_once()
+        decrypt_field.assert_not_called()
+        self.assertEqual(
+            [row["notes"] for row in data], [f"note {i}" for i in range(4)]
+        )
+        self.assertEqual(
+            [row["chief_complaint"] for row in data],
+            ["", "complaint 1", "", "complaint 3"],
+        )
+
+    def test_single_instance(self):
+        data = AppointmentNotesSerializer(appointment_page(2)[1]).data
+        self.assertEqual(data["notes"], "note 1")
+        self.assertEqual(
+            set(data),
+            set(AppointmentSerializer().fields) | {"notes", "chief_complaint"},
+        )
+
+
+class AppointmentNotesViewTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.view = AppointmentViewSet.as_view({"get": "notes"})
+
+    def get(self, role):
+        user = User.objects.create_user(
+            f"{role}-user", f"{role}@example.com", "pw-Notes-1", role=role
+        )
+        request = self.factory.get("/api/appointments/notes/")
+        force_authenticate(request, user=user)
+        with mock.patch.object(
+            AppointmentViewSet, "get_queryset", return_value=appointment_page(3)
+        ):
+            return self.view(request)
+
+    def test_therapist_sees_decrypted_notes(self):
+        response = self.get("therapist")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row["notes"] for row in response.data["results"]],
+            ["note 0", "note 1", "note 2"],
+        )
+
+    def test_clients_and_staff_are_refused(self):
+        for role in ("client", "staff"):
+            self.assertEqual(self.get(role).status_code, 403)
@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+from core.session_activity import SessionActivityTracker, activity_cache_key
+
+START = datetime(2026, 10, 16, 12, 0)
+
+
+class Clock(datetime):
+    """datetime whose now() the tests advance"""
+
+    current = START
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+class SessionActivityTrackerTests(SimpleTestCase):
+    def setUp(self):
+        Clock.current = START
+        for target in ("core.session_activity.datetime", "core.security.datetime"):
+            patcher = mock.patch(target, Clock)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch("core.session_activity.cache")
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache.get.return_value = None
+        self.cache.aget = mock.AsyncMock(side_effect=lambda key: self.cache.get(key))
+
+        self.tracker = SessionActivityTracker(granularity=60, max_sessions=3)
+        # No flusher thread; the tests call collect_due themselves
+        patcher = mock.patch.object(self.tracker, "_ensure_started")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def advance(self, **delta):
+        Clock.current += timedelta(**delta)
+
+    def test_recent_activity_is_decided_without_cache_reads(self):
+        self.tracker.touch("a")
+        self.advance(minutes=10)
+        self.assertFalse(self.tracker.is_expired("a"))
+        self.assertFalse(async_to_sync(self.tracker.ais_expired)("a"))
+        self.cache.get.assert_not_called()
+        self.cache.aget.assert_not_called()
+
+    def test_one_write_per_granularity_window(self):
+        self.tracker.touch("a")
+        self.assertEqual(self.tracker.collect_due(), {activity_cache_key("a"): START})
+
+        self.advance(seconds=30)
+        self.tracker.touch("a")
+        self.assertEqual(self.tracker.collect_due(), {})
+
+        self.advance(seconds=31)
+        self.assertEqual(
+            self.tracker.collect_due(),
+            {activity_cache_key("a"): START + timedelta(seconds=30)},
+        )
+        # Nothing new since the last write
+        self.advance(seconds=61)
+        self.assertEqual(self.tracker.collect_due(), {})
+
+    def test_evicted_dirty_entries_are_still_written(self):
+        self.tracker.touch("clean")
+        self.tracker.collect_due()
+        self.tracker.touch("dirty")
+        for key in ("b", "c", "d"):
+            self.advance(seconds=1)
+            self.tracker.touch(key)
+
+        self.assertEqual(
+            self.tracker._evicted, {"dirty": START}, "clean was already persisted"
+        )
+        due = self.tracker.collect_due()
+        self.assertEqual(due[activity_cache_key("dirty")], START)
+        self.assertNotIn(activity_cache_key("clean"), due)
+        self.assertEqual(self.tracker._evicted, {})
+
+    def test_newer_activity_from_another_process_wins(self):
+        self.tracker.touch("a")
+        self.advance(minutes=31)
+        # Another worker saw the session later and wrote it to the cache
+        self.cache.get.return_value = START + timedelta(minutes=20)
+        self.assertFalse(self.tracker.is_expired("a"))
+        self.cache.get.assert_called_once_with(activity_cache_key("a"))
+
+        entry = self.tracker._entries["a"]
+        self.assertEqual(entry.last_seen, START + timedelta(minutes=20))
+        self.assertEqual(entry.persisted, START + timedelta(minutes=20))
+
+    def test_older_cached_activity_does_not_rewind(self):
+        self.tracker.touch("a")
+        self.advance(minutes=5)
+        self.tracker.touch("a")
+        self.advance(minutes=31)
+        self.cache.get.return_value = START
+        self.assertTrue(self.tracker.is_expired("a"))
+        self.assertEqual(
+            self.tracker._entries["a"].last_seen, START + timedelta(minutes=5)
+        )
+
+    def test_idle_session_expires_after_the_timeout(self):
+        self.tracker.touch("a")
+        self.tracker.collect_due()
+        self.cache.get.return_value = START
+
+        self.advance(minutes=29)
+        self.assertFalse(self.tracker.is_expired("a"))
+        self.advance(minutes=2)
+        self.assertTrue(self.tracker.is_expired("a"))
+        self.assertTrue(async_to_sync(self.tracker.ais_expired)("a"))
+
+    def test_unknown_session_uses_the_cache(self):
+        self.assertFalse(self.tracker.is_expired("other"))
+        self.cache.get.return_value = START - timedelta(minutes=31)
+        self.assertTrue(self.tracker.is_expired("other"))
@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+from django.core.files.base import ContentFile
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.test.client import encode_multipart
+from rest_framework.request import Request
+from core.parsers import EncryptedMultiPartParser
+from core.storage import (
+    EncryptedFileError,
+    EncryptedFileSystemStorage,
+    EncryptedUploadedFile,
+    parse_range_header,
+)
+
+PLAINTEXT = bytes(range(256)) * 1000  # spans several 4KB chunks
+
+
+class EncryptedStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.storage = EncryptedFileSystemStorage(location=self.root, chunk_size=4096)
+        self.name = self.storage.save("doc.bin", ContentFile(PLAINTEXT))
+
+    def test_round_trip(self):
+        with open(self.storage.path(self.name), "rb") as fh:
+            self.assertNotIn(PLAINTEXT[:64], fh.read())
+        with self.storage.open(self.name) as fh:
+            self.assertEqual(fh.size, len(PLAINTEXT))
+            self.assertEqual(fh.read(), PLAINTEXT)
+        self.assertEqual(self.storage.size(self.name), len(PLAINTEXT))
+
+    def test_open_streams_and_seeks(self):
+        with self.storage.open(self.name) as fh:
+            self.assertEqual(b"".join(fh.chunks(1000)), PLAINTEXT)
+            fh.seek(5000)
+            self.assertEqual(fh.read(10), PLAINTEXT[5000:5010])
+
+    def test_ranges(self):
+        size = len(PLAINTEXT)
+        for header, expected in (
+            ("bytes=0-9", (0, 9)),
+            ("bytes=4090-4200", (4090, 4200)),
+            ("bytes=-100", (size - 100, size - 1)),
+            ("bytes=250000-", (250000, size - 1)),
+        ):
+            start, end = parse_range_header(header, size)
+            self.assertEqual((start, end), expected)
+            with self.storage.open_decrypted(self.name) as reader:
+                data = b"".join(reader.iter_range(start, end))
+            self.assertEqual(data, PLAINTEXT[start : end + 1], header)
+
+        self.assertIsNone(parse_range_header("bytes=0-1,5-6", size))
+        with self.assertRaises(ValueError):
+            parse_range_header(f"bytes={size}-", size)
+
+    def test_tampering_is_detected(self):
+        path = self.storage.path(self.name)
+        with open(path, "r+b") as fh:
+            fh.seek(5000)
+            byte = fh.read(1)
+            fh.seek(5000)
+            fh.write(bytes([byte[0] ^ 1]))
+        with self.storage.open_decrypted(self.name) as reader:
+            with self.assertRaises(EncryptedFileError):
+                b"".join(reader.iter_range(4096, 8191))
+
+
+class EncryptedUploadTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def parse_upload(self):
+        body = encode_multipart(
+            "BoUnDaRy", {"file": ContentFile(PLAINTEXT, name="scan.pdf")}
+        )
+        request = RequestFactory().post(
+            "/", body, content_type="multipart/form-data; boundary=BoUnDaRy"
+        )
+        request = Request(request, parsers=[EncryptedMultiPartParser()])
+        return request.FILES["file"]
+
+    def test_upload_is_encrypted_as_it_arrives(self):
+        with override_settings(FILE_UPLOAD_TEMP_DIR=self.root):
+            upload = self.parse_upload()
+        self.assertIsInstance(upload, EncryptedUploadedFile)
+        self.assertEqual(upload.size, len(PLAINTEXT))
+        # The only temporary copy is ciphertext
+        with open(upload.encrypted_path, "rb") as fh:
+            self.assertNotIn(PLAINTEXT[:64], fh.read())
+        self.assertEqual(upload.read(), PLAINTEXT)
+
+        storage = EncryptedFileSystemStorage(location=os.path.join(self.root, "out"))
+        name = storage.save("scan.pdf", upload)
+        with storage.open(name) as fh:
+            self.assertEqual(fh.read(), PLAINTEXT)
+
+        upload.close()
+        self.assertFalse(os.path.exists(upload.encrypted_path))
@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework import serializers
+from core import timing
+from core.middleware import HIPAAComplianceMiddleware
+from users.models import User
+
+
+def sample_rate(rate):
+    return override_settings(
+        HIPAA_SETTINGS={**settings.HIPAA_SETTINGS, "SERVER_TIMING_SAMPLE_RATE": rate}
+    )
+
+
+class TagSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=10)
+
+
+class NoteSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=20)
+    tags = TagSerializer(many=True)
+
+
+def serializer_view(request):
+    serializer = NoteSerializer(data={"title": "Intake", "tags": [{"name": "new"}]})
+    serializer.is_valid(raise_exception=True)
+    User.objects.exists()
+    return JsonResponse(serializer.data)
+
+
+class ServerTimingHeaderTests(TestCase):
+    def get(self):
+        request = RequestFactory().get("/api/notes/")
+        request.user = AnonymousUser()
+        return HIPAAComplianceMiddleware(serializer_view)(request), request
+
+    @sample_rate(1.0)
+    def test_sampled_requests_report_the_breakdown(self):
+        response, request = self.get()
+        header = response["Server-Timing"]
+        for metric in ("db;", "serializer;", "view;", "mw;", "total;"):
+            self.assertIn(metric, header)
+        self.assertIn('desc="Database (1)"', header)
+        self.assertEqual(request.server_timing["db_count"], 1)
+        self.assertIn("serializer_ms", request.server_timing)
+        self.assertIsNone(timing.current())
+
+    @sample_rate(0)
+    def test_unsampled_requests_have_no_header(self):
+        response, request = self.get()
+        self.assertNotIn("Server-Timing", response)
+        self.assertFalse(hasattr(request, "server_timing"))
+        self.assertEqual(response.status_code, 200)
+
+
+class InstrumentedSerializerTests(SimpleTestCase):
+    data = {"title": "Intake", "tags": [{"name": "new"}, {"name": "follow-up"}]}
+
+    def test_serializers_are_instrumented_once(self):
+        self.assertTrue(serializers.BaseSerializer._timed)
+        wrapped = serializers.BaseSerializer.is_valid
+        timing.instrument_serializers()
+        self.assertIs(serializers.BaseSerializer.is_valid, wrapped)
+        self.assertEqual(wrapped.__name__, "is_valid")
+
+    def test_behaviour_is_unchanged_outside_a_timed_request(self):
+        self.assertIsNone(timing.current())
+        serializer = NoteSerializer(data=self.data)
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data, self.data)
+        self.assertEqual(serializer.data, self.data)
+        self.assertEqual(
+            NoteSerializer([self.data, self.data], many=True).data,
+            [self.data, self.data],
+        )
+
+        invalid = NoteSerializer(data={"title": "x" * 21, "tags": [{}]})
+        self.assertFalse(invalid.is_valid())
+        self.assertEqual(set(invalid.errors), {"title", "tags"})
+        with self.assertRaises(serializers.ValidationError):
+            invalid.is_valid(raise_exception=True)
+        # Still guarded by DRF's own assertions
+        with self.assertRaises(AssertionError):
+            NoteSerializer(self.data).is_valid()
+
+    def test_nested_serializers_are_counted_once(self):
+        token = timing._current.set(timing.RequestTimings(0.0))
+        try:
+            serializer = NoteSerializer(data=self.data)
+            serializer.is_valid()
+            serializer.data
+            NoteSerializer([self.data] * 3, many=True).data
+            invalid = NoteSerializer(data={})
+            with self.assertRaises(serializers.ValidationError):
+                invalid.is_valid(raise_exception=True)
+            timings = timing.current()
+        finally:
+            timing._current.reset(token)
+        self.assertEqual(timings.count("serializer"), 4)
+        self.assertEqual(timings._open, set())
@@ -0,0 +1,202 @@
+# backend/core/timing.py
+"""
+Per-request timing breakdown for TheraCare API.
+
+A timed request gets a RequestTimings in a context variable; database
+queries (through a connection execute wrapper), PHI encryption/decryption
+and serializer work add their time to it. HIPAAComplianceMiddleware reports
+the totals of sampled requests as a ``Server-Timing`` header and on the
+audit record, and feeds every timed request to core.metrics. Outside a
+timed request each hook costs one context variable lookup.
+"""
+
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+# Server-Timing metric name -> description
+METRICS = {
+    "db": "Database",
+    "crypto": "PHI encryption",
+    "serializer": "Serializers",
+    "view": "View",
+    "mw": "Middleware",
+    "total": "Total",
+}
+
+
+class RequestTimings:
+    """Accumulated (count, seconds) per metric for one request"""
+
+    __slots__ = ("started", "sampled", "metrics", "_open")
+
+    def __init__(self, started: float, sampled: bool = True):
+        # Wall clock start (request.start_time)
+        self.started = started
+        # Whether the breakdown is reported (Server-Timing, audit record)
+        self.sampled = sampled
+        self.metrics: Dict[str, list] = {}
+        # Metrics currently being timed; nested calls are not counted twice
+        self._open = set()
+
+    def add(self, name: str, seconds: float, count: int = 1) -> None:
+        entry = self.metrics.get(name)
+        if entry is None:
+            self.metrics[name] = [count, seconds]
+        else:
+            entry[0] += count
+            entry[1] += seconds
+
+    def count(self, name: str) -> int:
+        entry = self.metrics.get(name)
+        return entry[0] if entry else 0
+
+    def seconds(self, name: str) -> float:
+        entry = self.metrics.get(name)
+        return entry[1] if entry else 0.0
+
+    def finish(self) -> None:
+        """Record total and middleware (total minus view) time"""
+        total = max(time.time() - self.started, 0.0)
+        self.metrics["total"] = [1, total]
+        self.metrics["mw"] = [1, max(total - self.seconds("view"), 0.0)]
+
+    def header_value(self) -> str:
+        parts = []
+        for name, description in METRICS.items():
+            if name not in self.metrics:
+                continue
+            count, seconds = self.metrics[name]
+            if name in ("db", "crypto"):
+                description = f"{description} ({count})"
+            parts.append(f'{name};dur={seconds * 1000:.1f};desc="{description}"')
+        return ", ".join(parts)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Structured fields for the audit record"""
+        data = {}
+        for name, (count, seconds) in self.metrics.items():
+            if name in ("db", "crypto"):
+                data[f"{name}_count"] = count
+            data[f"{name}_ms"] = round(seconds * 1000, 2)
+        return data
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def get_sample_rate() -> float:
+    """Fraction of requests to instrument"""
+    return getattr(settings, "HIPAA_SETTINGS", {}).get("SERVER_TIMING_SAMPLE_RATE", 0)
+
+
+def start(started: float, always: bool = False):
+    """
+    Begin timing the current request if it is sampled, or regardless when
+    always is set (e.g. for metrics). Returns a token for end(), or None
+    when the request is not timed.
+    """
+    rate = get_sample_rate()
+    sampled = rate > 0 and (rate >= 1 or random.random() < rate)
+    if not (sampled or always):
+        return None
+    return _current.set(RequestTimings(started, sampled))
+
+
+def end(token) -> Optional[RequestTimings]:
+    """Stop timing the request started with token and return its timings"""
+    timings = _current.get()
+    _current.reset(token)
+    if timings is not None:
+        timings.finish()
+    return timings
+
+
+def current() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def timed(name: str) -> Callable:
+    """Decorator adding a function's run time to metric name"""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = _current.get()
+            if timings is None or name in timings._open:
+                return func(*args, **kwargs)
+            timings._open.add(name)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings._open.discard(name)
+                timings.add(name, time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+def timed_view(get_response: Callable) -> Callable:
+    """Wrap a middleware's get_response so the rest of the chain counts as view time"""
+    if iscoroutinefunction(get_response):
+
+        async def async_wrapper(request):
+            timings = _current.get()
+            if timings is None:
+                return await get_response(request)
+            started = time.perf_counter()
+            try:
+                return await get_response(request)
+            finally:
+                timings.add("view", time.perf_counter() - started)
+
+        return markcoroutinefunction(async_wrapper)
+
+    def wrapper(request):
+        timings = _current.get()
+        if timings is None:
+            return get_response(request)
+        started = time.perf_counter()
+        try:
+            return get_response(request)
+        finally:
+            timings.add("view", time.perf_counter() - started)
+
+    return wrapper
+
+
+def time_queries(execute, sql, params, many, context):
+    """Connection execute wrapper counting query time for timed requests"""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add("db", time.perf_counter() - started)
+
+
+def install_query_timer(sender, connection, **kwargs) -> None:
+    """connection_created receiver adding time_queries to every connection"""
+    if time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_queries)
+
+
+def instrument_serializers() -> None:
+    """Time DRF serializer validation and representation"""
+    from rest_framework.serializers import BaseSerializer
+
+    if getattr(BaseSerializer, "_timed", False):
+        return
+    BaseSerializer.is_valid = timed("serializer")(BaseSerializer.is_valid)
+    BaseSerializer.data = property(timed("serializer")(BaseSerializer.data.fget))
+    BaseSerializer._timed = True
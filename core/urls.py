@@ -2,12 +2,21 @@
 Core app URL configuration (Health checks, etc.)
 """
 
+import hmac
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotAllowed, JsonResponse
 from django.urls import path
+from django.views.decorators.http import require_GET
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from . import metrics
+from .health import readiness_checker
+from .routes import route_policy
 
 
+@route_policy(audit=False, rate_limit=None)
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def health_check(request):
@@ -15,7 +24,48 @@ def health_check(request):
     return Response({"status": "ok", "service": "theracare-backend"})
 
 
+@route_policy(audit=False, rate_limit=None)
+async def readiness_check(request):
+    """
+    Readiness for load balancers: probes the database, cache, channel layer
+    and Celery broker (results cached for a few seconds). Returns 503 when a
+    critical dependency is down.
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+
+    report = readiness_checker.cached()
+    if report is None:
+        # Probes block; keep them off the event loop and the sync thread
+        report = await sync_to_async(readiness_checker.check, thread_sensitive=False)()
+
+    status = 503 if report["status"] == "unavailable" else 200
+    return JsonResponse(report, status=status)
+
+
+@route_policy(audit=False, rate_limit=None)
+@require_GET
+def metrics_view(request):
+    """
+    Prometheus metrics for this host, for scrapers sending METRICS_TOKEN or
+    staff users signed in to the admin; everyone else is refused
+    """
+    if not metrics.is_enabled():
+        return HttpResponse("Metrics are disabled", status=404)
+
+    token = getattr(settings, "METRICS_SETTINGS", {}).get("TOKEN")
+    has_token = bool(token) and hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    )
+    if not has_token and not request.user.is_staff:
+        return HttpResponse("Unauthorized", status=401)
+
+    return metrics.render_metrics()
+
+
 # URL patterns
 urlpatterns = [
     path("", health_check, name="health_check"),
+    path("ready", readiness_check, name="readiness_check"),
+    path("metrics", metrics_view, name="metrics"),
 ]
@@ -0,0 +1,19 @@
+# Generated manually on 2026-10-16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("theracare_messages", "0003_rename_content_encrypted_to_content"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["thread", "-created_at"], name="messages_thread__b340e9_idx"
+            ),
+        ),
+    ]
@@ -45,6 +45,10 @@ class Message(models.Model):
     class Meta:
         db_table = "messages"
         ordering = ["-created_at"]
+        indexes = [
+            # Keyset pagination of a thread's messages
+            models.Index(fields=["thread", "-created_at"]),
+        ]
 
 
 class MessageAttachment(models.Model):
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q
 from django.utils import timezone
+from core.pagination import SelectablePagination
 from .models import Message, MessageThread
 from .serializers import (
     MessageSerializer,
@@ -39,6 +40,8 @@ class MessageThreadViewSet(viewsets.ModelViewSet):
 class MessageViewSet(viewsets.ModelViewSet):
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = SelectablePagination
+    cursor_ordering_field = "created_at"
 
     def get_queryset(self):
         user = self.request.user
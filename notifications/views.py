@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
+from core.pagination import SelectablePagination
 from .models import Notification
 from .serializers import NotificationSerializer
 
@@ -10,6 +11,8 @@ from .serializers import NotificationSerializer
 class NotificationViewSet(viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = SelectablePagination
+    cursor_ordering_field = "created_at"
 
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.validators import RegexValidator
 from users.models import User
+from core.storage import EncryptedFileSystemStorage
 import uuid
 
 
@@ -279,7 +280,10 @@ class PatientDocument(models.Model):
     description = models.TextField(blank=True)
 
     # File information
-    file = models.FileField(upload_to="patient_documents/")
+    # Encrypted at rest in streamed, authenticated chunks
+    file = models.FileField(
+        upload_to="patient_documents/", storage=EncryptedFileSystemStorage()
+    )
     file_size = models.PositiveIntegerField()
     mime_type = models.CharField(max_length=255)
     is_encrypted = models.BooleanField(default=True)
@@ -4,7 +4,7 @@ Handles decryption of PHI fields for API responses.
 """
 
 from rest_framework import serializers
-from .models import Patient
+from .models import Patient, PatientDocument
 from users.serializers import UserListSerializer
 from users.models import User
 from django.db import transaction
@@ -264,3 +264,44 @@ class PatientDetailSerializer(serializers.ModelSerializer):
         logger.info(f"Updated patient: {instance.patient_number}")
 
         return instance
+
+
+class PatientDocumentSerializer(serializers.ModelSerializer):
+    """Serializer for patient document metadata and uploads."""
+
+    uploaded_by_name = serializers.CharField(
+        source="uploaded_by.get_full_name", read_only=True
+    )
+    file = serializers.FileField(write_only=True)
+
+    class Meta:
+        model = PatientDocument
+        fields = [
+            "id",
+            "patient",
+            "document_type",
+            "title",
+            "description",
+            "file",
+            "file_size",
+            "mime_type",
+            "is_encrypted",
+            "uploaded_by",
+            "uploaded_by_name",
+            "requires_signature",
+            "is_signed",
+            "signed_date",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = [
+            "id",
+            "file_size",
+            "mime_type",
+            "is_encrypted",
+            "uploaded_by",
+            "is_signed",
+            "signed_date",
+            "created_at",
+            "updated_at",
+        ]
@@ -4,10 +4,12 @@ Patients app URL configuration
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PatientViewSet
+from .views import PatientDocumentViewSet, PatientViewSet
 
 # Create a router and register our viewsets with it
 router = DefaultRouter()
+# Registered before the patient routes so "documents" is not taken as a patient pk
+router.register(r"documents", PatientDocumentViewSet, basename="patient-document")
 router.register(r"", PatientViewSet, basename="patient")
 
 # URL patterns
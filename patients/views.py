@@ -3,13 +3,22 @@ Patient views for TheraCare EHR System.
 HIPAA-compliant patient management with role-based access.
 """
 
-from rest_framework import viewsets, permissions, status
+from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.parsers import FormParser, JSONParser
 from rest_framework.response import Response
 from django.db.models import Q
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
-from .models import Patient
-from .serializers import PatientListSerializer, PatientDetailSerializer
+from core.parsers import EncryptedMultiPartParser
+from core.storage import parse_range_header
+from .models import Patient, PatientDocument
+from .serializers import (
+    PatientListSerializer,
+    PatientDetailSerializer,
+    PatientDocumentSerializer,
+)
 from users.email_service import send_registration_email
 import logging
 
@@ -190,3 +199,129 @@ class PatientViewSet(viewsets.ModelViewSet):
                 {"error": f"Error sending email: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+
+class PatientDocumentViewSet(
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.CreateModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    ViewSet for patient documents.
+    Uploads are encrypted while streaming to storage and downloads are
+    decrypted chunk by chunk, with HTTP Range support.
+    """
+
+    serializer_class = PatientDocumentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    # Uploads are encrypted chunk by chunk as they arrive
+    parser_classes = [EncryptedMultiPartParser, FormParser, JSONParser]
+
+    def get_queryset(self):
+        """Filter documents based on user role, optionally by ?patient=."""
+        user = self.request.user
+        queryset = PatientDocument.objects.filter(is_active=True).select_related(
+            "uploaded_by"
+        )
+
+        if user.role == "client":
+            if not hasattr(user, "patient_profile"):
+                return queryset.none()
+            queryset = queryset.filter(patient=user.patient_profile)
+        elif user.role not in ["admin", "therapist"]:
+            return queryset.none()
+
+        patient_id = self.request.query_params.get("patient")
+        if patient_id:
+            queryset = queryset.filter(patient_id=patient_id)
+        return queryset.order_by("-created_at")
+
+    def perform_create(self, serializer):
+        """Record upload metadata and audit log the upload."""
+        user = self.request.user
+        patient = serializer.validated_data["patient"]
+        if user.role == "client" and (
+            not hasattr(user, "patient_profile") or user.patient_profile != patient
+        ):
+            raise PermissionDenied("Clients can only upload their own documents")
+
+        upload = serializer.validated_data["file"]
+        serializer.save(
+            uploaded_by=user,
+            file_size=upload.size,
+            mime_type=getattr(upload, "content_type", None)
+            or "application/octet-stream",
+            is_encrypted=True,
+        )
+
+        logger.info(
+            "Patient document uploaded",
+            extra={
+                "event_type": "document_upload",
+                "user_id": str(user.id),
+                "patient_id": str(patient.id),
+                "timestamp": timezone.now().isoformat(),
+            },
+        )
+
+    def perform_destroy(self, instance):
+        """Deactivate rather than delete so the audit trail is preserved."""
+        instance.is_active = False
+        instance.save(update_fields=["is_active", "updated_at"])
+
+        logger.warning(
+            "Patient document deactivated",
+            extra={
+                "event_type": "document_delete",
+                "user_id": str(self.request.user.id),
+                "patient_id": str(instance.patient_id),
+                "timestamp": timezone.now().isoformat(),
+            },
+        )
+
+    @action(detail=True, methods=["get"])
+    def download(self, request, pk=None):
+        """Stream the decrypted document, honouring a single byte Range."""
+        document = self.get_object()
+        reader = document.file.storage.open_decrypted(document.file.name)
+
+        try:
+            byte_range = parse_range_header(request.headers.get("Range"), reader.size)
+        except ValueError:
+            reader.close()
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{reader.size}"
+            return response
+
+        start, end = byte_range or (0, reader.size - 1)
+
+        def stream():
+            with reader:
+                yield from reader.iter_range(start, end)
+
+        response = StreamingHttpResponse(
+            stream(),
+            status=206 if byte_range else 200,
+            content_type=document.mime_type or "application/octet-stream",
+        )
+        response["Content-Length"] = str(max(end - start + 1, 0))
+        response["Accept-Ranges"] = "bytes"
+        response["Content-Disposition"] = (
+            f'attachment; filename="{document.file.name.rsplit("/", 1)[-1]}"'
+        )
+        response["Cache-Control"] = "no-store"
+        if byte_range:
+            response["Content-Range"] = f"bytes {start}-{end}/{reader.size}"
+
+        logger.info(
+            "Patient document downloaded",
+            extra={
+                "event_type": "document_download",
+                "user_id": str(request.user.id),
+                "patient_id": str(document.patient_id),
+                "timestamp": timezone.now().isoformat(),
+            },
+        )
+        return response
@@ -8,6 +8,7 @@ from rest_framework.response import Response
 from django.utils import timezone
 from django.db.models import Q
 from datetime import datetime, timedelta
+from users.search import BlindIndexSearchFilter
 from .models import SOAPNote
 from .serializers import SOAPNoteSerializer, SOAPNoteCreateSerializer
 
@@ -61,14 +62,10 @@ class SOAPNoteViewSet(viewsets.ModelViewSet):
 
     queryset = SOAPNote.objects.all()
     permission_classes = [SOAPNotePermission]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = [
-        "chief_complaint",
-        "patient__first_name",
-        "patient__last_name",
-        "therapist__first_name",
-        "therapist__last_name",
-    ]
+    filter_backends = [BlindIndexSearchFilter, filters.OrderingFilter]
+    search_fields = ["chief_complaint"]
+    # Encrypted patient/therapist names are searched through blind indexes
+    blind_index_search_fields = ["patient", "therapist"]
     ordering_fields = ["session_date", "created_at", "updated_at", "status"]
     ordering = ["-session_date"]
 
@@ -1,6 +1,7 @@
 import json
 import logging
 from channels.generic.websocket import AsyncWebsocketConsumer
+from core.metrics import channel_send_timer
 
 logger = logging.getLogger(__name__)
 
@@ -43,14 +44,15 @@ class VideoCallConsumer(AsyncWebsocketConsumer):
             data = json.loads(text_data)
             
             # Broadcast the message to the Redis group
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'signal_message',
-                    'message': data,
-                    'sender_channel_name': self.channel_name  # Track who sent it
-                }
-            )
+            with channel_send_timer('group_send'):
+                await self.channel_layer.group_send(
+                    self.room_group_name,
+                    {
+                        'type': 'signal_message',
+                        'message': data,
+                        'sender_channel_name': self.channel_name  # Track who sent it
+                    }
+                )
             
         except json.JSONDecodeError as e:
             logger.error(f'Invalid JSON received: {e}')
@@ -5,6 +5,7 @@ from pathlib import Path
 from datetime import timedelta
 from django.core.exceptions import ImproperlyConfigured
 from decouple import config
+from celery.schedules import crontab
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -77,6 +78,10 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "core.middleware.AuditMiddleware",
     "core.middleware.HIPAAComplianceMiddleware",
+    # After authentication and HIPAAComplianceMiddleware (which sets
+    # request.client_ip): buckets are per user, else per IP
+    "core.middleware.RateLimitMiddleware",
+    "core.middleware.QueryInspectorMiddleware",
 ]
 
 ROOT_URLCONF = "theracare.urls"
@@ -287,12 +292,149 @@ HIPAA_SETTINGS = {
     "ENCRYPTION_KEY": config(
         "ENCRYPTION_KEY", default="hipaa-encryption-key-change-in-production"
     ),
+    # Key for HMAC search indexes on encrypted identity fields; derived from
+    # ENCRYPTION_KEY when unset. Changing it requires rebuild_blind_indexes.
+    "BLIND_INDEX_KEY": config("BLIND_INDEX_KEY", default=""),
+    # Previous ENCRYPTION_KEY values, still accepted for decryption until
+    # rotate_phi_keys has re-encrypted every row (comma-separated)
+    "RETIRED_ENCRYPTION_KEYS": config(
+        "RETIRED_ENCRYPTION_KEYS",
+        default="",
+        cast=lambda v: [s.strip() for s in v.split(",") if s.strip()],
+    ),
     "AUDIT_ALL_REQUESTS": True,
     "REQUIRE_STRONG_PASSWORDS": True,
     "SESSION_TIMEOUT": 30,  # minutes
+    # Session activity is written to the cache at most once per this many
+    # seconds per session, in batches every SESSION_ACTIVITY_FLUSH_INTERVAL
+    "SESSION_ACTIVITY_GRANULARITY": config(
+        "SESSION_ACTIVITY_GRANULARITY", default=60, cast=int
+    ),
+    "SESSION_ACTIVITY_FLUSH_INTERVAL": config(
+        "SESSION_ACTIVITY_FLUSH_INTERVAL", default=5, cast=int
+    ),
     "MAX_LOGIN_ATTEMPTS": 3,
     "LOCKOUT_DURATION": 15,  # minutes
     "REQUIRE_2FA": config("REQUIRE_2FA", default=False, cast=bool),
+    # Ciphertext format for new writes ("v1" legacy base64 wrap, "v2" compact).
+    # Stays "v1" until every instance reads v2 and upgrade_phi_ciphertext ran,
+    # so a rollback to code without v2 support can still decrypt new rows
+    "CIPHERTEXT_FORMAT": config("CIPHERTEXT_FORMAT", default="v1"),
+    # Decrypted values memoized per request, keyed by ciphertext
+    "DECRYPTION_MEMO_SIZE": config("DECRYPTION_MEMO_SIZE", default=512, cast=int),
+    # Threads used by encrypt_many/decrypt_many for large batches (0 = inline)
+    "BATCH_CRYPTO_WORKERS": config("BATCH_CRYPTO_WORKERS", default=0, cast=int),
+    # Request audit records are queued and bulk-written to AuditLog in the
+    # background; batches spill to AUDIT_SPILL_PATH when the database is slow
+    "AUDIT_DB_WRITER": config("AUDIT_DB_WRITER", default=True, cast=bool),
+    "AUDIT_QUEUE_SIZE": config("AUDIT_QUEUE_SIZE", default=10000, cast=int),
+    "AUDIT_BATCH_SIZE": config("AUDIT_BATCH_SIZE", default=200, cast=int),
+    "AUDIT_FLUSH_INTERVAL": config("AUDIT_FLUSH_INTERVAL", default=1.0, cast=float),
+    "AUDIT_SLOW_FLUSH_SECONDS": config(
+        "AUDIT_SLOW_FLUSH_SECONDS", default=2.0, cast=float
+    ),
+    "AUDIT_SPILL_PATH": BASE_DIR / "logs" / "audit_spill.ndjson",
+    # Monthly AuditLog partitions on PostgreSQL (audit_partitions command),
+    # created this many months ahead. Retention is AUDIT_HOT_MONTHS below:
+    # older months are archived, then their emptied partitions dropped
+    "AUDIT_PARTITION_MONTHS_AHEAD": config(
+        "AUDIT_PARTITION_MONTHS_AHEAD", default=3, cast=int
+    ),
+    # Rows fetched per server-side cursor round trip by /api/audit/logs/export/
+    "AUDIT_EXPORT_CHUNK_SIZE": config(
+        "AUDIT_EXPORT_CHUNK_SIZE", default=2000, cast=int
+    ),
+    # HMAC key for the AuditLog hash chain (audit.integrity); derived from
+    # ENCRYPTION_KEY when unset. Changing it invalidates existing chains.
+    "AUDIT_INTEGRITY_KEY": config("AUDIT_INTEGRITY_KEY", default=""),
+    # Chained records per Merkle checkpoint (verify_audit_integrity)
+    "AUDIT_CHECKPOINT_INTERVAL": config(
+        "AUDIT_CHECKPOINT_INTERVAL", default=10000, cast=int
+    ),
+    # Cold tier (archive_audit_logs): months older than AUDIT_HOT_MONTHS move
+    # to encrypted segment files under AUDIT_ARCHIVE_PATH, AUDIT_ARCHIVE_BLOCK_ROWS
+    # rows per compressed block, deleted from the table in chunks. The path
+    # must be durable (a Railway volume or mounted bucket; the app directory
+    # is replaced on redeploy). Required in production: until it is set nothing
+    # is archived, no partition is dropped and the beat tasks log an error
+    "AUDIT_ARCHIVE_PATH": config("AUDIT_ARCHIVE_PATH", default=""),
+    "AUDIT_HOT_MONTHS": config("AUDIT_HOT_MONTHS", default=12, cast=int),
+    "AUDIT_ARCHIVE_BLOCK_ROWS": config(
+        "AUDIT_ARCHIVE_BLOCK_ROWS", default=2000, cast=int
+    ),
+    "AUDIT_ARCHIVE_DELETE_CHUNK": config(
+        "AUDIT_ARCHIVE_DELETE_CHUNK", default=5000, cast=int
+    ),
+    # Largest batch accepted by POST /api/audit/logs/batch/
+    "AUDIT_BATCH_MAX_ENTRIES": config(
+        "AUDIT_BATCH_MAX_ENTRIES", default=5000, cast=int
+    ),
+    # Fraction of requests timed (DB, encryption, serializer, middleware) and
+    # reported in a Server-Timing header and on the audit record; 0 disables
+    "SERVER_TIMING_SAMPLE_RATE": config(
+        "SERVER_TIMING_SAMPLE_RATE", default=0.0, cast=float
+    ),
+}
+
+# Token-bucket rate limits (core.ratelimit): each policy allows "requests"
+# per "window" seconds per user (or per IP when anonymous). Routes pick a
+# policy through ROUTE_POLICIES below; DEFAULT_POLICY applies otherwise.
+RATE_LIMIT_SETTINGS = {
+    "POLICIES": {
+        "login": {"requests": 5, "window": 300},
+        "sensitive": {"requests": 100, "window": 3600},
+        "api": {"requests": 1000, "window": 3600},
+    },
+    "DEFAULT_POLICY": "api",
+}
+
+# Sampled N+1 and slow query detection (core.query_inspector). Query shapes
+# run more than REPEAT_THRESHOLD times in one request, and statements slower
+# than SLOW_QUERY_MS, are logged to theracare.queries with the view name.
+# The 0.01 default is on in production: 1% of requests are profiled, and
+# those walk the stack once per repeated or slow shape to find the caller.
+# Set QUERY_INSPECTOR_SAMPLE_RATE=0 to turn it off.
+QUERY_INSPECTOR_SETTINGS = {
+    "SAMPLE_RATE": config("QUERY_INSPECTOR_SAMPLE_RATE", default=0.01, cast=float),
+    "REPEAT_THRESHOLD": config("QUERY_INSPECTOR_REPEAT_THRESHOLD", default=5, cast=int),
+    "SLOW_QUERY_MS": config("QUERY_INSPECTOR_SLOW_QUERY_MS", default=200, cast=int),
+}
+
+# Readiness probes at /api/health/ready (core.health). A failing CRITICAL
+# dependency returns 503; other failures report "degraded" with 200.
+READINESS_SETTINGS = {
+    "CHECKS": ["database", "cache", "channel_layer", "celery_broker"],
+    "CRITICAL": ["database", "cache", "channel_layer"],
+    "TIMEOUT": config("READINESS_TIMEOUT", default=2.0, cast=float),
+    "CACHE_SECONDS": config("READINESS_CACHE_SECONDS", default=5.0, cast=float),
+}
+
+# Prometheus metrics at /api/health/metrics (core.metrics). Off by default:
+# when enabled every request is timed, not just the Server-Timing sample. Set
+# PROMETHEUS_MULTIPROC_DIR in every worker's environment to aggregate all
+# processes on the host.
+METRICS_SETTINGS = {
+    "ENABLED": config("METRICS_ENABLED", default=False, cast=bool),
+    # Scrapers send "Authorization: Bearer <token>"; without a token only
+    # staff users signed in to the admin can read the endpoint
+    "TOKEN": config("METRICS_TOKEN", default=""),
+    # Celery queues whose depth is reported
+    "CELERY_QUEUES": ["celery"],
+}
+
+# Per-route middleware policies (core.routes), classified once from the
+# URLconf. Keys are installed app names, view modules or URL names
+# ("namespace:name" where the URLconf sets app_name); views may also declare
+# a route_policy, which takes precedence. Fields: "audit" (write an audit
+# record), "phi" (record it as PHI access) and "rate_limit" (a
+# RATE_LIMIT_SETTINGS policy name, or None for no limit).
+ROUTE_POLICIES = {
+    "patients": {"phi": True, "rate_limit": "sensitive"},
+    "soap_notes": {"phi": True, "rate_limit": "sensitive"},
+    "messages": {"phi": True},
+    "billing": {"phi": True},
+    "admin:jsi18n": {"audit": False},
+    "django.views.static": {"audit": False, "rate_limit": None},
 }
 
 # Security Settings
@@ -389,6 +531,20 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    "maintain-audit-partitions": {
+        "task": "audit.tasks.maintain_audit_partitions",
+        "schedule": crontab(hour=2, minute=15),
+    },
+    "create-audit-checkpoints": {
+        "task": "audit.tasks.create_audit_checkpoints",
+        "schedule": crontab(minute=5),
+    },
+    "archive-audit-logs": {
+        "task": "audit.tasks.archive_audit_logs",
+        "schedule": crontab(hour=3, minute=30),
+    },
+}
 
 # Channels Configuration (for WebSockets)
 # Accept common Railway/Redis variable names and fall back to in-memory for local single-process runs.
@@ -526,7 +682,8 @@ if USE_REDIS:
             "BACKEND": "django_redis.cache.RedisCache",
             "LOCATION": config("REDIS_URL", default="redis://localhost:6379/2"),
             "OPTIONS": {
-                "CLIENT_CLASS": "django_redis.client.DefaultClient",
+                # DefaultClient that counts hits and misses for core.metrics
+                "CLIENT_CLASS": "core.cache.InstrumentedRedisClient",
             },
             "KEY_PREFIX": "theracare",
             "TIMEOUT": 300,
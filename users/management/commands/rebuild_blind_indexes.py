@@ -0,0 +1,42 @@
+# backend/users/management/commands/rebuild_blind_indexes.py
+"""
+Django management command to recompute user blind indexes and search tokens,
+e.g. after changing BLIND_INDEX_KEY or bulk-editing names outside save().
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.phi import iter_pk_batches
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Recompute blind indexes and search tokens for all users"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Users processed per transaction (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        bidx_fields = [f"{field}_bidx" for field in User.BLIND_INDEXED_FIELDS]
+
+        for pks in iter_pk_batches(User.objects.all(), options["batch_size"]):
+            with transaction.atomic():
+                users = list(User.objects.filter(pk__in=pks))
+                for user in users:
+                    for field in User.BLIND_INDEXED_FIELDS:
+                        setattr(user, f"{field}_bidx", user.compute_blind_index(field))
+                    user.update_search_tokens()
+                User.objects.bulk_update(users, bidx_fields)
+
+            total += len(pks)
+            self.stdout.write(f"  {total} users indexed...")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt blind indexes for {total} users")
+        )
@@ -0,0 +1,93 @@
+# Generated manually on 2026-10-16
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def backfill_blind_indexes(apps, schema_editor):
+    """Compute blind indexes and search tokens for existing users, in batches"""
+    from core.security import BlindIndex
+
+    User = apps.get_model('users', 'User')
+    UserSearchToken = apps.get_model('users', 'UserSearchToken')
+
+    users = User.objects.only('id', 'first_name', 'last_name', 'phone').order_by('pk')
+    last_pk = None
+    while True:
+        batch = users if last_pk is None else users.filter(pk__gt=last_pk)
+        batch = list(batch[:BACKFILL_BATCH_SIZE])
+        if not batch:
+            break
+
+        search_tokens = []
+        for user in batch:
+            user.first_name_bidx = BlindIndex.exact('first_name', user.first_name)
+            user.last_name_bidx = BlindIndex.exact('last_name', user.last_name)
+            user.phone_bidx = BlindIndex.exact('phone', user.phone, 'phone')
+
+            tokens = set(BlindIndex.prefix_tokens('first_name', user.first_name))
+            tokens.update(BlindIndex.prefix_tokens('last_name', user.last_name))
+            search_tokens.extend(
+                UserSearchToken(user_id=user.id, token=token) for token in sorted(tokens)
+            )
+
+        User.objects.bulk_update(
+            batch, ['first_name_bidx', 'last_name_bidx', 'phone_bidx']
+        )
+        UserSearchToken.objects.bulk_create(
+            search_tokens, batch_size=BACKFILL_BATCH_SIZE
+        )
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='first_name_bidx',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='last_name_bidx',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='phone_bidx',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['first_name_bidx'], name='users_first_n_719d81_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['last_name_bidx'], name='users_last_na_ce401e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['phone_bidx'], name='users_phone_b_ca6fff_idx'),
+        ),
+        migrations.CreateModel(
+            name='UserSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=32)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'user_search_tokens',
+                'indexes': [models.Index(fields=['token', 'user'], name='user_search_token_61d0f3_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_blind_indexes, migrations.RunPython.noop),
+    ]
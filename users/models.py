@@ -3,7 +3,7 @@ from django.db import models
 from django.utils import timezone
 from django.core.validators import RegexValidator
 from django.contrib.auth.base_user import BaseUserManager
-from core.security import encryption
+from core.security import BlindIndex, encryption
 import uuid
 
 
@@ -62,6 +62,11 @@ class User(AbstractBaseUser, PermissionsMixin):
     last_name = models.TextField(max_length=500, help_text="Encrypted field")
     phone = models.TextField(max_length=500, blank=True, help_text="Encrypted field")
 
+    # Blind indexes (keyed HMAC) for exact lookups on the encrypted fields
+    first_name_bidx = models.CharField(max_length=32, blank=True, editable=False)
+    last_name_bidx = models.CharField(max_length=32, blank=True, editable=False)
+    phone_bidx = models.CharField(max_length=32, blank=True, editable=False)
+
     # Role and permissions
     role = models.CharField(max_length=20, choices=Role.choices, default=Role.CLIENT)
     status = models.CharField(
@@ -117,12 +122,58 @@ class User(AbstractBaseUser, PermissionsMixin):
             models.Index(fields=["role"]),
             models.Index(fields=["status"]),
             models.Index(fields=["is_active"]),
+            models.Index(fields=["first_name_bidx"]),
+            models.Index(fields=["last_name_bidx"]),
+            models.Index(fields=["phone_bidx"]),
         ]
 
+    # Encrypted fields covered by blind indexes, with their normalization kind
+    BLIND_INDEXED_FIELDS = {"first_name": "text", "last_name": "text", "phone": "phone"}
+    # Encrypted fields searchable by word prefix
+    PREFIX_SEARCH_FIELDS = ["first_name", "last_name"]
+
     def save(self, *args, **kwargs):
-        """Override save method"""
+        """Override save to keep blind indexes in sync"""
+        update_fields = kwargs.get("update_fields")
+        indexed_fields = set(self.BLIND_INDEXED_FIELDS)
+        if update_fields is not None:
+            indexed_fields &= set(update_fields)
+
+        changed = False
+        for field in indexed_fields:
+            bidx = self.compute_blind_index(field)
+            if bidx != getattr(self, f"{field}_bidx") or self._state.adding:
+                setattr(self, f"{field}_bidx", bidx)
+                changed = True
+
+        if update_fields is not None and indexed_fields:
+            kwargs["update_fields"] = set(update_fields) | {
+                f"{field}_bidx" for field in indexed_fields
+            }
+
         super().save(*args, **kwargs)
 
+        if changed:
+            self.update_search_tokens()
+
+    def compute_blind_index(self, field):
+        """Exact-match blind index for one of BLIND_INDEXED_FIELDS"""
+        return BlindIndex.exact(
+            field, getattr(self, field), self.BLIND_INDEXED_FIELDS[field]
+        )
+
+    def update_search_tokens(self):
+        """Replace this user's prefix search tokens"""
+        tokens = {
+            token
+            for field in self.PREFIX_SEARCH_FIELDS
+            for token in BlindIndex.prefix_tokens(field, getattr(self, field))
+        }
+        UserSearchToken.objects.filter(user=self).delete()
+        UserSearchToken.objects.bulk_create(
+            [UserSearchToken(user=self, token=token) for token in tokens]
+        )
+
     def get_decrypted_first_name(self):
         """Get first name - no encryption now"""
         return self.first_name or ""
@@ -209,6 +260,24 @@ class User(AbstractBaseUser, PermissionsMixin):
         return f"{self.get_full_name()} ({self.email})"
 
 
+class UserSearchToken(models.Model):
+    """Blind-index prefix token for searching encrypted user name fields"""
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="search_tokens"
+    )
+    token = models.CharField(max_length=32)
+
+    class Meta:
+        db_table = "user_search_tokens"
+        indexes = [
+            models.Index(fields=["token", "user"]),
+        ]
+
+    def __str__(self):
+        return f"Search token for {self.user_id}"
+
+
 class UserProfile(models.Model):
     """Extended user profile information"""
 
@@ -265,7 +334,7 @@ class UserProfile(models.Model):
 
         for field in fields_to_encrypt:
             value = getattr(self, field, None)
-            if value and not value.startswith("gAAAAAB"):  # Not already encrypted
+            if value and not encryption.is_encrypted(value):  # Not already encrypted
                 setattr(self, field, encryption.encrypt(value))
 
         super().save(*args, **kwargs)
@@ -0,0 +1,90 @@
+"""
+Search over encrypted user identity fields using blind indexes.
+
+Names and phone numbers are matched through keyed HMAC tokens
+(``User.*_bidx`` and ``UserSearchToken``), so lookups are indexed equality
+scans instead of ``icontains`` over ciphertext.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+from rest_framework import filters
+from core.security import BlindIndex
+from .models import User
+
+
+def matching_user_ids(term):
+    """
+    Subquery of user ids whose first or last name has a word starting with
+    term, or whose phone number equals term.
+    """
+    tokens = [
+        token
+        for token in (
+            BlindIndex.search_token(field, term) for field in User.PREFIX_SEARCH_FIELDS
+        )
+        if token
+    ]
+    query = Q(search_tokens__token__in=tokens) if tokens else Q(pk__in=[])
+
+    digits = BlindIndex.normalize(term, "phone")
+    if len(digits) >= 7:
+        query |= Q(phone_bidx=BlindIndex.exact("phone", digits, "phone"))
+
+    return User.objects.filter(query).values("pk")
+
+
+def user_search_q(term, relation=""):
+    """Q object matching term against the users reached through relation"""
+    lookup = f"{relation}__in" if relation else "pk__in"
+    return Q(**{lookup: matching_user_ids(term)})
+
+
+class BlindIndexSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter that also matches encrypted user fields through blind
+    indexes.
+
+    Views list plaintext columns in ``search_fields`` as usual, and the user
+    relations whose names should be searchable in
+    ``blind_index_search_fields`` (e.g. ``["patient", "therapist"]``).
+    Each search term must match at least one of them.
+
+    Only the ``^`` (starts with) and ``=`` (exact) prefixes are supported on
+    search_fields; ``@`` (full text) and ``$`` (regex) raise
+    ImproperlyConfigured rather than being searched as field names.
+    """
+
+    lookup_prefixes = {
+        "^": "istartswith",
+        "=": "iexact",
+    }
+
+    def construct_search(self, field_name, queryset):
+        prefix = field_name[0]
+        if prefix not in self.lookup_prefixes and not (
+            prefix.isalpha() or prefix == "_"
+        ):
+            raise ImproperlyConfigured(
+                f"{type(self).__name__} does not support the {prefix!r} search "
+                f"prefix (search field {field_name!r})"
+            )
+        return super().construct_search(field_name, queryset)
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request) or []
+        relations = getattr(view, "blind_index_search_fields", [])
+        search_terms = self.get_search_terms(request)
+
+        if not search_terms or not (search_fields or relations):
+            return queryset
+
+        for term in search_terms:
+            term_query = Q()
+            for field in search_fields:
+                term_query |= Q(**{self.construct_search(field, queryset): term})
+            for relation in relations:
+                term_query |= user_search_q(term, relation)
+            queryset = queryset.filter(term_query)
+
+        return queryset
@@ -0,0 +1,160 @@
+from importlib import import_module
+from unittest import mock
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+from rest_framework import generics, serializers
+from rest_framework.test import APIRequestFactory, force_authenticate
+from core.security import BlindIndex
+from soap_notes.models import SOAPNote
+from soap_notes.views import SOAPNoteViewSet
+from users.models import User, UserSearchToken
+from users.search import BlindIndexSearchFilter
+from users.views import UserListView
+
+backfill = import_module("users.migrations.0002_user_blind_indexes")
+
+
+class SearchTestCase(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.admin = self.user("admin", "Ada", "Admin", role="admin")
+        self.janet = self.user("jdoe", "Janet", "Doe", phone="(555) 010-2000")
+        self.jane = self.user("jsmith", "Jane", "Smith")
+        self.bob = self.user("bob", "Robert", "Janeway")
+
+    def user(self, username, first_name, last_name, role="client", **fields):
+        return User.objects.create_user(
+            username,
+            f"{username}@example.com",
+            "pw-Search-1",
+            role=role,
+            first_name=first_name,
+            last_name=last_name,
+            **fields,
+        )
+
+    def search(self, view, search, user=None):
+        request = self.factory.get("/api/users/", {"search": search})
+        force_authenticate(request, user=user or self.admin)
+        response = view.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        results = response.data
+        if isinstance(results, dict):
+            results = results["results"]
+        return {row["username"] for row in results}
+
+
+class UserListSearchTests(SearchTestCase):
+    def test_names_match_by_word_prefix(self):
+        self.assertEqual(self.search(UserListView, "jan"), {"jdoe", "jsmith", "bob"})
+        self.assertEqual(self.search(UserListView, "janet"), {"jdoe"})
+        self.assertEqual(self.search(UserListView, "janew"), {"bob"})
+        self.assertEqual(self.search(UserListView, "Jane Smith"), {"jsmith"})
+        self.assertEqual(self.search(UserListView, "anet"), set())
+
+    def test_username_email_and_phone(self):
+        self.assertEqual(self.search(UserListView, "smi"), {"jsmith"})
+        self.assertEqual(self.search(UserListView, "bob@example"), {"bob"})
+        self.assertEqual(self.search(UserListView, "555-010-2000"), {"jdoe"})
+
+    def test_search_is_admin_only(self):
+        therapist = self.user("therapist", "Terry", "Pist", role="therapist")
+        self.assertIn("jdoe", self.search(UserListView, "zzz", user=therapist))
+
+
+class UserSearchSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ["username"]
+
+
+class FilteredUserView(generics.ListAPIView):
+    queryset = User.objects.order_by("pk")
+    serializer_class = UserSearchSerializer
+    filter_backends = [BlindIndexSearchFilter]
+    blind_index_search_fields = [""]
+
+
+class BlindIndexSearchFilterTests(SearchTestCase):
+    def view(self, *search_fields, relations=("",)):
+        return type(
+            "View",
+            (FilteredUserView,),
+            {
+                "search_fields": list(search_fields),
+                "blind_index_search_fields": relations,
+            },
+        )
+
+    def test_plain_fields_are_contains_matches(self):
+        view = self.view("username", relations=[])
+        self.assertEqual(self.search(view, "sm"), {"jsmith"})
+
+    def test_prefixes(self):
+        self.assertEqual(
+            self.search(self.view("^username", relations=[]), "js"), {"jsmith"}
+        )
+        self.assertEqual(
+            self.search(self.view("^username", relations=[]), "mith"), set()
+        )
+        self.assertEqual(
+            self.search(self.view("=email", relations=[]), "BOB@example.com"), {"bob"}
+        )
+        self.assertEqual(self.search(self.view("=email", relations=[]), "bob"), set())
+
+    def test_plain_and_blind_indexed_matches_combine(self):
+        view = self.view("=username")
+        self.assertEqual(self.search(view, "bob"), {"bob"})
+        self.assertEqual(self.search(view, "janew"), {"bob"})
+        # Every term must match
+        self.assertEqual(self.search(view, "jane smi"), {"jsmith"})
+
+    def test_unsupported_prefixes_are_rejected(self):
+        for field in ("@username", "$username"):
+            with self.subTest(field=field):
+                with self.assertRaisesMessage(ImproperlyConfigured, field):
+                    self.search(self.view(field), "jane")
+
+    def test_soap_notes_search_complaints_and_user_names(self):
+        # soap_notes has no migrations yet, so the query is checked unexecuted
+        request = self.factory.get("/api/soap-notes/", {"search": "jane"})
+        force_authenticate(request, user=self.admin)
+        viewset = SOAPNoteViewSet(action_map={"get": "list"}, format_kwarg=None)
+        queryset = BlindIndexSearchFilter().filter_queryset(
+            viewset.initialize_request(request), SOAPNote.objects.all(), viewset
+        )
+        sql = str(queryset.query)
+        self.assertIn('"chief_complaint" LIKE', sql)
+        self.assertEqual(sql.count('"user_search_tokens"'), 2)
+
+
+class BlindIndexBackfillTests(TestCase):
+    def test_existing_users_are_indexed_in_batches(self):
+        users = [
+            User.objects.create_user(
+                f"user{i}", f"user{i}@example.com", "pw-Search-1", first_name="Jane"
+            )
+            for i in range(5)
+        ]
+        User.objects.update(first_name_bidx="", last_name_bidx="", phone_bidx="")
+        UserSearchToken.objects.all().delete()
+
+        # Written with bulk_update, never one save() per user
+        with mock.patch.object(backfill, "BACKFILL_BATCH_SIZE", 2), mock.patch.object(
+            User, "save", side_effect=AssertionError
+        ), mock.patch.object(
+            User.objects, "bulk_update", wraps=User.objects.bulk_update
+        ) as bulk_update:
+            backfill.backfill_blind_indexes(apps, None)
+        self.assertEqual(bulk_update.call_count, 3)
+
+        for user in users:
+            user.refresh_from_db()
+            self.assertEqual(
+                user.first_name_bidx, user.compute_blind_index("first_name")
+            )
+        tokens = BlindIndex.prefix_tokens("first_name", "Jane")
+        self.assertEqual(
+            UserSearchToken.objects.filter(user__in=users).count(), 5 * len(tokens)
+        )
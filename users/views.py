@@ -35,6 +35,7 @@ from .serializers import (
     CompleteRegistrationSerializer,
 )
 from .permissions import IsAdminOrSelf, IsAdminUser, IsTherapistOrAdmin
+from .search import user_search_q
 from .email_service import send_registration_email
 import logging
 
@@ -45,6 +46,7 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     """Custom login view with enhanced security and audit logging."""
 
     serializer_class = CustomTokenObtainPairSerializer
+    route_policy = {"rate_limit": "login"}
 
 
 class CustomTokenRefreshView(TokenRefreshView):
@@ -437,14 +439,16 @@ class UserListView(generics.ListAPIView):
             if is_active is not None:
                 queryset = queryset.filter(is_active=is_active.lower() == "true")
 
-            # Search by name or username
+            # Search by name or username; names go through the blind index
             search = self.request.query_params.get("search")
             if search:
+                name_query = Q()
+                for term in search.split():
+                    name_query &= user_search_q(term)
                 queryset = queryset.filter(
                     Q(username__icontains=search)
-                    | Q(first_name__icontains=search)
-                    | Q(last_name__icontains=search)
                     | Q(email__icontains=search)
+                    | name_query
                 )
 
         return queryset